@@ -1236,7 +1236,7 @@ def SkalarenFieldOutputErstellen(name, session, odbname, referenzAusgabe, beschr
    from math import sqrt, sin, cos, tan, asin, acos, atan
    import odbAccess
    from abaqusConstants import SCALAR, INTEGRATION_POINT
-   from hilfen import Log, _Eval_Basispruefung
+   from hilfen import Log, _BedingungKompilieren
    #
    Log('# Erstelle FieldOutput ' + name);
    mySteps = session.odbData[odbname].steps.keys();
@@ -1252,8 +1252,9 @@ def SkalarenFieldOutputErstellen(name, session, odbname, referenzAusgabe, beschr
       Log('# Abbruch: Kein Schreibzugriff auf die odb moeglich - read only deaktivieren');
       return;
    #
-   if (not _Eval_Basispruefung(code=bedingung,
-      zusatz_erlaubt=['data11', 'data22', 'data33', 'data12', 'data23', 'data13'])):
+   kompilierteBedingung = _BedingungKompilieren(code=bedingung,
+      zusatz_erlaubt=['data11', 'data22', 'data33', 'data12', 'data23', 'data13']);
+   if (kompilierteBedingung is None):
       Log('# Abbruch: Uebergebene bedingung ist ungueltig');
       return;
    #
@@ -1273,7 +1274,7 @@ def SkalarenFieldOutputErstellen(name, session, odbname, referenzAusgabe, beschr
          if useScalar:
             for element in refDaten.values:
                data11 = element.data;
-               neueDaten = eval(bedingung);
+               neueDaten = eval(kompilierteBedingung);
                daten = daten + [(neueDaten,)];
                bezeichnungen = bezeichnungen + [element.elementLabel];
          else:
@@ -1289,7 +1290,7 @@ def SkalarenFieldOutputErstellen(name, session, odbname, referenzAusgabe, beschr
                except IndexError:
                   pass;
                #
-               neueDaten = eval(bedingung);
+               neueDaten = eval(kompilierteBedingung);
                daten = daten + [(neueDaten,)];
                bezeichnungen = bezeichnungen + [elements.elementLabel];
          #
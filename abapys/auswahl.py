@@ -60,21 +60,22 @@ def _BedingteAuswahlIndex(elemente, bedingung='True', var=[]):
    fuer 0, 1 oder 2 und somit eine der drei Bezugsrichtungen steht.
    """
    from math import pi, sqrt, sin, cos, tan, asin, acos, atan
-   from hilfen import Log, _Eval_Basispruefung
+   from hilfen import Log, _BedingungKompilieren
    #
-   ausgewaehlteElemente = elemente[0:0];
    erlaubt = ['coordinates', 'connectivity', 'featureName', 'index', 'instanceName', 'instanceNames',
       'isReferenceRep', 'pointOn', 'sectionCategory', 'label', 'type', 'var', 'elem'];
    #
-   if (not _Eval_Basispruefung(code=bedingung, zusatz_erlaubt=erlaubt)):
+   kompilierteBedingung = _BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt);
+   if (kompilierteBedingung is None):
       Log('# Abbruch: Uebergebene bedingung ist ungueltig');
-      return ausgewaehlteElemente;
+      return elemente[0:0];
    #
+   ausgewaehlteIndizes = [];
    for elem in elemente:
-      if (eval(bedingung)):
-         ausgewaehlteElemente += elemente[elem.index:elem.index+1];
+      if (eval(kompilierteBedingung)):
+         ausgewaehlteIndizes += [elem.index];
    #
-   return ausgewaehlteElemente;
+   return _SequenzAusIndizes(elemente=elemente, indexliste=ausgewaehlteIndizes);
 #
 
 
@@ -90,18 +91,19 @@ def _BedingteAuswahlLabel(elemente, bedingung='True', var=[]):
    fuer 0, 1 oder 2 und somit eine der drei Bezugsrichtungen steht.
    """
    from math import pi, sqrt, sin, cos, tan, asin, acos, atan
-   from hilfen import Log, _Eval_Basispruefung
+   from hilfen import Log, _BedingungKompilieren
    #
    erlaubt = ['coordinates', 'connectivity', 'featureName', 'index', 'instanceName', 'instanceNames',
       'isReferenceRep', 'pointOn', 'sectionCategory', 'label', 'type', 'var', 'elem'];
    #
-   if (not _Eval_Basispruefung(code=bedingung, zusatz_erlaubt=erlaubt)):
+   kompilierteBedingung = _BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt);
+   if (kompilierteBedingung is None):
       Log('# Abbruch: Uebergebene bedingung ist ungueltig');
       return elemente[0:0];
    #
    ausgewaehlteLabels = [];
    for elem in elemente:
-      if (eval(bedingung)):
+      if (eval(kompilierteBedingung)):
          ausgewaehlteLabels += [elem.label];
    #
    return LabelAuswahl(elemente=elemente, labelliste=ausgewaehlteLabels);
@@ -130,33 +132,329 @@ def ZweifachbedingteKantenAuswahl(elemente, bedingung1='True', bedingung2='True'
    zur Verfuegung.
    """
    from math import sqrt, sin, cos, tan, asin, acos, atan
-   from hilfen import Log, _Eval_Basispruefung
-   #
-   kanten1 = elemente.edges[0:0];
-   kanten2 = elemente.edges[0:0];
+   from hilfen import Log, _BedingungKompilieren
    #
    erlaubt = ['coordinates', 'connectivity', 'featureName', 'index', 'instanceName', 'instanceNames',
       'isReferenceRep', 'pointOn', 'sectionCategory', 'label', 'type', 'var', 'edge', 'vert1', 'vert2'];
    #
-   if (any([(not _Eval_Basispruefung(code=bedingung, zusatz_erlaubt=erlaubt)) for bedingung in [bedingung1, bedingung2, bedingung3]])):
+   kompilierteBedingungen = [_BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt)
+      for bedingung in [bedingung1, bedingung2, bedingung3]];
+   if (any([(kompiliert is None) for kompiliert in kompilierteBedingungen])):
       Log('# Abbruch: Uebergebene bedingung1/bedingung2/bedingung3 ungueltig');
       return;
    #
+   kompilierteBedingung1, kompilierteBedingung2, kompilierteBedingung3 = kompilierteBedingungen;
+   idxKanten1 = [];
+   idxKanten2 = [];
    for edge in elemente.edges:
-      if (eval(bedingung1)):
+      if (eval(kompilierteBedingung1)):
          vert1 = elemente.vertices[edge.getVertices()[0]];
          vert2 = elemente.vertices[edge.getVertices()[1]];
-         if (eval(bedingung2)):
-            if (eval(bedingung3)):
-               kanten1 += elemente.edges[edge.index:edge.index+1];
+         if (eval(kompilierteBedingung2)):
+            if (eval(kompilierteBedingung3)):
+               idxKanten1 += [edge.index];
             else:
-               kanten2 += elemente.edges[edge.index:edge.index+1];
+               idxKanten2 += [edge.index];
    #
-   kanten = [kanten1, kanten2];
+   kanten = [_SequenzAusIndizes(elemente=elemente.edges, indexliste=idxKanten1),
+      _SequenzAusIndizes(elemente=elemente.edges, indexliste=idxKanten2)];
    return kanten;
 #
 
 
+# -------------------------------------------------------------------------------------------------
+class _Geometriepunkt(object):
+   """Mini-Klasse als Ersatz fuer Kanten und Eckpunkte in den Bedingungen einer Kantentabelle. Wie
+   bei Abaqus-Elementen kann mit pointOn[0][#] auf die Koordinaten zugegriffen werden.
+   """
+   def __init__(self, index, koordinaten):
+      self.index = index;
+      self.pointOn = (koordinaten, );
+   def __repr__(self):
+      return 'Geometriepunkt (abapys)';
+#
+
+
+# -------------------------------------------------------------------------------------------------
+class Kantentabelle(object):
+   """Klasse fuer wiederholte Auswahlen von Kanten aus geometrie (bspw. ein Part). Beim Erstellen
+   werden einmalig fuer jede Kante die Koordinaten von pointOn sowie der beiden Endpunkte (vert1
+   und vert2) bestimmt. Alle Abfragen arbeiten danach nur auf diesen Koordinaten, ohne erneut
+   getVertices() und die Eckpunkte der geometrie abzufragen.
+   
+   Die Abfragen ParallelZuAchse, Horizontal, Radial, AufEbene und InnerhalbRadius geben Listen mit
+   den Indizes der passenden Kanten zurueck, die mit Restindizes ergaenzt und mit Auswahl in eine
+   Sequenz der Kanten umgewandelt werden koennen. BedingteAuswahl und ZweifachbedingteAuswahl
+   entsprechen BedingteAuswahl und ZweifachbedingteKantenAuswahl fuer die Kanten der geometrie.
+   
+   WICHTIG: Die Kantentabelle muss neu erstellt werden, wenn sich die Kanten der geometrie aendern
+            (bspw. durch eine weitere Partitionierung).
+   """
+   def __init__(self, geometrie):
+      self.kanten = geometrie.edges;
+      eckpunkte = [ecke.pointOn[0] for ecke in geometrie.vertices];
+      #
+      self.kantenpunkte = [];
+      self.eckpunkte1 = [];
+      self.eckpunkte2 = [];
+      for kante in self.kanten:
+         ecken = kante.getVertices();
+         self.kantenpunkte += [kante.pointOn[0]];
+         self.eckpunkte1 += [eckpunkte[ecken[0]]];
+         # Geschlossene Kanten (bspw. Vollkreise) haben nur einen Eckpunkt
+         self.eckpunkte2 += [eckpunkte[ecken[-1]]];
+      #
+      # Ersatzobjekte fuer edge, vert1 und vert2 in den Bedingungen
+      self._kantenobjekte = [_Geometriepunkt(index=idx, koordinaten=punkt)
+         for idx, punkt in enumerate(self.kantenpunkte)];
+      self._eckenobjekte1 = [_Geometriepunkt(index=None, koordinaten=punkt)
+         for punkt in self.eckpunkte1];
+      self._eckenobjekte2 = [_Geometriepunkt(index=None, koordinaten=punkt)
+         for punkt in self.eckpunkte2];
+   #
+   def __repr__(self):
+      return 'Kantentabelle (abapys)';
+   #
+   def __len__(self):
+      return len(self.kantenpunkte);
+   #
+   def Auswahl(self, indizes):
+      """Gib die Sequenz aller Kanten mit den uebergebenen indizes zurueck.
+      """
+      return _SequenzAusIndizes(elemente=self.kanten, indexliste=indizes);
+   #
+   def Restindizes(self, indizes):
+      """Gib die Indizes aller Kanten zurueck, die nicht in indizes enthalten sind.
+      """
+      ausgeschlossen = set(indizes);
+      return [idx for idx in range(len(self.kantenpunkte)) if (idx not in ausgeschlossen)];
+   #
+   def ParallelZuAchse(self, achse, tol=0.0):
+      """Gib die Indizes aller Kanten zurueck, deren Endpunkte sich nur in Richtung achse (0, 1
+      oder 2) um mehr als tol unterscheiden.
+      """
+      andereAchsen = [idx for idx in range(3) if (not (idx == achse))];
+      return [idx for idx, (vert1, vert2) in enumerate(zip(self.eckpunkte1, self.eckpunkte2))
+         if all([(abs(vert1[richtung] - vert2[richtung]) <= tol) for richtung in andereAchsen])];
+   #
+   def Horizontal(self, tol=0.0):
+      """Gib die Indizes aller Kanten zurueck, deren Endpunkte sich in z-Richtung um nicht mehr als
+      tol unterscheiden.
+      """
+      return [idx for idx, (vert1, vert2) in enumerate(zip(self.eckpunkte1, self.eckpunkte2))
+         if (abs(vert1[2] - vert2[2]) <= tol)];
+   #
+   def Radial(self, tol=0.0):
+      """Gib die Indizes aller horizontalen Kanten zurueck, deren Endpunkte und pointOn auf einer
+      gemeinsamen Geraden durch die z-Achse liegen (jeweils mit Toleranz tol).
+      """
+      from math import sqrt
+      #
+      radialeKanten = [];
+      for idx in self.Horizontal(tol=tol):
+         # Der vom Ursprung weiter entfernte Eckpunkt gibt die Richtung vor
+         vert1 = self.eckpunkte1[idx];
+         vert2 = self.eckpunkte2[idx];
+         if (vert1[0]**2 + vert1[1]**2 < vert2[0]**2 + vert2[1]**2):
+            vert1, vert2 = vert2, vert1;
+         #
+         radius = sqrt(vert1[0]**2 + vert1[1]**2);
+         if (radius <= tol):
+            continue;
+         #
+         if (all([(abs(vert1[0]*punkt[1] - vert1[1]*punkt[0])/radius <= tol) and
+            (vert1[0]*punkt[0] + vert1[1]*punkt[1] >= -tol*radius)
+            for punkt in [vert2, self.kantenpunkte[idx]]])):
+            radialeKanten += [idx];
+      #
+      return radialeKanten;
+   #
+   def AufEbene(self, achse, wert, tol=0.0):
+      """Gib die Indizes aller Kanten zurueck, deren Endpunkte und pointOn in Richtung achse (0, 1
+      oder 2) um nicht mehr als tol von wert abweichen.
+      """
+      return [idx for idx, punkte in enumerate(zip(self.kantenpunkte, self.eckpunkte1,
+         self.eckpunkte2)) if all([(abs(punkt[achse] - wert) <= tol) for punkt in punkte])];
+   #
+   def InnerhalbRadius(self, radius, tol=0.0):
+      """Gib die Indizes aller Kanten zurueck, deren pointOn weniger als radius+tol von der z-Achse
+      entfernt ist.
+      """
+      from math import sqrt
+      #
+      return [idx for idx, punkt in enumerate(self.kantenpunkte)
+         if (sqrt(punkt[0]**2 + punkt[1]**2) < radius+tol)];
+   #
+   def BedingteAuswahl(self, bedingung='True', var=[]):
+      """Erstelle eine Sequenz aller Kanten, die bedingung erfuellen (wie BedingteAuswahl). In der
+      Bedingung kann mit elem auf eine einzelne Kante zugegriffen werden, wobei nur
+      elem.pointOn[0][#] und elem.index verfuegbar sind. Gibt die Sequenz der ausgewaehlten Kanten
+      zurueck.
+      """
+      from math import pi, sqrt, sin, cos, tan, asin, acos, atan
+      from hilfen import Log, _BedingungKompilieren
+      #
+      erlaubt = ['index', 'pointOn', 'var', 'elem'];
+      #
+      kompilierteBedingung = _BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt);
+      if (kompilierteBedingung is None):
+         Log('# Abbruch: Uebergebene bedingung ist ungueltig');
+         return self.kanten[0:0];
+      #
+      ausgewaehlteIndizes = [];
+      for elem in self._kantenobjekte:
+         if (eval(kompilierteBedingung)):
+            ausgewaehlteIndizes += [elem.index];
+      #
+      return self.Auswahl(indizes=ausgewaehlteIndizes);
+   #
+   def ZweifachbedingteAuswahl(self, bedingung1='True', bedingung2='True', bedingung3='True',
+      var=[]):
+      """Erstelle zwei Sequenzen aller Kanten, die bedingung1 und bedingung2 erfuellen, sortiert nach
+      bedingung3 (wie ZweifachbedingteKantenAuswahl). In den Bedingungen kann mit edge, vert1 und
+      vert2 auf die Kante und ihre Endpunkte zugegriffen werden, wobei nur pointOn[0][#] (und
+      edge.index) verfuegbar sind. Gibt eine Liste mit zwei Sequenzen der ausgewaehlten Kanten
+      [kanten_bedingung3_True, kanten_bedingung3_False] zurueck.
+      """
+      from math import sqrt, sin, cos, tan, asin, acos, atan
+      from hilfen import Log, _BedingungKompilieren
+      #
+      erlaubt = ['index', 'pointOn', 'var', 'edge', 'vert1', 'vert2'];
+      #
+      kompilierteBedingungen = [_BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt)
+         for bedingung in [bedingung1, bedingung2, bedingung3]];
+      if (any([(kompiliert is None) for kompiliert in kompilierteBedingungen])):
+         Log('# Abbruch: Uebergebene bedingung1/bedingung2/bedingung3 ungueltig');
+         return;
+      #
+      kompilierteBedingung1, kompilierteBedingung2, kompilierteBedingung3 = kompilierteBedingungen;
+      idxKanten1 = [];
+      idxKanten2 = [];
+      for edge, vert1, vert2 in zip(self._kantenobjekte, self._eckenobjekte1, self._eckenobjekte2):
+         if (eval(kompilierteBedingung1)):
+            if (eval(kompilierteBedingung2)):
+               if (eval(kompilierteBedingung3)):
+                  idxKanten1 += [edge.index];
+               else:
+                  idxKanten2 += [edge.index];
+      #
+      return [self.Auswahl(indizes=idxKanten1), self.Auswahl(indizes=idxKanten2)];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+class Geometrieauswahl(object):
+   """Klasse fuer schnelle geometrische Auswahlen aus elemente (bspw. cells/faces/edges/vertices
+   eines Parts mit pointOn oder Knoten mit coordinates). Beim Erstellen werden einmalig die
+   Koordinaten aller elemente in ein numpy-Array (N x 3) uebertragen. Die Formen Quader, Zylinder,
+   Kugel, Ebene und Halbraum geben jeweils eine Maske (numpy-Array mit True/False fuer jedes der
+   elemente) zurueck, die mit den Operatoren & (und), | (oder) sowie ~ (nicht) kombiniert werden
+   koennen. Mit Auswahl wird aus einer Maske die Sequenz der passenden elemente erstellt.
+   
+   Die Bedingung '(abs(elem.pointOn[0][0]) <= var[0])' mit var=[abapys_tol] fuer BedingteAuswahl
+   entspricht bspw. Auswahl(maske=Ebene(punkt=[0.0, 0.0, 0.0], normale=[1.0, 0.0, 0.0],
+   tol=abapys_tol)).
+   
+   Alle Formen schliessen ihren Rand ein und werden in jede Richtung um tol erweitert.
+   """
+   def __init__(self, elemente):
+      self.elemente = elemente;
+      punkte = [];
+      if (len(elemente) > 0):
+         if (hasattr(elemente[0], 'pointOn')):
+            punkte = [elem.pointOn[0] for elem in elemente];
+         else:
+            punkte = [elem.coordinates for elem in elemente];
+      #
+      self.koordinaten = _KoordinatenArray(punkte=punkte);
+   #
+   def __repr__(self):
+      return 'Geometrieauswahl (abapys)';
+   #
+   def __len__(self):
+      return len(self.koordinaten);
+   #
+   def Auswahl(self, maske):
+      """Gib die Sequenz aller elemente zurueck, fuer die maske True ist.
+      """
+      import numpy
+      #
+      return _SequenzAusIndizes(elemente=self.elemente,
+         indexliste=numpy.nonzero(maske)[0].tolist());
+   #
+   def Quader(self, minKoord=[None, None, None], maxKoord=[None, None, None], tol=0.0):
+      """Gib eine Maske aller elemente zurueck, deren Koordinaten in jeder Richtung zwischen
+      minKoord und maxKoord liegen. Fuer Richtungen mit None als Grenze wird in diese Richtung
+      nicht eingeschraenkt.
+      """
+      import numpy
+      #
+      maske = numpy.ones(len(self.koordinaten), dtype=bool);
+      for richtung in range(3):
+         if (not (minKoord[richtung] is None)):
+            maske &= (self.koordinaten[:, richtung] >= minKoord[richtung]-tol);
+         #
+         if (not (maxKoord[richtung] is None)):
+            maske &= (self.koordinaten[:, richtung] <= maxKoord[richtung]+tol);
+      #
+      return maske;
+   #
+   def Zylinder(self, radius, mittelpunkt=[0.0, 0.0], achse=2, minHoehe=None, maxHoehe=None,
+      tol=0.0):
+      """Gib eine Maske aller elemente zurueck, die innerhalb eines Zylinders mit radius um eine
+      Achse parallel zu achse (0, 1 oder 2) durch mittelpunkt (Koordinaten in den beiden anderen
+      Richtungen) liegen. Optional kann der Zylinder in Richtung achse auf minHoehe und maxHoehe
+      begrenzt werden.
+      """
+      import numpy
+      #
+      andereAchsen = [idx for idx in range(3) if (not (idx == achse))];
+      abstand = numpy.sqrt((self.koordinaten[:, andereAchsen[0]] - mittelpunkt[0])**2 +
+         (self.koordinaten[:, andereAchsen[1]] - mittelpunkt[1])**2);
+      maske = (abstand <= radius+tol);
+      if (not (minHoehe is None)):
+         maske &= (self.koordinaten[:, achse] >= minHoehe-tol);
+      #
+      if (not (maxHoehe is None)):
+         maske &= (self.koordinaten[:, achse] <= maxHoehe+tol);
+      #
+      return maske;
+   #
+   def Kugel(self, radius, mittelpunkt=[0.0, 0.0, 0.0], tol=0.0):
+      """Gib eine Maske aller elemente zurueck, die innerhalb einer Kugel mit radius um mittelpunkt
+      liegen.
+      """
+      import numpy
+      #
+      abstand = numpy.sqrt(numpy.sum((self.koordinaten - numpy.asarray(mittelpunkt, dtype=float))**2,
+         axis=1));
+      return (abstand <= radius+tol);
+   #
+   def Halbraum(self, punkt, normale, tol=0.0):
+      """Gib eine Maske aller elemente zurueck, die im Halbraum hinter der Ebene durch punkt mit
+      (nicht notwendigerweise normierter) normale liegen, also auf der Seite der Ebene, in die
+      normale nicht zeigt.
+      """
+      import numpy
+      #
+      richtung = numpy.asarray(normale, dtype=float);
+      richtung = richtung/numpy.sqrt(numpy.sum(richtung**2));
+      abstand = numpy.dot(self.koordinaten - numpy.asarray(punkt, dtype=float), richtung);
+      return (abstand <= tol);
+   #
+   def Ebene(self, punkt, normale, tol=0.0):
+      """Gib eine Maske aller elemente zurueck, die (mit Toleranz tol) auf der Ebene durch punkt mit
+      (nicht notwendigerweise normierter) normale liegen.
+      """
+      import numpy
+      #
+      richtung = numpy.asarray(normale, dtype=float);
+      richtung = richtung/numpy.sqrt(numpy.sum(richtung**2));
+      abstand = numpy.dot(self.koordinaten - numpy.asarray(punkt, dtype=float), richtung);
+      return (numpy.abs(abstand) <= tol);
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def LabelAuswahl(elemente, labelliste, elementhilfsliste=[]):
    """Erstelle eine Sequenz aller uebergebener elemente, deren Label sich in labelliste befindet.
@@ -170,12 +468,58 @@ def LabelAuswahl(elemente, labelliste, elementhilfsliste=[]):
    if (elementhilfsliste == []):
       elementhilfsliste = ErstelleLabelsortierteGeomlist(geomliste=elemente);
    #
-   ausgewaehlteElemente = elemente[0:0];
-   for label in labelliste:
-      idxelem = elementhilfsliste[label];
-      ausgewaehlteElemente += elemente[idxelem:idxelem+1];
+   return _SequenzAusIndizes(elemente=elemente,
+      indexliste=[elementhilfsliste[label] for label in labelliste]);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def IndexAuswahl(elemente, indexliste):
+   """Erstelle eine Sequenz aller uebergebener elemente, deren Index (Position in elemente) sich in
+   indexliste befindet. Gibt die Sequenz der ausgewaehlten Elemente zurueck.
+   """
+   return _SequenzAusIndizes(elemente=elemente, indexliste=indexliste);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _SequenzAusIndizes(elemente, indexliste):
+   """Erstelle eine Sequenz aus allen elemente, deren Index in indexliste enthalten ist. Die
+   Reihenfolge aus indexliste bleibt erhalten. Statt die Sequenz fuer jeden Index einzeln zu
+   erweitern (wobei jedes Mal die gesamte Sequenz kopiert wird), werden aufeinanderfolgende
+   Indizes zu einem gemeinsamen Ausschnitt aus elemente zusammengefasst und die Ausschnitte
+   paarweise zusammengefuegt. Gibt die Sequenz der ausgewaehlten Elemente zurueck.
+   """
+   teilsequenzen = [];
+   idx_start = None;
+   idx_ende = None;
+   for idxelem in indexliste:
+      if (idxelem == idx_ende):
+         idx_ende += 1;
+         continue;
+      #
+      if (not (idx_start is None)):
+         teilsequenzen += [elemente[idx_start:idx_ende]];
+      #
+      idx_start = idxelem;
+      idx_ende = idxelem + 1;
+   #
+   if (idx_start is None):
+      return elemente[0:0];
+   #
+   teilsequenzen += [elemente[idx_start:idx_ende]];
+   # Paarweises Zusammenfuegen, damit jeder Eintrag nur log2(len(teilsequenzen)) mal kopiert wird
+   while (len(teilsequenzen) > 1):
+      zusammengefuegt = [];
+      for idx in range(0, len(teilsequenzen)-1, 2):
+         zusammengefuegt += [teilsequenzen[idx] + teilsequenzen[idx+1]];
+      #
+      if ((len(teilsequenzen) % 2) == 1):
+         zusammengefuegt += [teilsequenzen[-1]];
+      #
+      teilsequenzen = zusammengefuegt;
    #
-   return ausgewaehlteElemente;
+   return teilsequenzen[0];
 #
 
 
@@ -224,28 +568,29 @@ def _MdbElementAuswahl(elemente, punktliste, bedingung='True', var=[]):
    erhalten werden, wobei die Raute fuer 0, 1 oder 2 und somit eine der drei Bezugsrichtungen steht.
    """
    from math import pi, sqrt, sin, cos, tan, asin, acos, atan
-   from hilfen import Log, _Eval_Basispruefung
+   from hilfen import Log, _BedingungKompilieren
    #
-   ausgewaehlteElemente = elemente[0:0];
    erlaubt = ['coordinates', 'connectivity', 'featureName', 'index', 'instanceName', 'instanceNames',
       'isReferenceRep', 'pointOn', 'sectionCategory', 'label', 'type', 'var', 'elem', 'punkt'];
    #
-   if (not _Eval_Basispruefung(code=bedingung, zusatz_erlaubt=erlaubt)):
+   kompilierteBedingung = _BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt);
+   if (kompilierteBedingung is None):
       Log('# Abbruch: Uebergebene bedingung ist ungueltig');
-      return ausgewaehlteElemente;
+      return elemente[0:0];
    #
    numPunkte = len(elemente[0].connectivity);
+   ausgewaehlteIndizes = [];
    for idx, elem in enumerate(elemente):
       numErfuellt = 0;
       for punktidx in elem.connectivity:
          punkt = punktliste[punktidx];
-         if (eval(bedingung)):
+         if (eval(kompilierteBedingung)):
             numErfuellt += 1;
       #
       if (numErfuellt == numPunkte):
-         ausgewaehlteElemente += elemente[idx:idx+1];
+         ausgewaehlteIndizes += [idx];
    #
-   return ausgewaehlteElemente;
+   return _SequenzAusIndizes(elemente=elemente, indexliste=ausgewaehlteIndizes);
 #
 
 
@@ -262,72 +607,66 @@ def _OdbElementAuswahl(elemente, punktliste, bedingung='True', var=[], listenhil
    erhalten werden, wobei die Raute fuer 0, 1 oder 2 und somit eine der drei Bezugsrichtungen steht.
    """
    from math import pi, sqrt, sin, cos, tan, asin, acos, atan
-   from hilfen import Log, _Eval_Basispruefung, ErstelleLabelsortierteGeomlist
+   from hilfen import Log, _BedingungKompilieren, ErstelleLabelsortierteGeomlist
    #
-   ausgewaehlteElemente = elemente[0:0];
    erlaubt = ['coordinates', 'connectivity', 'featureName', 'index', 'instanceName', 'instanceNames',
       'isReferenceRep', 'pointOn', 'sectionCategory', 'label', 'type', 'var', 'elem', 'punkt'];
    #
-   if (not _Eval_Basispruefung(code=bedingung, zusatz_erlaubt=erlaubt)):
+   kompilierteBedingung = _BedingungKompilieren(code=bedingung, zusatz_erlaubt=erlaubt);
+   if (kompilierteBedingung is None):
       Log('# Abbruch: Uebergebene bedingung ist ungueltig');
-      return ausgewaehlteElemente;
+      return elemente[0:0];
    #
    if (listenhilfe == []):
       listenhilfe = ErstelleLabelsortierteGeomlist(geomliste=punktliste);
    #
    numPunkte = len(elemente[0].connectivity);
+   ausgewaehlteIndizes = [];
    for idx, elem in enumerate(elemente):
       numErfuellt = 0;
       for punktlabel in elem.connectivity:
          punkt = punktliste[listenhilfe[punktlabel]];
-         if (eval(bedingung)):
+         if (eval(kompilierteBedingung)):
             numErfuellt += 1;
          else:
             continue;
       #
       if (numErfuellt == numPunkte):
-         ausgewaehlteElemente += elemente[idx:idx+1];
+         ausgewaehlteIndizes += [idx];
    #
-   return ausgewaehlteElemente;
+   return _SequenzAusIndizes(elemente=elemente, indexliste=ausgewaehlteIndizes);
 #
 
 
 # -------------------------------------------------------------------------------------------------
-def KnotenAuswahlLabelliste(knoten, sortierung=0, aufsteigend=True):
+def KnotenAuswahlLabelliste(knoten, sortierung=0, aufsteigend=True, anzahl=None):
    """Sortiert alle uebergebenen knoten nach der Koordinatenrichtung sortierung basierend auf den
-   jeweiligen Koordinaten.
+   jeweiligen Koordinaten. Gibt eine Liste der Labels der sortierten knoten zurueck.
 
-   Fuer die sortierung ist die jeweilige Richtung (0, 1 oder 2) anzugeben. Die Reihenfolge wird
-   ueber die Koordinaten der Mittelpunkte der Elemente bestimmt. Die Werte koennen entweder
-   aufsteigend oder absteigend sortiert werden.
+   Fuer die sortierung ist die jeweilige Richtung (0, 1 oder 2) oder 'r' fuer den Abstand zur
+   z-Achse anzugeben. Wird eine Liste uebergeben (bspw. [2, 0]), wird nach dem ersten Eintrag und
+   bei gleichen Werten nach den folgenden Eintraegen sortiert. Die Werte koennen entweder
+   aufsteigend oder absteigend sortiert werden. Optional werden mit anzahl nur die ersten anzahl
+   Labels der sortierten Liste bestimmt (bspw. die anzahl tiefsten Knoten), ohne alle knoten zu
+   sortieren.
    """
-   from operator import itemgetter
-   #
-   tempsortierung = sortierung;
-   if ((not (sortierung == 0)) and (not (sortierung == 1)) and (not (sortierung == 2))):
-      Log('# Warnung: Ungueltige sortierung, nehme sortierung = 0');
-      tempsortierung = 0;
+   import numpy
+   from hilfen import Log
    #
    if (len(knoten) == 0):
       Log('# Hinweis: Keine Knoten uebergeben');
       return [];
    #
-   templiste = [];
-   for einzelpunkt in knoten:
-      templiste += [(einzelpunkt.coordinates[tempsortierung], einzelpunkt.label), ];
-   #
-   templiste.sort(key=itemgetter(0));
-   labelliste = [x[1] for x in templiste];
-   if (aufsteigend):
-      return labelliste;
-   else:
-      return list(reversed(labelliste));
+   labels = numpy.array([einzelpunkt.label for einzelpunkt in knoten]);
+   koordinaten = _KoordinatenArray(punkte=[einzelpunkt.coordinates for einzelpunkt in knoten]);
+   return _LabellisteSortieren(labels=labels, koordinaten=koordinaten, sortierung=sortierung,
+      aufsteigend=aufsteigend, anzahl=anzahl);
 #
 
 
 # -------------------------------------------------------------------------------------------------
 def ElementAuswahlLabelliste(elemente, punktliste, sortierung=0, aufsteigend=True,
-   listenhilfe=[]):
+   listenhilfe=[], anzahl=None):
    """Sortiert alle uebergebenen elemente nach der Koordinatenrichtung sortierung basierend auf den
    Koordinaten des Elementmittelpunktes. Fuer die Berechnung der Mittelpunktkoordinaten werden die
    Knoten der Elemente benutzt. Fuer die Zuordnung der einzelnen Punkte zu den Elementen muss eine
@@ -335,9 +674,12 @@ def ElementAuswahlLabelliste(elemente, punktliste, sortierung=0, aufsteigend=Tru
    aller uebergebenen elemente zurueck, deren Mittelpunkte nach der Koordinatenrichtung sortierung
    sortiert ist.
 
-   Fuer die sortierung ist die jeweilige Richtung (0, 1 oder 2) anzugeben. Die Reihenfolge wird
-   ueber die Koordinaten der Mittelpunkte der Elemente bestimmt. Die Werte koennen entweder
-   aufsteigend oder absteigend sortiert werden.
+   Fuer die sortierung ist die jeweilige Richtung (0, 1 oder 2) oder 'r' fuer den Abstand zur
+   z-Achse anzugeben. Wird eine Liste uebergeben (bspw. [2, 0]), wird nach dem ersten Eintrag und
+   bei gleichen Werten nach den folgenden Eintraegen sortiert. Die Reihenfolge wird ueber die
+   Koordinaten der Mittelpunkte der Elemente bestimmt. Die Werte koennen entweder aufsteigend oder
+   absteigend sortiert werden. Optional werden mit anzahl nur die ersten anzahl Labels der
+   sortierten Liste bestimmt (bspw. die anzahl tiefsten Elemente), ohne alle elemente zu sortieren.
    
    Optional kann die korrekte Zuordnung der Labels der Punkte bei odb-elementen durch Uebergabe
    einer listenhilfe beschleunigt werden.
@@ -347,38 +689,136 @@ def ElementAuswahlLabelliste(elemente, punktliste, sortierung=0, aufsteigend=Tru
    
    listenhilfe = [idx for idx in range(len(punktliste))];
    """
-   from operator import itemgetter
-   from hilfen import Log, ElementAusOdb, ErstelleLabelsortierteGeomlist
-   #
-   tempsortierung = sortierung;
-   if ((not (sortierung == 0)) and (not (sortierung == 1)) and (not (sortierung == 2))):
-      Log('# Warnung: Ungueltige sortierung, nehme sortierung = 0');
-      tempsortierung = 0;
+   import numpy
+   from hilfen import Log
    #
    if (len(elemente) == 0):
       Log('# Hinweis: Keine Elemente uebergeben');
       return [];
    #
+   labels = numpy.array([elem.label for elem in elemente]);
+   mittelpunkte = ElementMittelpunkte(elemente=elemente, punktliste=punktliste,
+      listenhilfe=listenhilfe);
+   return _LabellisteSortieren(labels=labels, koordinaten=mittelpunkte, sortierung=sortierung,
+      aufsteigend=aufsteigend, anzahl=anzahl);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def ElementMittelpunkte(elemente, punktliste, listenhilfe=[]):
+   """Bestimme die Mittelpunkte (Mittelwert der Knotenkoordinaten) aller elemente in einem
+   Durchgang. Fuer die Zuordnung der einzelnen Punkte zu den Elementen muss eine punktliste
+   uebergeben werden, die alle Punkte aller elemente enthaelt. Gibt ein numpy-Array (N x 3) mit den
+   Mittelpunkten aller elemente zurueck.
+   
+   Optional kann die korrekte Zuordnung der Labels der Punkte bei odb-elementen durch Uebergabe
+   einer listenhilfe beschleunigt werden.
+   
+   WICHTIG: Wenn Elemente einer mdb statt einer odb untersucht werden sollen, sollte entweder keine
+            oder die folgende listenhilfe uebergeben werden:
+   
+   listenhilfe = [idx for idx in range(len(punktliste))];
+   """
+   import numpy
+   from hilfen import ElementAusOdb, ErstelleLabelsortierteGeomlist
+   #
+   if (len(elemente) == 0):
+      return numpy.zeros((0, 3));
+   #
+   koordinaten = _KoordinatenArray(punkte=[punkt.coordinates for punkt in punktliste]);
    if (listenhilfe == []):
       if (ElementAusOdb(element=elemente[0])):
          listenhilfe = ErstelleLabelsortierteGeomlist(geomliste=punktliste);
       else:
-         listenhilfe = [idx for idx in range(len(punktliste))];
+         # Bei mdb-Elementen entspricht connectivity bereits den Indizes in punktliste
+         listenhilfe = None;
    #
-   templiste = [];
-   anzahlpunkte = float(len(elemente[0].connectivity));
-   for elem in elemente:
-      mittelwert = 0;
-      for punktlabel in elem.connectivity:
-         punkt = punktliste[listenhilfe[punktlabel]];
-         mittelwert = punkt.coordinates[tempsortierung]/anzahlpunkte;
+   if (listenhilfe is None):
+      verbindungen = [elem.connectivity for elem in elemente];
+   else:
+      verbindungen = [[listenhilfe[punktlabel] for punktlabel in elem.connectivity]
+         for elem in elemente];
+   #
+   if (len(set([len(verbindung) for verbindung in verbindungen])) == 1):
+      return koordinaten[numpy.array(verbindungen, dtype=int)].mean(axis=1);
+   #
+   # Unterschiedliche Elementtypen (mit unterschiedlicher Anzahl an Knoten)
+   return numpy.array([koordinaten[list(verbindung)].mean(axis=0) for verbindung in verbindungen]);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _KoordinatenArray(punkte):
+   """Uebertrage die Koordinaten aller punkte in ein numpy-Array (N x 3). Bei Punkten mit weniger
+   als drei Koordinaten werden die restlichen Eintraege zu Null gesetzt. Gibt das Array zurueck.
+   """
+   import numpy
+   #
+   koordinaten = numpy.zeros((len(punkte), 3));
+   for richtung in range(min([len(punkt) for punkt in punkte] + [3])):
+      koordinaten[:, richtung] = [punkt[richtung] for punkt in punkte];
+   #
+   return koordinaten;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _LabellisteSortieren(labels, koordinaten, sortierung=0, aufsteigend=True, anzahl=None):
+   """Sortiere die labels nach den zugehoerigen koordinaten (numpy-Array N x 3) in der
+   Koordinatenrichtung sortierung (0, 1, 2 oder 'r' fuer den Abstand zur z-Achse bzw. eine Liste
+   davon) aufsteigend oder absteigend. Die Sortierung ist stabil, d.h. gleiche Werte behalten ihre
+   Reihenfolge (bzw. werden bei absteigender Sortierung umgekehrt). Wenn anzahl angegeben ist,
+   werden nur die ersten anzahl Eintraege bestimmt, wobei bei nur einer Sortierrichtung keine
+   vollstaendige Sortierung erfolgt. Gibt eine Liste der sortierten labels zurueck.
+   """
+   import numpy
+   from hilfen import Log
+   #
+   if (not isinstance(sortierung, (list, tuple))):
+      sortierung = [sortierung];
+   #
+   schluessel = [];
+   for richtung in sortierung:
+      if (richtung in [0, 1, 2]):
+         schluessel += [koordinaten[:, richtung]];
+      elif (richtung == 'r'):
+         schluessel += [numpy.sqrt(koordinaten[:, 0]**2 + koordinaten[:, 1]**2)];
+      else:
+         Log('# Warnung: Ungueltige sortierung, nehme sortierung = 0');
+         schluessel += [koordinaten[:, 0]];
+   #
+   numEintraege = len(labels);
+   if ((anzahl is None) or (anzahl >= numEintraege) or (len(schluessel) > 1)):
+      # numpy.lexsort verwendet den letzten Schluessel als Hauptkriterium
+      reihenfolge = numpy.lexsort(schluessel[::-1]);
+      if (not aufsteigend):
+         reihenfolge = reihenfolge[::-1];
       #
-      templiste += [(mittelwert, elem.label), ];
+      if (not (anzahl is None)):
+         reihenfolge = reihenfolge[:max(anzahl, 0)];
+      #
+      return labels[reihenfolge].tolist();
+   #
+   if (anzahl <= 0):
+      return [];
    #
-   templiste.sort(key=itemgetter(0));
-   labelliste = [x[1] for x in templiste];
+   # Teilauswahl: Alle Eintraege kleiner als der Wert an Position anzahl sowie so viele gleiche
+   # Eintraege wie noetig in der gleichen Reihenfolge wie bei der vollstaendigen Sortierung
+   indizes = numpy.arange(numEintraege);
    if (aufsteigend):
-      return labelliste;
+      werte = schluessel[0];
+      rangfolge = indizes;
    else:
-      return list(reversed(labelliste));
+      werte = -schluessel[0];
+      rangfolge = -indizes;
+   #
+   grenzwert = numpy.partition(werte, anzahl-1)[anzahl-1];
+   kleiner = numpy.nonzero(werte < grenzwert)[0];
+   gleich = numpy.nonzero(werte == grenzwert)[0];
+   if (not aufsteigend):
+      gleich = gleich[::-1];
+   #
+   auswahl = numpy.concatenate([kleiner, gleich[:anzahl-len(kleiner)]]);
+   reihenfolge = auswahl[numpy.lexsort((rangfolge[auswahl], werte[auswahl]))];
+   return labels[reihenfolge].tolist();
 #
@@ -566,32 +566,15 @@ def _Boden_setserstellen(modell, name, bodentiefe, voidhoehe, bodenbereich, schi
    mit bodenbereich definiert.
    """
    import part
-   from auswahl import BedingteAuswahl
+   from bisect import bisect_left
+   from math import sqrt
+   from auswahl import IndexAuswahl
    from hilfen import abapys_tol, Log
    #
    partBoden = modell.parts[name];
    # Sets
    partBoden.Set(name='setAll', cells=partBoden.cells);
-   if (voidhoehe > 0.0):
-      zellenVoid = BedingteAuswahl(elemente=partBoden.cells,
-         bedingung='elem.pointOn[0][2] >= var[0]', var=[bodentiefe]);
-      partBoden.Set(name='setVoid', cells=zellenVoid);
-      zellenNotVoid = BedingteAuswahl(elemente=partBoden.cells,
-         bedingung='elem.pointOn[0][2] < var[0]', var=[bodentiefe]);
-      partBoden.Set(name='setNotVoid', cells=zellenNotVoid);
    #
-   # FIXME: Aktuell werden noch Warnungen von Abaqus ausgegeben, auch wenn es scheint, dass alles
-   #        funktioniert wie erwartet. Nach dem aktuellen Stand koennen alle Warnungen mit der
-   #        folgenden Ausgabe aus Vergleichen zu elemente[0:0] ignoriert werden:
-   #           RuntimeWarning: tp_compare didn't return -1, 0 or 1
-   xZellen = BedingteAuswahl(elemente=partBoden.cells, bedingung='elem.pointOn[0][0] < 0.0');
-   if (not (xZellen == partBoden.cells[0:0])):
-      partBoden.Set(name='setXBereich', cells=xZellen);
-   #
-   yZellen = BedingteAuswahl(elemente=partBoden.cells, bedingung='elem.pointOn[0][1] < 0.0');
-   if (not (yZellen == partBoden.cells[0:0])):
-      partBoden.Set(name='setYBereich', cells=yZellen);
-   #   
    # Sets aller Materialien (Bereiche) definieren
    # Verschiedene Materialien (ohne doppelte Eintraege)
    if (schichten[-1] == bodentiefe):
@@ -601,49 +584,101 @@ def _Boden_setserstellen(modell, name, bodentiefe, voidhoehe, bodenbereich, schi
       tempSchichten = [0.0] + schichten + [bodentiefe];
       tempSchichtmaterial = schichtmaterial + [restmaterial];
    #
-   materialien = list(set(tempSchichtmaterial));
-   zellen_Schichtmaterial = [partBoden.cells[0:0] for x in materialien];
-   for idxSchicht, schichttiefe in enumerate(tempSchichten):
-      if (idxSchicht == 0):
-         continue;
+   # Alle Zellen werden in einem einzigen Durchlauf anhand ihrer pointOn-Koordinaten den einzelnen
+   # Bereichen (Void, x/y-Halbraum, Schichten und innerer Bereich) zugeordnet, statt fuer jeden
+   # Bereich alle Zellen erneut mit BedingteAuswahl zu untersuchen.
+   # Die z-Koordinaten der Schichtgrenzen sind absteigend, fuer die binaere Suche wird eine
+   # aufsteigende Liste benoetigt. Eine Zelle mit z-Koordinate in (zgrenzen[j-1], zgrenzen[j]]
+   # gehoert zu Schicht numGrenzen-j (Schicht 1 ist die oberste).
+   numGrenzen = len(tempSchichten);
+   zgrenzen = [bodentiefe-schichttiefe for schichttiefe in tempSchichten][::-1];
+   kreisfoermig = (len(bodenbereich[-1]) == 1);
+   #
+   idxZellenVoid = [];
+   idxZellenNotVoid = [];
+   idxZellenX = [];
+   idxZellenY = [];
+   idxZellenInnen = [];
+   idxZellenSchicht = [[] for idxSchicht in range(numGrenzen)];
+   for idxZelle, zelle in enumerate(partBoden.cells):
+      xpos, ypos, zpos = zelle.pointOn[0];
+      if (zpos >= bodentiefe):
+         idxZellenVoid += [idxZelle];
+      else:
+         idxZellenNotVoid += [idxZelle];
+      #
+      if (xpos < 0.0):
+         idxZellenX += [idxZelle];
+      #
+      if (ypos < 0.0):
+         idxZellenY += [idxZelle];
+      #
       # FIXME: pointOn der Zellen ist manchmal auf der Randflaeche - welche? Eindeutig bestimmbar?
       #        Ueber Randflaechen gehen (min. vier muessen in einer ebene sein)?
-      if (idxSchicht == len(tempSchichten)-1):
-         bedingung = '(elem.pointOn[0][2] >= var[0]) and (elem.pointOn[0][2] <= var[1])';
-      else:
-         bedingung = '(elem.pointOn[0][2] > var[0]) and (elem.pointOn[0][2] <= var[1])';
+      idxGrenze = bisect_left(zgrenzen, zpos);
+      if ((idxGrenze > 0) and (idxGrenze < numGrenzen)):
+         idxZellenSchicht[numGrenzen-idxGrenze] += [idxZelle];
+      elif ((idxGrenze == 0) and (zpos == zgrenzen[0])):
+         # Die unterste Schicht schliesst ihre Unterkante mit ein
+         idxZellenSchicht[numGrenzen-1] += [idxZelle];
       #
-      tempZellen = BedingteAuswahl(elemente=partBoden.cells, bedingung=bedingung,
-         var=[bodentiefe-tempSchichten[idxSchicht], bodentiefe-tempSchichten[idxSchicht-1]]);
-      if (not (tempZellen == partBoden.cells[0:0])):
-         partBoden.Set(name='setSchicht' + str(idxSchicht).zfill(2), cells=tempZellen);
+      if (kreisfoermig):
+         if (sqrt(xpos**2 + ypos**2) < bodenbereich[-1][0]+abapys_tol):
+            idxZellenInnen += [idxZelle];
+      else:
+         if ((abs(xpos) < bodenbereich[-1][0]+abapys_tol) and
+            (abs(ypos) < bodenbereich[-1][1]+abapys_tol)):
+            idxZellenInnen += [idxZelle];
+   #
+   if (voidhoehe > 0.0):
+      partBoden.Set(name='setVoid', cells=IndexAuswahl(elemente=partBoden.cells,
+         indexliste=idxZellenVoid));
+      partBoden.Set(name='setNotVoid', cells=IndexAuswahl(elemente=partBoden.cells,
+         indexliste=idxZellenNotVoid));
+   #
+   if (not (idxZellenX == [])):
+      partBoden.Set(name='setXBereich', cells=IndexAuswahl(elemente=partBoden.cells,
+         indexliste=idxZellenX));
+   #
+   if (not (idxZellenY == [])):
+      partBoden.Set(name='setYBereich', cells=IndexAuswahl(elemente=partBoden.cells,
+         indexliste=idxZellenY));
+   #
+   materialien = list(set(tempSchichtmaterial));
+   idxZellen_Schichtmaterial = [[] for x in materialien];
+   for idxSchicht in range(1, numGrenzen):
+      if (not (idxZellenSchicht[idxSchicht] == [])):
+         partBoden.Set(name='setSchicht' + str(idxSchicht).zfill(2),
+            cells=IndexAuswahl(elemente=partBoden.cells, indexliste=idxZellenSchicht[idxSchicht]));
          #
          for idx, tempMaterial in enumerate(materialien):
             if (tempMaterial == tempSchichtmaterial[idxSchicht-1]):
-               zellen_Schichtmaterial[idx] += tempZellen;
+               idxZellen_Schichtmaterial[idx] += idxZellenSchicht[idxSchicht];
                break;
    #
-   for idx, zellen in enumerate(zellen_Schichtmaterial):
-      if ((not (zellen == partBoden.cells[0:0])) and (not materialien[idx] == '-')):
-         partBoden.Set(name='set' + materialien[idx], cells=zellen);
+   for idx, idxZellen in enumerate(idxZellen_Schichtmaterial):
+      if ((not (idxZellen == [])) and (not materialien[idx] == '-')):
+         partBoden.Set(name='set' + materialien[idx], cells=IndexAuswahl(elemente=partBoden.cells,
+            indexliste=sorted(idxZellen)));
    #
-   flaechen_ZX = BedingteAuswahl(elemente=partBoden.faces,
-      bedingung='(abs(elem.pointOn[0][0]) <= var[0])', var=[abapys_tol]);
-   partBoden.Set(faces=flaechen_ZX, name='set_ZX');
-   flaechen_ZY = BedingteAuswahl(elemente=partBoden.faces,
-      bedingung='(abs(elem.pointOn[0][1]) <= var[0])', var=[abapys_tol]);
-   partBoden.Set(faces=flaechen_ZY, name='set_ZY');
+   # Die Flaechen in den Symmetrieebenen ebenfalls in einem Durchlauf bestimmen
+   idxFlaechen_ZX = [];
+   idxFlaechen_ZY = [];
+   for idxFlaeche, flaeche in enumerate(partBoden.faces):
+      xpos, ypos, zpos = flaeche.pointOn[0];
+      if (abs(xpos) <= abapys_tol):
+         idxFlaechen_ZX += [idxFlaeche];
+      #
+      if (abs(ypos) <= abapys_tol):
+         idxFlaechen_ZY += [idxFlaeche];
    #
-   if (len(bodenbereich[-1]) == 1):
-      innererBereich = BedingteAuswahl(elemente=partBoden.cells,
-         bedingung='(sqrt(elem.pointOn[0][0]**2 + elem.pointOn[0][1]**2) < var[0]+var[1])',
-         var=[bodenbereich[-1][0], abapys_tol]);
-   else:
-      innererBereich = BedingteAuswahl(elemente=partBoden.cells,
-         bedingung='(abs(elem.pointOn[0][0]) < var[0]+var[2]) and (abs(elem.pointOn[0][1]) < var[1]+var[2])',
-         var=[bodenbereich[-1][0], bodenbereich[-1][1], abapys_tol]);
+   partBoden.Set(faces=IndexAuswahl(elemente=partBoden.faces, indexliste=idxFlaechen_ZX),
+      name='set_ZX');
+   partBoden.Set(faces=IndexAuswahl(elemente=partBoden.faces, indexliste=idxFlaechen_ZY),
+      name='set_ZY');
    #
-   partBoden.Set(name='setInnererBereich', cells=innererBereich);
+   partBoden.Set(name='setInnererBereich', cells=IndexAuswahl(elemente=partBoden.cells,
+      indexliste=idxZellenInnen));
 #
 
 
@@ -663,7 +698,7 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
    from abaqusConstants import C3D8, C3D6, C3D4, EC3D8R, UNKNOWN_TET, UNKNOWN_WEDGE
    from abaqusConstants import DEFAULT, STANDARD, EXPLICIT, OFF, FINER, ADVANCING_FRONT, SWEEP
    from abaqusConstants import SINGLE, STRAIN, AVERAGE_STRAIN
-   from auswahl import BedingteAuswahl, ZweifachbedingteKantenAuswahl
+   from auswahl import Kantentabelle
    from hilfen import abapys_tol, Log 
    #
    # Die Hoehe des nicht mehr fein vernetzten Bodenkoerpers
@@ -704,9 +739,13 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
    # Globale Seeds vorgeben (v.a. fuer alle nicht im Folgenden explizit definierte Bereiche)
    partBoden.seedPart(size=gittergroessen[0][0], deviationFactor=0.1, minSizeFactor=0.1);
    #
+   # Die Koordinaten aller Kanten und ihrer Endpunkte werden fuer alle folgenden Auswahlen nur
+   # einmal ausgelesen
+   kantentabelle = Kantentabelle(geometrie=partBoden);
+   #
    # 1) kanten_Untenvertikal (Alle vertikalen Linien unterhalb von schichten[-1])
    if (not (bodentiefe == schichten[-1])):
-      kanten_Untenvertikal = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+      kanten_Untenvertikal = kantentabelle.ZweifachbedingteAuswahl(
          bedingung1='(edge.pointOn[0][2] >= var[0]) and (edge.pointOn[0][2] < var[1]-var[0])',
          bedingung2='not ((vert1.pointOn[0][2]) == (vert2.pointOn[0][2]))',
          bedingung3='(vert1.pointOn[0][2]) < (vert2.pointOn[0][2])',
@@ -729,12 +768,12 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
       #                          die eine bodenbereich-Partition umgrenzen)
       if (len(bodenbereich[idx]) == 1):
          # Kontur eines Kreises mit Liniendicke abapys_tol
-         kanten_Schichtflaeche = BedingteAuswahl(elemente=partBoden.edges,
+         kanten_Schichtflaeche = kantentabelle.BedingteAuswahl(
             bedingung='(abs(sqrt(elem.pointOn[0][0]**2 + elem.pointOn[0][1]**2) - var[0]) < var[2]) and (elem.pointOn[0][2] > var[1]-var[2])',
             var=[bodenbereich[idx][0], tiefe_uebergang, abapys_tol]);
       else:
          # Kontur eines Rechtecks mit Liniendicke abapys_tol
-         kanten_Schichtflaeche = BedingteAuswahl(elemente=partBoden.edges,
+         kanten_Schichtflaeche = kantentabelle.BedingteAuswahl(
             bedingung='(elem.pointOn[0][2] > var[2]-var[3]) and (abs(elem.pointOn[0][0]) < var[0]+var[3]) and (abs(elem.pointOn[0][1]) < var[1]+var[3]) and (not ((abs(elem.pointOn[0][0]) < var[0]-var[3]) and (abs(elem.pointOn[0][1]) < var[1]-var[3])))',
             var=[bodenbereich[idx][0], bodenbereich[idx][1], tiefe_uebergang, abapys_tol]);
       #
@@ -751,14 +790,14 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
          if (len(naechsterbereich) == 1):
             if (len(bodenbereich[idx]) == 1):
                # Kreis zu kleinerem Kreis
-               kanten_Schichtverbindung = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+               kanten_Schichtverbindung = kantentabelle.ZweifachbedingteAuswahl(
                   bedingung1='(sqrt(edge.pointOn[0][0]**2 + edge.pointOn[0][1]**2) < var[0]-var[2])',
                   bedingung2='(sqrt(edge.pointOn[0][0]**2 + edge.pointOn[0][1]**2) > var[1]+var[2])',
                   bedingung3='(vert1.pointOn[0][0]**2 + vert1.pointOn[0][1]**2) > (vert2.pointOn[0][0]**2 + vert2.pointOn[0][1]**2)',
                   var=[bodenbereich[idx][0], naechsterbereich[0], abapys_tol]);
             else:
                # Rechteck zu kleinerem Kreis
-               kanten_Schichtverbindung = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+               kanten_Schichtverbindung = kantentabelle.ZweifachbedingteAuswahl(
                   bedingung1='(abs(edge.pointOn[0][0]) < var[0]-var[3]) and (abs(edge.pointOn[0][1]) < var[1]-var[3])',
                   bedingung2='(sqrt(edge.pointOn[0][0]**2 + edge.pointOn[0][1]**2) > var[2]+var[3])',
                   bedingung3='(vert1.pointOn[0][0]**2 + vert1.pointOn[0][1]**2) > (vert2.pointOn[0][0]**2 + vert2.pointOn[0][1]**2)',
@@ -766,7 +805,7 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
          else:
             if (len(bodenbereich[idx]) == 1):
                # Kreis zu kleinerem Rechteck
-               kanten_Schichtverbindung = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+               kanten_Schichtverbindung = kantentabelle.ZweifachbedingteAuswahl(
                   bedingung1='(sqrt(edge.pointOn[0][0]**2 + edge.pointOn[0][1]**2) < var[0]-var[3])',
                   bedingung2='(not ((abs(edge.pointOn[0][0]) < var[1]+var[3]) and (abs(edge.pointOn[0][1]) < var[2]+var[3])))',
                   bedingung3='(vert1.pointOn[0][0]**2 + vert1.pointOn[0][1]**2) > (vert2.pointOn[0][0]**2 + vert2.pointOn[0][1]**2)',
@@ -779,7 +818,7 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
                   tol_laenge = -abapys_tol;
                if (bodenbereich[idx][1] == naechsterbereich[1]):
                   tol_breite = -abapys_tol;
-               kanten_Schichtverbindung = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+               kanten_Schichtverbindung = kantentabelle.ZweifachbedingteAuswahl(
                   bedingung1='(abs(edge.pointOn[0][0]) < var[0]-var[4]) and (abs(edge.pointOn[0][1]) < var[1]-var[5])',
                   bedingung2='(not ((abs(edge.pointOn[0][0]) < var[2]+var[4]) and (abs(edge.pointOn[0][1]) < var[3]+var[5])))',
                   bedingung3='(vert1.pointOn[0][0]**2 + vert1.pointOn[0][1]**2) > (vert2.pointOn[0][0]**2 + vert2.pointOn[0][1]**2)',
@@ -788,13 +827,13 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
       else:
          # Innerster Bereich
          if (len(bodenbereich[idx]) == 1):
-            kanten_Schichtverbindung = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+            kanten_Schichtverbindung = kantentabelle.ZweifachbedingteAuswahl(
                bedingung1='(sqrt(edge.pointOn[0][0]**2 + edge.pointOn[0][1]**2) < var[0]-var[1])',
                bedingung2='(not (((abs(edge.pointOn[0][0]) < var[1]) and ((abs(edge.pointOn[0][1]) < var[1])))))',
                bedingung3='(vert1.pointOn[0][2]) < (vert2.pointOn[0][2])',
                var=[bodenbereich[idx][0], abapys_tol]);
          else:
-            kanten_Schichtverbindung = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+            kanten_Schichtverbindung = kantentabelle.ZweifachbedingteAuswahl(
                bedingung1='((edge.pointOn[0][0]) > -var[0]+var[2]) and ((edge.pointOn[0][0]) < var[0]-var[2]) and ((edge.pointOn[0][1]) > -var[1]+var[2]) and ((edge.pointOn[0][1]) < var[1]-var[2])',
                bedingung2='(not ((abs(edge.pointOn[0][0]) < var[2]) and (abs(edge.pointOn[0][1]) < var[2])))',
                bedingung3='(vert1.pointOn[0][2]) < (vert2.pointOn[0][2])',
@@ -815,7 +854,7 @@ def _Boden_vernetzen(modell, name, bodentiefe, voidhoehe, bodenbereich, gittergr
             partBoden.Set(edges=kanten, name='setK_Schichtverbindung' + str(idx));
    #
    # 3) kanten_Schichtvertikal (Alle vertikalen Linien oberhalb von schichten[-1])
-   kanten_Schichtvertikal = ZweifachbedingteKantenAuswahl(elemente=partBoden,
+   kanten_Schichtvertikal = kantentabelle.ZweifachbedingteAuswahl(
       bedingung1='edge.pointOn[0][2] > var[0]-var[1]', bedingung2='not ((vert1.pointOn[0][2]) == (vert2.pointOn[0][2]))',
       var=[tiefe_uebergang, abapys_tol]);
    partBoden.seedEdgeBySize(constraint=FINER, deviationFactor=0.1,
@@ -25,6 +25,7 @@ erstellung.py   v0.8 (2020-09)
 class PunktListe(object):
    """Mini-Klasse zur Erstellung von Paaren aus Koordinaten und Labels.
    """
+   __slots__ = ['coordinates', 'label'];
    def __init__(self, coordinates, label):
       self.coordinates = coordinates;
       self.label = label;
@@ -33,6 +34,40 @@ class PunktListe(object):
 #
 
 
+# -------------------------------------------------------------------------------------------------
+class Koordinatenfeld(object):
+   """Kompakte Knotenliste, die labels und koordinaten aller Knoten als numpy-Arrays (N bzw. N x 3)
+   speichert, statt fuer jeden Knoten ein eigenes Objekt zu erzeugen. Beim Zugriff auf einzelne
+   Eintraege (ueber den Index oder beim Iterieren) wird jeweils eine PunktListe erstellt, so dass
+   ein Koordinatenfeld ueberall statt einer Knotenliste verwendet werden kann. Zustandsuebertragung
+   uebernimmt die Koordinaten eines Koordinatenfelds direkt.
+   """
+   def __init__(self, labels, koordinaten):
+      import numpy
+      #
+      self.labels = numpy.asarray(labels, dtype=int);
+      self.koordinaten = numpy.asarray(koordinaten, dtype=float);
+   def __len__(self):
+      return len(self.labels);
+   def __getitem__(self, idx):
+      if (isinstance(idx, slice)):
+         return Koordinatenfeld(labels=self.labels[idx], koordinaten=self.koordinaten[idx]);
+      #
+      return PunktListe(coordinates=tuple(self.koordinaten[idx].tolist()),
+         label=int(self.labels[idx]));
+   def Labelwerte(self, attribut):
+      """Gib die Werte von attribut aller Eintraege als Liste zurueck, ohne einzelne PunktListe-
+      Eintraege zu erzeugen (nur label, ansonsten None).
+      """
+      if (attribut == 'label'):
+         return self.labels.tolist();
+      #
+      return None;
+   def __repr__(self):
+      return 'Koordinatenfeld (abapys)';
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def NamePartInstance(modell, namensvorschlag):
    """Ermittle basierend auf namensvorschlag einen Namen fuer ein part/instance im uebergebenen
@@ -133,46 +168,93 @@ def DrehscharnierErstellen(modell, name, punkt1, punkt2, kos):
 
 
 # -------------------------------------------------------------------------------------------------
-def Knotentransformation(punktliste, xneu='x', yneu='y', zneu='z'):
+def Knotentransformation(punktliste, xneu='x', yneu='y', zneu='z', matrix=None, kompakt=False):
    """Erstelle eine neue Knotenliste basierend auf punktliste. Dabei werden von allen Eintraegen nur
    label und coordinates uebernommen. Die Koordinaten koennen ueber die Felder xneu, yneu und zneu
-   transformiert werden.
-   Gibt die transformierte punktliste zurueck.
+   oder eine Transformationsmatrix matrix transformiert werden.
+   Gibt die transformierte punktliste zurueck (mit kompakt=True als Koordinatenfeld, sonst als
+   Liste von PunktListe-Eintraegen).
    
    Fuer alle drei Variablen kann eine Transformationsanweisung wie bspw.
    "sqrt(x**2+y**2)" uebergeben werden, wobei jeweils die Variablen x, y und z zur Verfuegung
-   stehen, die die Orignalwerte fuer jeden Knoten enthalten.
+   stehen, die die Orignalwerte fuer jeden Knoten enthalten. Die Anweisungen werden einmalig
+   geprueft und kompiliert und wenn moeglich fuer alle Knoten gleichzeitig ausgewertet.
    
    Fuer mathematische Zusammenhaenge stehen die Funktionen pi, sqrt, sin, cos, tan, asin, acos, atan
    zur Verfuegung.
    
+   Fuer affine Transformationen (Verschiebungen, Drehungen, Spiegelungen) kann statt xneu, yneu und
+   zneu eine matrix uebergeben werden. Eine 3x3-Matrix wird mit allen Koordinaten multipliziert,
+   bei einer 4x4-Matrix (homogene Koordinaten) enthaelt die letzte Spalte die Verschiebung, bspw.
+   fuer eine Drehung um die z-Achse um den Winkel w und eine Verschiebung um 1 in z-Richtung:
+   
+   matrix = [[cos(w), -sin(w), 0.0, 0.0], [sin(w), cos(w), 0.0, 0.0], [0.0, 0.0, 1.0, 1.0],
+             [0.0, 0.0, 0.0, 1.0]];
+   
    WICHTIG: Wenn eine Zustandsuebertragung mit Knoten stattfinden soll, die in dieser Funktion
             transformiert worden sind, dann werden auch tatsaechlich nur die Knotenkoordinaten
             und keinerlei Werte modifiziert. Das gilt insbesondere fuer Drehungen wie im angegebenen
             Beispiel, bei dem Tensorergebnisse nicht gedreht, sondern nur an anderer Stelle
             ausgegeben werden.
    """
+   import numpy
    from math import pi, sqrt, sin, cos, tan, asin, acos, atan
-   from hilfen import Log, _Eval_Basispruefung
+   from hilfen import Log, _BedingungKompilieren
    #
-   neue_knotenliste = []
+   if (isinstance(punktliste, Koordinatenfeld)):
+      labels = punktliste.labels;
+      koordinaten = punktliste.koordinaten;
+   else:
+      labels = numpy.array([knoten.label for knoten in punktliste], dtype=int);
+      koordinaten = numpy.array([knoten.coordinates for knoten in punktliste], dtype=float);
    #
-   if (any([(not _Eval_Basispruefung(code=bedingung, zusatz_erlaubt=['x', 'y', 'z'])) for bedingung in [xneu, yneu, zneu]])):
-      Log('# Abbruch: Uebergebene xneu/yneu/zneu ungueltig');
-      return;
+   numKnoten = len(labels);
+   if (numKnoten == 0):
+      koordinaten = numpy.zeros((0, 3));
    #
-   for knoten in punktliste:
-      x = knoten.coordinates[0];
-      y = knoten.coordinates[1];
-      z = knoten.coordinates[2];
-      xmod = eval(xneu);
-      ymod = eval(yneu);
-      zmod = eval(zneu);
-      #
-      if (not (zneu is None)):
-         neue_knotenliste += [PunktListe(coordinates=(xmod, ymod, zmod), label=knoten.label)];
+   if (not (matrix is None)):
+      transformation = numpy.asarray(matrix, dtype=float);
+      dimensionen = koordinaten.shape[1];
+      if (transformation.shape == (dimensionen, dimensionen)):
+         neue_koordinaten = numpy.dot(koordinaten, transformation.T);
+      elif (transformation.shape == (dimensionen+1, dimensionen+1)):
+         neue_koordinaten = numpy.dot(koordinaten, transformation[:dimensionen, :dimensionen].T) + \
+            transformation[:dimensionen, dimensionen];
       else:
-         neue_knotenliste += [PunktListe(coordinates=(xmod, ymod), label=knoten.label)];
+         Log('# Abbruch: matrix muss ' + str(dimensionen) + 'x' + str(dimensionen) + ' oder ' +
+            str(dimensionen+1) + 'x' + str(dimensionen+1) + ' gross sein');
+         return;
+   else:
+      anweisungen = [xneu, yneu];
+      if (not (zneu is None)):
+         anweisungen += [zneu];
+      #
+      kompiliert = [_BedingungKompilieren(code=bedingung, zusatz_erlaubt=['x', 'y', 'z'])
+         for bedingung in anweisungen];
+      if (any([(kompilierteBedingung is None) for kompilierteBedingung in kompiliert])):
+         Log('# Abbruch: Uebergebene xneu/yneu/zneu ungueltig');
+         return;
+      #
+      neue_koordinaten = numpy.zeros((numKnoten, len(kompiliert)));
+      # Zuerst alle Knoten gleichzeitig mit den numpy-Funktionen auswerten. Bei Anweisungen, die
+      # sich nicht auf Arrays anwenden lassen (bspw. mit and/or) oder bei ungueltigen Werten
+      # (bspw. sqrt(-1)) werden die Knoten einzeln wie bisher ausgewertet.
+      namensraum = {'x': koordinaten[:, 0], 'y': koordinaten[:, 1], 'z': koordinaten[:, 2],
+         'pi': pi, 'sqrt': numpy.sqrt, 'sin': numpy.sin, 'cos': numpy.cos, 'tan': numpy.tan,
+         'asin': numpy.arcsin, 'acos': numpy.arccos, 'atan': numpy.arctan, 'abs': numpy.abs};
+      try:
+         with numpy.errstate(all='raise'):
+            for idx, kompilierteBedingung in enumerate(kompiliert):
+               neue_koordinaten[:, idx] = eval(kompilierteBedingung, namensraum);
+      except (ArithmeticError, TypeError, ValueError):
+         for idx_knoten in range(numKnoten):
+            x, y, z = koordinaten[idx_knoten, :3].tolist();
+            neue_koordinaten[idx_knoten, :] = [eval(kompilierteBedingung)
+               for kompilierteBedingung in kompiliert];
+   #
+   if (kompakt):
+      return Koordinatenfeld(labels=labels, koordinaten=neue_koordinaten);
    #
-   return neue_knotenliste;
+   return [PunktListe(coordinates=tuple(werte), label=label) for label, werte in
+      zip(labels.tolist(), neue_koordinaten.tolist())];
 #
@@ -299,7 +299,7 @@ def Kugel(modell, name, radius, materialtyp, gittergroesse, rp=False, extrasets=
    Grundkoerper_sets(modell=modell, name=name);
    if (extrasets):
       flaechen_Mantel = BedingteAuswahl(elemente=partKugel.faces,
-         bedingung='sqrt(elem.pointOn[0][0]**2 + elem.pointOn[0][1]**2 + elem.pointOn[0][2]**2)) > var[0]-var[1]',
+         bedingung='sqrt(elem.pointOn[0][0]**2 + elem.pointOn[0][1]**2 + elem.pointOn[0][2]**2) > var[0]-var[1]',
          var=[radius, abapys_tol]);
       partKugel.Set(name='setMantelflaeche', faces=flaechen_Mantel);
    #
@@ -441,7 +441,7 @@ def Grundkoerper_vernetzen(modell, name, materialtyp, gittergroesse):
    import mesh
    from abaqusConstants import EULERIAN, EXPLICIT, OFF, EC3D8R, UNKNOWN_TET, UNKNOWN_WEDGE, DEFAULT
    from abaqusConstants import C3D8R, AVERAGE_STRAIN, C3D6, C3D4, FINER
-   from auswahl import ZweifachbedingteKantenAuswahl
+   from auswahl import Kantentabelle
    #
    partGrundkoerper = modell.parts[name];
    #
@@ -466,8 +466,10 @@ def Grundkoerper_vernetzen(modell, name, materialtyp, gittergroesse):
          # Initialisiere mit Mittelwert aus allen drei Werten
          partGrundkoerper.seedPart(size=(gitter_r + gitter_h)/2.0, deviationFactor=0.1,
             minSizeFactor=0.1);
-         kanten_r, kanten_h = ZweifachbedingteKantenAuswahl(elemente=partGrundkoerper,
-            bedingung3='(vert1.pointOn[0][2] == vert2.pointOn[0][2])');
+         kantentabelle = Kantentabelle(geometrie=partGrundkoerper);
+         idxKanten_r = kantentabelle.Horizontal();
+         kanten_r = kantentabelle.Auswahl(indizes=idxKanten_r);
+         kanten_h = kantentabelle.Auswahl(indizes=kantentabelle.Restindizes(indizes=idxKanten_r));
          partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_r,
             minSizeFactor=0.1, size=gitter_r);
          partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_h,
@@ -477,17 +479,16 @@ def Grundkoerper_vernetzen(modell, name, materialtyp, gittergroesse):
          # Initialisiere mit Mittelwert aus allen drei Werten
          partGrundkoerper.seedPart(size=(gitter_x + gitter_y + gitter_z)/3.0, deviationFactor=0.1,
             minSizeFactor=0.1);
-         kanten_x = ZweifachbedingteKantenAuswahl(elemente=partGrundkoerper,
-            bedingung2='(vert1.pointOn[0][1] == vert2.pointOn[0][1]) and (vert1.pointOn[0][2] == vert2.pointOn[0][2])');
-         partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_x[0],
+         # Alle Kanten nur einmal auslesen und dann nach den drei Richtungen sortieren
+         kantentabelle = Kantentabelle(geometrie=partGrundkoerper);
+         kanten_x = kantentabelle.Auswahl(indizes=kantentabelle.ParallelZuAchse(achse=0));
+         partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_x,
             minSizeFactor=0.1, size=gitter_x);
-         kanten_y = ZweifachbedingteKantenAuswahl(elemente=partGrundkoerper,
-            bedingung2='(vert1.pointOn[0][0] == vert2.pointOn[0][0]) and (vert1.pointOn[0][2] == vert2.pointOn[0][2])');
-         partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_y[0],
+         kanten_y = kantentabelle.Auswahl(indizes=kantentabelle.ParallelZuAchse(achse=1));
+         partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_y,
             minSizeFactor=0.1, size=gitter_y);
-         kanten_z = ZweifachbedingteKantenAuswahl(elemente=partGrundkoerper,
-            bedingung2='(vert1.pointOn[0][0] == vert2.pointOn[0][0]) and (vert1.pointOn[0][1] == vert2.pointOn[0][1])');
-         partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_z[0],
+         kanten_z = kantentabelle.Auswahl(indizes=kantentabelle.ParallelZuAchse(achse=2));
+         partGrundkoerper.seedEdgeBySize(constraint=FINER, deviationFactor=0.1, edges=kanten_z,
             minSizeFactor=0.1, size=gitter_z);
    else:
       partGrundkoerper.seedPart(size=gittergroesse, deviationFactor=0.1, minSizeFactor=0.1);
@@ -38,6 +38,13 @@ _ppi = 96.0/25.4; # dpi/inch
 _xSkalierung = 1.0;
 _ySkalierung = 1.0;
 
+_kompilierteBedingungen = {};
+_kompilierteBedingungenMaximal = 256;
+
+_labelzuordnungen = [];
+_labelzuordnungenMaximal = 8;
+_labelzuordnungenStichproben = 16;
+
 
 # -------------------------------------------------------------------------------------------------
 def InitialisiereAbapys(session, version=2018, pfad='/exports/all/intern/abapys/', xSkalierung=None,
@@ -185,50 +192,191 @@ def ViewportPixelGroesseExtrahieren(viewport):
 
 
 # -------------------------------------------------------------------------------------------------
-def ErstelleLabelsortierteGeomlist(geomliste):
-   """Gibt ein Dictionary mit den labels und den indizes der uebergebenen geomliste zurueck, um
-   anschliessend schnell ueber die Labels statt Indizes auf die Eintraege aus geomliste zugreifen
-   zu koennen.
+class _DichteLabelzuordnung(object):
+   """Zuordnung von Labels zu Indizes fuer (nahezu) zusammenhaengende Labels. Statt eines
+   Dictionaries wird nur das kleinste Label und ein Feld mit einem Index pro Label zwischen dem
+   kleinsten und groessten Label gespeichert (-1 fuer nicht vorhandene Labels). Sind die Labels
+   aufsteigend und lueckenlos, wird auch auf das Feld verzichtet. Der Zugriff erfolgt wie bei einem
+   Dictionary, fuer unbekannte Labels wird ein KeyError ausgeloest.
    """
-   templist = [];
-   idx = 0;
-   for geom in geomliste:
-      templist += [(geom.label, idx),];
-      idx += 1;
+   def __init__(self, startlabel, anzahl, indizes=None):
+      self.startlabel = startlabel;
+      self.anzahl = anzahl;
+      self.indizes = indizes;
+   def __getitem__(self, label):
+      idx = label - self.startlabel;
+      if (self.indizes is None):
+         if ((idx < 0) or (idx >= self.anzahl)):
+            raise KeyError(label);
+         #
+         return idx;
+      #
+      if ((idx < 0) or (idx >= len(self.indizes)) or (self.indizes[idx] == -1)):
+         raise KeyError(label);
+      #
+      return self.indizes[idx];
+   def __contains__(self, label):
+      try:
+         self[label];
+      except (KeyError, TypeError):
+         return False;
+      #
+      return True;
+   def has_key(self, label):
+      return (label in self);
+   def get(self, label, standardwert=None):
+      if (label in self):
+         return self[label];
+      #
+      return standardwert;
+   def __len__(self):
+      if (self.indizes is None):
+         return self.anzahl;
+      #
+      return len([idx for idx in self.indizes if (idx != -1)]);
+   def __repr__(self):
+      return 'DichteLabelzuordnung (abapys)';
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _LabelzuordnungErstellen(geomliste, attribut):
+   """Erstelle eine Zuordnung der Labels (Attribut attribut) aller Eintraege der geomliste zu deren
+   Indizes. Bei (nahezu) zusammenhaengenden ganzzahligen Labels wird eine _DichteLabelzuordnung
+   erstellt, ansonsten ein Dictionary. Gibt die Zuordnung zurueck.
+   """
+   from array import array
+   #
+   labels = None;
+   # Kompakte Container (bspw. Koordinatenfeld) koennen die Labels direkt bereitstellen
+   if (hasattr(geomliste, 'Labelwerte')):
+      labels = geomliste.Labelwerte(attribut);
+   #
+   if (labels is None):
+      labels = [getattr(geom, attribut) for geom in geomliste];
+   numLabels = len(labels);
+   if ((numLabels == 0) or (not all([isinstance(label, (int, long)) for label in labels]))):
+      return dict([(label, idx) for idx, label in enumerate(labels)]);
+   #
+   startlabel = min(labels);
+   spanne = max(labels) - startlabel + 1;
+   if (labels == list(range(startlabel, startlabel+numLabels))):
+      return _DichteLabelzuordnung(startlabel=startlabel, anzahl=numLabels);
+   #
+   # Bei vielen Luecken zwischen den Labels ist ein Dictionary sparsamer
+   if (spanne > 2*numLabels):
+      return dict([(label, idx) for idx, label in enumerate(labels)]);
+   #
+   indizes = array('i', [-1]) * spanne;
+   for idx, label in enumerate(labels):
+      indizes[label-startlabel] = idx;
    #
-   return dict(templist);
+   return _DichteLabelzuordnung(startlabel=startlabel, anzahl=numLabels, indizes=indizes);
 #
 
 
 # -------------------------------------------------------------------------------------------------
-def ErstelleElementLabelsortierteGeomlist(geomliste):
-   """Gibt ein Dictionary mit den elementLabels und den indizes der uebergebenen geomliste zurueck,
-   um anschliessend schnell ueber die elementLabels statt Indizes auf die Eintraege aus geomliste
-   zugreifen zu koennen.
+def _LabelzuordnungSchluessel(geomliste, attribut):
+   """Bestimme einen Schluessel fuer die Zuordnung der Labels (Attribut attribut) von geomliste aus
+   der Art des Containers, dem Namen der Instanz, zu der die Eintraege gehoeren, der Anzahl der
+   Eintraege und den Labels von _labelzuordnungenStichproben gleichmaessig verteilten Eintraegen.
+   Gibt den Schluessel zurueck oder None, falls die Eintraege keiner Instanz zugeordnet werden
+   koennen (bspw. Eintraege eines Koordinatenfelds).
    """
-   templist = [];
-   idx = 0;
-   for geom in geomliste:
-      templist += [(geom.elementLabel, idx),];
-      idx += 1;
+   numEintraege = len(geomliste);
+   if (numEintraege == 0):
+      return None;
+   #
+   # Knoten und Elemente kennen den Namen ihrer Instanz, Ergebniswerte (fieldOutput) die Instanz
+   eintrag = geomliste[0];
+   instanzname = getattr(eintrag, 'instanceName', None);
+   if ((instanzname is None) and (getattr(eintrag, 'instance', None) is not None)):
+      instanzname = getattr(eintrag.instance, 'name', None);
+   #
+   if (instanzname is None):
+      return None;
+   #
+   stichproben = sorted(set([(idx*(numEintraege-1))//_labelzuordnungenStichproben
+      for idx in range(_labelzuordnungenStichproben+1)]));
+   return (type(geomliste).__name__, instanzname, attribut, numEintraege,
+      tuple([getattr(geomliste[idx], attribut) for idx in stichproben]));
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _Labelzuordnung(geomliste, attribut):
+   """Gib die Zuordnung der Labels (Attribut attribut) zu den Indizes der Eintraege aus geomliste
+   zurueck. Bereits erstellte Zuordnungen werden fuer Knoten und Elemente mit gleichem Schluessel
+   (siehe _LabelzuordnungSchluessel) wiederverwendet, ohne dass geomliste selbst referenziert
+   wird. Es werden maximal _labelzuordnungenMaximal Zuordnungen vorgehalten, wobei die am
+   laengsten nicht mehr verwendete zuerst verworfen wird. Fuer alle anderen geomlisten wird die
+   Zuordnung jedes Mal neu erstellt (Aufrufer koennen sie selbst wiederverwenden, bspw. als
+   listenhilfe).
+   """
+   global _labelzuordnungen;
+   #
+   schluessel = _LabelzuordnungSchluessel(geomliste=geomliste, attribut=attribut);
+   if (schluessel is None):
+      return _LabelzuordnungErstellen(geomliste=geomliste, attribut=attribut);
+   #
+   for idx, (tempschluessel, zuordnung) in enumerate(_labelzuordnungen):
+      if (tempschluessel == schluessel):
+         # Zuletzt verwendete Zuordnung ans Ende verschieben
+         del _labelzuordnungen[idx];
+         _labelzuordnungen += [(tempschluessel, zuordnung)];
+         return zuordnung;
+   #
+   zuordnung = _LabelzuordnungErstellen(geomliste=geomliste, attribut=attribut);
+   _labelzuordnungen += [(schluessel, zuordnung)];
+   if (len(_labelzuordnungen) > _labelzuordnungenMaximal):
+      _labelzuordnungen = _labelzuordnungen[-_labelzuordnungenMaximal:];
    #
-   return dict(templist);
+   return zuordnung;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def LabelzuordnungenZuruecksetzen():
+   """Verwirf alle zwischengespeicherten Zuordnungen von Labels zu Indizes (bspw. nachdem Knoten
+   oder Elemente einer Instanz neu vernetzt worden sind, ohne dass sich deren Anzahl aendert).
+   """
+   global _labelzuordnungen;
+   _labelzuordnungen = [];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def ErstelleLabelsortierteGeomlist(geomliste):
+   """Gibt eine Zuordnung (Dictionary oder _DichteLabelzuordnung) mit den labels und den indizes der
+   uebergebenen geomliste zurueck, um anschliessend schnell ueber die Labels statt Indizes auf die
+   Eintraege aus geomliste zugreifen zu koennen. Die Zuordnung wird fuer gleichartige geomlisten
+   derselben Instanz zwischengespeichert (siehe _Labelzuordnung) und darf nicht veraendert werden.
+   """
+   return _Labelzuordnung(geomliste=geomliste, attribut='label');
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def ErstelleElementLabelsortierteGeomlist(geomliste):
+   """Gibt eine Zuordnung (Dictionary oder _DichteLabelzuordnung) mit den elementLabels und den
+   indizes der uebergebenen geomliste zurueck, um anschliessend schnell ueber die elementLabels
+   statt Indizes auf die Eintraege aus geomliste zugreifen zu koennen. Die Zuordnung wird fuer
+   gleichartige geomlisten derselben Instanz zwischengespeichert (siehe _Labelzuordnung) und darf
+   nicht veraendert werden.
+   """
+   return _Labelzuordnung(geomliste=geomliste, attribut='elementLabel');
 #
 
 
 # -------------------------------------------------------------------------------------------------
 def ErstelleNodeLabelsortierteGeomlist(geomliste):
-   """Gibt ein Dictionary mit den nodeLabels und den indizes der uebergebenen geomliste zurueck,
-   um anschliessend schnell ueber die nodeLabels statt Indizes auf die Eintraege aus geomliste
-   zugreifen zu koennen.
+   """Gibt eine Zuordnung (Dictionary oder _DichteLabelzuordnung) mit den nodeLabels und den
+   indizes der uebergebenen geomliste zurueck, um anschliessend schnell ueber die nodeLabels statt
+   Indizes auf die Eintraege aus geomliste zugreifen zu koennen. Die Zuordnung wird fuer
+   gleichartige geomlisten derselben Instanz zwischengespeichert (siehe _Labelzuordnung) und darf
+   nicht veraendert werden.
    """
-   templist = [];
-   idx = 0;
-   for geom in geomliste:
-      templist += [(geom.nodeLabel, idx),];
-      idx += 1;
-   #
-   return dict(templist);
+   return _Labelzuordnung(geomliste=geomliste, attribut='nodeLabel');
 #
 
 
@@ -345,22 +493,97 @@ def BlockAusgabe(ausgabeliste, eintraegeProZeile=8, trennung=', '):
 #
 
 
+# -------------------------------------------------------------------------------------------------
+def BlockAusgabeSchreiben(ausgabe, labels, werte, eintraegeProZeile=8, trennung=', ',
+   numpyzahlen=False, blockgroesse=10000):
+   """Schreibe fuer jede Zeile aus werte (numpy-Array mit einer Zeile pro Eintrag in labels) das
+   entsprechende Label aus labels und die Werte der Zeile in die geoeffnete Datei ausgabe. Jede
+   Zeile wird wie bei BlockAusgabe pro Zeile auf eintraegeProZeile begrenzt und mit trennung
+   zwischen den Eintraegen ausgegeben. Statt jede Zeile einzeln zusammenzusetzen, werden jeweils
+   blockgroesse Zeilen mit einer gemeinsamen Vorlage formatiert und auf einmal geschrieben.
+   
+   Die Werte werden wie in BlockAusgabe mit str() umgewandelt (in Python 2 mit 12 signifikanten
+   Stellen), so dass die Ausgabe identisch ist. Standardmaessig werden die Werte dafuer als
+   Python-Zahlen verwendet, mit numpyzahlen=True als numpy-Zahlen (bspw. fuer float32-Werte aus
+   Abaqus, deren Ausgabe mit str() sich von der als Python-Zahl unterscheidet).
+   """
+   import numpy
+   #
+   numZeilen = len(labels);
+   if (numZeilen == 0):
+      return;
+   #
+   werte = numpy.asarray(werte).reshape(numZeilen, -1);
+   numEintraege = werte.shape[1] + 1;
+   # Vorlage fuer einen Eintrag in labels (mit ggfs. mehreren Zeilen in der Datei)
+   zeilenvorlage = '';
+   for idx_eintrag in range(numEintraege):
+      zeilenvorlage += '%s';
+      if ((idx_eintrag == numEintraege-1) or ((idx_eintrag+1) % eintraegeProZeile == 0)):
+         zeilenvorlage += '\n';
+      else:
+         zeilenvorlage += trennung.replace('%', '%%');
+   #
+   for idx_start in range(0, numZeilen, blockgroesse):
+      idx_ende = min(idx_start + blockgroesse, numZeilen);
+      anzahl = idx_ende - idx_start;
+      eintraege = [None]*(anzahl*numEintraege);
+      eintraege[0::numEintraege] = labels[idx_start:idx_ende];
+      for idx_spalte in range(numEintraege-1):
+         if (numpyzahlen):
+            eintraege[idx_spalte+1::numEintraege] = list(werte[idx_start:idx_ende, idx_spalte]);
+         else:
+            eintraege[idx_spalte+1::numEintraege] = werte[idx_start:idx_ende, idx_spalte].tolist();
+      #
+      ausgabe.write((zeilenvorlage*anzahl) % tuple(eintraege));
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def _Eval_Basispruefung(code, zusatz_erlaubt):
    """Prueft den uebergebenen code auf bekannte Schluesselwoerter fuer Auswahlen aus Abaqus
    (inklusive denen aus der uebergebenen Liste zusatz_erlaubt). Falls unbekannte/unerlaubte
-   Schluesselwoerter in code vorkommen, wird False zurueckgegeben, ansonsten True.
+   Schluesselwoerter oder Ausdruecke in code vorkommen, wird False zurueckgegeben, ansonsten True.
+   Die eigentliche Pruefung findet in _BedingungKompilieren statt.
+   
+   HINWEIS: Auch durch diese Ueberpruefung von Code, der bei Erfolg in eval ausgefuehrt wird, ist
+   ein mutwilliger Missbrauch von eval nicht ausgeschlossen!
+   """
+   return (_BedingungKompilieren(code=code, zusatz_erlaubt=zusatz_erlaubt) is not None);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _BedingungKompilieren(code, zusatz_erlaubt):
+   """Prueft den uebergebenen code (bspw. eine bedingung fuer BedingteAuswahl) einmalig anhand
+   seines Syntaxbaums und kompiliert ihn. Erlaubt sind nur einfache Ausdruecke mit logischen,
+   arithmetischen und Vergleichsoperatoren, Zahlen und Zeichenketten, Indizierung sowie Aufrufe der
+   mathematischen Funktionen. Alle Bezeichnungen und Attribute muessen zu den bekannten
+   Schluesselwoertern fuer Auswahlen aus Abaqus oder zusatz_erlaubt gehoeren.
+   
+   Gibt das kompilierte Codeobjekt zurueck, das statt code direkt an eval uebergeben werden kann,
+   oder None, falls code ungueltig ist. Kompilierte Codeobjekte werden zwischengespeichert, sodass
+   wiederholte Aufrufe mit gleichem code und zusatz_erlaubt nur einmal ausgewertet werden. Werden
+   mehr als _kompilierteBedingungenMaximal Codeobjekte vorgehalten, wird der Zwischenspeicher
+   geleert.
    
    HINWEIS: Auch durch diese Ueberpruefung von Code, der bei Erfolg in eval ausgefuehrt wird, ist
    ein mutwilliger Missbrauch von eval nicht ausgeschlossen!
    """
-   from re import compile as re_compile
-   from re import search as re_search
+   import ast
+   #
+   if (not hasattr(code, 'strip')):
+      Log('# Abbruch: Uebergebener code ist keine Zeichenkette');
+      return None;
+   #
+   schluessel = (code, tuple(zusatz_erlaubt));
+   if (schluessel in _kompilierteBedingungen):
+      return _kompilierteBedingungen[schluessel];
    #
    # Alle erlaubten Bezeichnungen im Code
-   erlaubt = ['True', 'False', 'and', 'or', 'not', # Logische Operatoren
-              '==', '<', '<=', '>', '>=', 'in', # Vergleichsoperatoren
+   erlaubt = ['True', 'False', # Logische Konstanten
               'pi', 'sqrt', 'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'abs']; # Mathematische Operatoren
+   funktionen = ['sqrt', 'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'abs'];
    #
    # Attribute von Abaqus-Elementen: vertices/edges/faces/cells (mdb) sowie nodes und elements
    erlaubt += ['coordinates', 'connectivity', 'featureName', 'index', 'instanceName',
@@ -368,37 +591,47 @@ def _Eval_Basispruefung(code, zusatz_erlaubt):
    #
    erlaubt += zusatz_erlaubt;
    #
-   # Strings ignorieren
-   string_idx = [];
-   temp_idx = 0;
-   while (True):
-      temp_idx = code.find('\'', temp_idx+1);
-      if (temp_idx == -1):
-         break;
-      #
-      string_idx += [temp_idx];
-   #
-   if ((len(string_idx) % 2) != 0):
-      Log('# Abbruch: Ungueltige Anzahl an Anfuehrungszeichen');
-      return False;
-   #
-   if (len(string_idx) > 1):
-      for idx in range(len(string_idx)//2):
-         code = code[:string_idx[2*idx]] +  ' ' * (string_idx[2*idx+1]-string_idx[2*idx]+1) + code[string_idx[2*idx+1]+1:];
+   # Erlaubte Knoten des Syntaxbaums. Je nach Python-Version sind nicht alle Knotentypen vorhanden
+   # (bspw. Num/Str nur bis Python 3.7, Constant ab Python 3.6 und Index nur bis Python 3.8)
+   knotentypen = ['Expression', 'BoolOp', 'And', 'Or', 'UnaryOp', 'Not', 'UAdd', 'USub',
+      'BinOp', 'Add', 'Sub', 'Mult', 'Div', 'FloorDiv', 'Pow', 'Compare', 'Eq', 'NotEq', 'Lt',
+      'LtE', 'Gt', 'GtE', 'In', 'NotIn', 'IfExp', 'Call', 'Name', 'Attribute', 'Subscript',
+      'Index', 'Slice', 'Tuple', 'List', 'Load', 'Num', 'Str', 'NameConstant', 'Constant'];
+   erlaubteKnoten = tuple([getattr(ast, typ) for typ in knotentypen if hasattr(ast, typ)]);
    #
-   # Der Rest sollten nur normale Zahlen sein
-   remuster = re_compile('^[0-9.]*$');
-   #
-   # Den code in einzelne Segmente aufteilen und einzeln ueberpruefen.
-   codeteile = code.replace('(', ' ').replace(')', ' ').replace('[', ' ').replace(']', ' ') \
-      .replace('.', ' ').replace('+', ' ').replace('-', ' ').replace('*', ' ').replace('/', ' ').split();
-   for einzelteil in codeteile:
-      if (einzelteil not in erlaubt):
-         if (not (re_search(remuster, einzelteil))):
-            Log('# Abbruch: Ungueltige Zeichenkette in eval: >' + einzelteil + '<');
-            return False;
-   #
-   return True;
+   try:
+      baum = ast.parse(code.strip(), mode='eval');
+   except SyntaxError:
+      Log('# Abbruch: Ungueltiger Ausdruck in eval: >' + code + '<');
+      return None;
+   #
+   for knoten in ast.walk(baum):
+      if (not isinstance(knoten, erlaubteKnoten)):
+         Log('# Abbruch: Ungueltiger Ausdruck in eval: >' + type(knoten).__name__ + '<');
+         return None;
+      #
+      if (isinstance(knoten, ast.Name)):
+         if (knoten.id not in erlaubt):
+            Log('# Abbruch: Ungueltige Zeichenkette in eval: >' + knoten.id + '<');
+            return None;
+      elif (isinstance(knoten, ast.Attribute)):
+         if (knoten.attr not in erlaubt):
+            Log('# Abbruch: Ungueltige Zeichenkette in eval: >' + knoten.attr + '<');
+            return None;
+      elif (isinstance(knoten, ast.Call)):
+         # Nur direkte Aufrufe der mathematischen Funktionen mit Positionsargumenten
+         if ((not isinstance(knoten.func, ast.Name)) or (knoten.func.id not in funktionen) or
+            (knoten.keywords) or (getattr(knoten, 'starargs', None) is not None) or
+            (getattr(knoten, 'kwargs', None) is not None)):
+            Log('# Abbruch: Ungueltiger Funktionsaufruf in eval');
+            return None;
+   #
+   kompiliert = compile(baum, '<bedingung>', 'eval');
+   if (len(_kompilierteBedingungen) >= _kompilierteBedingungenMaximal):
+      _kompilierteBedingungen.clear();
+   #
+   _kompilierteBedingungen[schluessel] = kompiliert;
+   return kompiliert;
 #
 
 
@@ -80,6 +80,171 @@ def PunktInElement(elemente, knoten, referenzpunkt, listenhilfe=[], elementinfol
 #
 
 
+# -------------------------------------------------------------------------------------------------
+class Elementsuche(object):
+   """Klasse fuer wiederholte Abfragen, in welchem der elemente ein Punkt liegt. Die Koordinaten der
+   elemente muessen in knoten definiert sein. Beim Erstellen werden einmalig die Punktkoordinaten,
+   Volumina und Begrenzungsquader aller elemente bestimmt und die Elemente in ein raeumliches Hash
+   (Zellen gleicher Groesse) einsortiert. Fuer jede Abfrage muessen dann nur die Elemente in der
+   Zelle des Punktes untersucht werden statt aller elemente. Die Ergebnisse sind identisch zu
+   PunktInElement bzw. KnotengewichtungInElement. Nur mit isoparametrisch=True kann fuer Punkte
+   knapp ausserhalb der isoparametrischen Abbildung des gefundenen Elements ein angrenzendes
+   Element verwendet werden (siehe KnotengewichtungInElement). In isoparametrischeRueckfaelle wird
+   gezaehlt, wie oft stattdessen eine Aufteilung in Dreiecke bzw. Tetraeder verwendet wurde.
+   
+   WICHTIG: Wenn Elemente einer mdb statt einer odb untersucht werden sollen, sollte entweder keine
+            oder die folgende listenhilfe uebergeben werden:
+   
+   listenhilfe = [idx for idx in range(len(knoten))];
+   """
+   def __init__(self, elemente, knoten, listenhilfe=[]):
+      from hilfen import ElementAusOdb, ErstelleLabelsortierteGeomlist
+      #
+      if (listenhilfe == []):
+         if (ElementAusOdb(element=elemente[0])):
+            listenhilfe = ErstelleLabelsortierteGeomlist(geomliste=knoten);
+         else:
+            listenhilfe = [idx for idx in range(len(knoten))];
+      #
+      self.dimensionen = 2;
+      if ('3D' in str(elemente[0].type)):
+         self.dimensionen = 3;
+      #
+      self.isoparametrischeRueckfaelle = 0;
+      self.elementlabels = [];
+      self.punktlabels = [];
+      self.minKoord = [];
+      self.maxKoord = [];
+      self.elementinfoliste = ElementInfolisteErstellen(elemente=elemente, knoten=knoten,
+         listenhilfe=listenhilfe);
+      for elem, (punkte, elemvol) in zip(elemente, self.elementinfoliste):
+         self.elementlabels += [elem.label];
+         self.punktlabels += [[knoten[listenhilfe[einzelpunkt]].label for einzelpunkt in elem.connectivity]];
+         self.minKoord += [[min([punkt[richtung] for punkt in punkte]) for richtung in range(self.dimensionen)]];
+         self.maxKoord += [[max([punkt[richtung] for punkt in punkte]) for richtung in range(self.dimensionen)]];
+      #
+      # Die Zellgroesse entspricht in jeder Richtung der mittleren Ausdehnung der Elemente, so dass
+      # jedes Element nur in wenigen Zellen eingetragen werden muss
+      self.zellgroesse = [];
+      for richtung in range(self.dimensionen):
+         ausdehnung = sum([maxwerte[richtung] - minwerte[richtung] for minwerte, maxwerte in zip(self.minKoord, self.maxKoord)])/len(elemente);
+         if (ausdehnung <= 0.0):
+            ausdehnung = 1.0;
+         #
+         self.zellgroesse += [ausdehnung];
+      #
+      # Die Elemente jeder Zelle sind aufsteigend sortiert, damit bei mehreren gleichwertigen
+      # Elementen das gleiche wie bei PunktInElement gefunden wird
+      self.zellen = {};
+      for idx_elem in range(len(elemente)):
+         zellbereich = [range(self._ZellIndex(wert=minwert, richtung=richtung),
+            self._ZellIndex(wert=maxwert, richtung=richtung)+1) for richtung, (minwert, maxwert) in
+            enumerate(zip(self.minKoord[idx_elem], self.maxKoord[idx_elem]))];
+         for zelle in self._Zellkombinationen(zellbereich=zellbereich):
+            self.zellen.setdefault(zelle, []).append(idx_elem);
+   #
+   def __repr__(self):
+      return 'Elementsuche (abapys)';
+   #
+   def _ZellIndex(self, wert, richtung):
+      from math import floor
+      #
+      return int(floor(wert/self.zellgroesse[richtung]));
+   #
+   def _Zellkombinationen(self, zellbereich):
+      zellen = [()];
+      for indizes in zellbereich:
+         zellen = [zelle + (idx, ) for zelle in zellen for idx in indizes];
+      #
+      return zellen;
+   #
+   def _Zellelemente(self, referenzpunkt):
+      """Gebe die Indizes aller Elemente der Zelle von referenzpunkt zurueck, deren
+      Begrenzungsquader referenzpunkt enthaelt.
+      """
+      zelle = tuple([self._ZellIndex(wert=referenzpunkt[richtung], richtung=richtung)
+         for richtung in range(self.dimensionen)]);
+      return [idx_elem for idx_elem in self.zellen.get(zelle, []) if (not any([
+         (referenzpunkt[richtung] < self.minKoord[idx_elem][richtung]) or
+         (referenzpunkt[richtung] > self.maxKoord[idx_elem][richtung])
+         for richtung in range(self.dimensionen)]))];
+   #
+   def _ElementIndex(self, referenzpunkt):
+      """Gebe den Index des Elements zurueck, das referenzpunkt enthaelt (oder None).
+      """
+      zielIndex = None;
+      minverhaeltnis = 2.0;
+      for idx_elem in self._Zellelemente(referenzpunkt=referenzpunkt):
+         punkte, elemvol = self.elementinfoliste[idx_elem];
+         referenzpunktvol = _ElementZuReferenzpunktVolumen(punkte=punkte,
+            referenzpunkt=referenzpunkt, dimensionen=self.dimensionen);
+         volverhaeltnis = referenzpunktvol/elemvol;
+         if (volverhaeltnis < minverhaeltnis):
+            zielIndex = idx_elem;
+            minverhaeltnis = volverhaeltnis;
+      #
+      return zielIndex;
+   #
+   def PunktInElement(self, referenzpunkt):
+      """Gebe den Label des Elements zurueck, das referenzpunkt enthaelt (oder None).
+      """
+      idx_elem = self._ElementIndex(referenzpunkt=referenzpunkt);
+      if (idx_elem is None):
+         return None;
+      #
+      return self.elementlabels[idx_elem];
+   #
+   def PunkteInElementen(self, referenzpunkte):
+      """Gebe fuer alle referenzpunkte eine Liste mit den Labels der Elemente zurueck, die die
+      Punkte enthalten (oder None).
+      """
+      return [self.PunktInElement(referenzpunkt=referenzpunkt) for referenzpunkt in referenzpunkte];
+   #
+   def KnotengewichtungInElement(self, referenzpunkt, isoparametrisch=False):
+      """Bestimme das Element, das referenzpunkt enthaelt, sowie die Anteile der Knotenpunkte des
+      Elements an referenzpunkt (zu isoparametrisch siehe KnotengewichtungPunktInPunktkoordinaten).
+      Da das Element ueber eine Aufteilung in Dreiecke bzw. Tetraeder gefunden wird, kann
+      referenzpunkt bei verzerrten Elementen knapp ausserhalb der isoparametrischen Abbildung
+      liegen. Mit isoparametrisch=True werden dann zuerst die anderen Elemente der Zelle (darunter
+      die angrenzenden Elemente) versucht und erst danach die Aufteilung verwendet.
+      Gibt [elementlabel, labelsEckpunkte, Knotengewichtung] zurueck bzw. [None, [], []], falls
+      referenzpunkt in keinem Element liegt.
+      """
+      idx_elem = self._ElementIndex(referenzpunkt=referenzpunkt);
+      if (idx_elem is None):
+         return [None, [], []];
+      #
+      punkte = self.elementinfoliste[idx_elem][0];
+      if (isoparametrisch and (len(punkte) == 2**self.dimensionen)):
+         kandidaten = [idx_elem] + [idx_kandidat for idx_kandidat in
+            self._Zellelemente(referenzpunkt=referenzpunkt) if (not (idx_kandidat == idx_elem))];
+         for idx_kandidat in kandidaten:
+            kandidatpunkte = self.elementinfoliste[idx_kandidat][0];
+            if (not (len(kandidatpunkte) == 2**self.dimensionen)):
+               continue;
+            #
+            gewichtung = _KnotengewichtungIsoparametrisch(
+               punkte=[punkt[0:self.dimensionen] for punkt in kandidatpunkte],
+               referenzpunkt=referenzpunkt[0:self.dimensionen], dimensionen=self.dimensionen);
+            if (gewichtung is not None):
+               return [self.elementlabels[idx_kandidat], self.punktlabels[idx_kandidat],
+                  gewichtung];
+         #
+         self.isoparametrischeRueckfaelle += 1;
+      #
+      return [self.elementlabels[idx_elem], self.punktlabels[idx_elem],
+         KnotengewichtungPunktInPunktkoordinaten(punkte=punkte, referenzpunkt=referenzpunkt,
+         dimensionen=self.dimensionen, isoparametrisch=False)];
+   #
+   def KnotengewichtungenInElementen(self, referenzpunkte, isoparametrisch=False):
+      """Bestimme fuer alle referenzpunkte die Ergebnisse von KnotengewichtungInElement und gebe sie
+      als Liste zurueck.
+      """
+      return [self.KnotengewichtungInElement(referenzpunkt=referenzpunkt,
+         isoparametrisch=isoparametrisch) for referenzpunkt in referenzpunkte];
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def _PunktMoeglicherweiseInElement(punkte, referenzpunkt, dimensionen):
    """Ueberpruefe, ob referenzpunkt in allen Koordinatenrichtungen zwischen der kleinsten und
@@ -101,10 +266,12 @@ def _PunktMoeglicherweiseInElement(punkte, referenzpunkt, dimensionen):
 
 
 # -------------------------------------------------------------------------------------------------
-def KnotengewichtungInElement(element, referenzpunkt, knoten, listenhilfe=[]):
+def KnotengewichtungInElement(element, referenzpunkt, knoten, listenhilfe=[],
+   isoparametrisch=False):
    """Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in punkte definierten
    Elements hat. Die Koordinaten der Elemente muessen in knoten definiert sein. Die optionale
-   Uebergabe einer Zuordnung Listenhilfe von Labels zu Indizes beschleunigt den Vorgang.
+   Uebergabe einer Zuordnung Listenhilfe von Labels zu Indizes beschleunigt den Vorgang. Zur
+   Bedeutung von isoparametrisch siehe KnotengewichtungPunktInPunktkoordinaten.
    Gibt [labelsEckpunkte, Knotengewichtung] zurueck.
    
    WICHTIG: Wenn Elemente einer mdb statt einer odb untersucht werden sollen, sollte entweder keine
@@ -128,15 +295,22 @@ def KnotengewichtungInElement(element, referenzpunkt, knoten, listenhilfe=[]):
       listenhilfe=listenhilfe);
    punktlabels = [knoten[listenhilfe[einzelpunkt]].label for einzelpunkt in element.connectivity];
    return [punktlabels, KnotengewichtungPunktInPunktkoordinaten(punkte=punkte,
-      referenzpunkt=referenzpunkt, dimensionen=dimensionen)];
+      referenzpunkt=referenzpunkt, dimensionen=dimensionen, isoparametrisch=isoparametrisch)];
 #
 
    
 # -------------------------------------------------------------------------------------------------
-def KnotengewichtungPunktInPunktkoordinaten(punkte, referenzpunkt, dimensionen):
+def KnotengewichtungPunktInPunktkoordinaten(punkte, referenzpunkt, dimensionen,
+   isoparametrisch=False):
    """Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in punkte definierten
    Elements hat. Abhaengig von dimensionen wird eine Flaeche (2D) oder ein Volumen (3D) als Referenz
-   betrachtet. Gibt gewichtung zurueck.
+   betrachtet. Mit isoparametrisch=True werden fuer Vierecke und Hexaeder die bi- bzw. trilinearen
+   Formfunktionen als Gewichtung verwendet. Nur falls diese nicht bestimmt werden koennen (bspw.
+   bei stark verzerrten Elementen oder fuer Punkte knapp ausserhalb der isoparametrischen
+   Abbildung), wird wie sonst eine Aufteilung in Dreiecke bzw. Tetraeder verwendet. Deren
+   Gewichtungen koennen fuer solche Punkte auch negativ sein. Fuer Punkte auf der Grenze zu einem
+   Nachbarelement ist Elementsuche.KnotengewichtungInElement besser geeignet. Gibt gewichtung
+   zurueck.
    
    WICHTIG: punkte muss unabhaengig von dimensionen drei Koordinaten fuer jeden Punkt enthalten.
    """
@@ -157,7 +331,12 @@ def KnotengewichtungPunktInPunktkoordinaten(punkte, referenzpunkt, dimensionen):
          gewichtung = _KnotengewichtungPunktInDreieck(punkte=punkte2D, referenzpunkt=referenzpunkt2D);
       elif (knotenpunkte == 4):
          # C4 - Viereck
-         gewichtung = _KnotengewichtungPunktInViereck(punkte=punkte2D, referenzpunkt=referenzpunkt2D);
+         if (isoparametrisch):
+            gewichtung = _KnotengewichtungIsoparametrisch(punkte=punkte2D,
+               referenzpunkt=referenzpunkt2D, dimensionen=dimensionen);
+         #
+         if ((gewichtung is None) or (gewichtung == [])):
+            gewichtung = _KnotengewichtungPunktInViereck(punkte=punkte2D, referenzpunkt=referenzpunkt2D);
       else:
          nichtUnterstuetzt = True;
    elif (dimensionen == 3):
@@ -166,7 +345,12 @@ def KnotengewichtungPunktInPunktkoordinaten(punkte, referenzpunkt, dimensionen):
          gewichtung = _KnotengewichtungPunktInTetraeder(punkte=punkte, referenzpunkt=referenzpunkt);
       elif (knotenpunkte == 8):
          # C3D8 - Hexaeder
-         gewichtung = _KnotengewichtungPunktInHexaeder(punkte=punkte, referenzpunkt=referenzpunkt);
+         if (isoparametrisch):
+            gewichtung = _KnotengewichtungIsoparametrisch(punkte=punkte,
+               referenzpunkt=referenzpunkt, dimensionen=dimensionen);
+         #
+         if ((gewichtung is None) or (gewichtung == [])):
+            gewichtung = _KnotengewichtungPunktInHexaeder(punkte=punkte, referenzpunkt=referenzpunkt);
       else:
          nichtUnterstuetzt = True;
    else:
@@ -180,6 +364,96 @@ def KnotengewichtungPunktInPunktkoordinaten(punkte, referenzpunkt, dimensionen):
 #
 
    
+# -------------------------------------------------------------------------------------------------
+def _KnotengewichtungIsoparametrisch(punkte, referenzpunkt, dimensionen):
+   """Bestimmt fuer ein Viereck (dimensionen=2) oder Hexaeder (dimensionen=3) die bi- bzw.
+   trilinearen Formfunktionen am referenzpunkt als Gewichtung. Die natuerlichen Koordinaten (jeweils
+   zwischen -1 und 1) des referenzpunkt werden mit einem Newton-Verfahren aus der isoparametrischen
+   Abbildung bestimmt. Die Reihenfolge der Knoten muss so sein, wie in dem Hilfstext von
+   ElementVolumen beschrieben ist. Gibt gewichtung zurueck oder None, falls das Verfahren nicht
+   konvergiert oder referenzpunkt ausserhalb des Elements liegt.
+   """
+   vorzeichen = [(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1),
+                 (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)][:2**dimensionen];
+   natKoord = [0.0 for richtung in range(dimensionen)];
+   konvergiert = False;
+   for iteration in range(20):
+      residuum = [-referenzpunkt[richtung] for richtung in range(dimensionen)];
+      jacobi = [[0.0 for richtung in range(dimensionen)] for zeile in range(dimensionen)];
+      for punkt, knotenvorzeichen in zip(punkte, vorzeichen):
+         faktoren = [0.5*(1.0 + knotenvorzeichen[idx_nat]*natKoord[idx_nat]) for idx_nat in range(dimensionen)];
+         formfunktion = 1.0;
+         for faktor in faktoren:
+            formfunktion *= faktor;
+         #
+         for idx_nat in range(dimensionen):
+            ableitung = 0.5*knotenvorzeichen[idx_nat];
+            for idx_andere in range(dimensionen):
+               if (not (idx_andere == idx_nat)):
+                  ableitung *= faktoren[idx_andere];
+            #
+            for richtung in range(dimensionen):
+               jacobi[richtung][idx_nat] += ableitung*punkt[richtung];
+         #
+         for richtung in range(dimensionen):
+            residuum[richtung] += formfunktion*punkt[richtung];
+      #
+      schritt = _LineareGleichungLoesen(matrix=jacobi, rechteSeite=[-wert for wert in residuum]);
+      if (schritt is None):
+         return None;
+      #
+      natKoord = [wert + delta for wert, delta in zip(natKoord, schritt)];
+      if (max([abs(delta) for delta in schritt]) < 1e-12):
+         konvergiert = True;
+         break;
+   #
+   if ((not konvergiert) or any([abs(wert) > 1.0 + 1e-8 for wert in natKoord])):
+      return None;
+   #
+   gewichtung = [];
+   for knotenvorzeichen in vorzeichen:
+      formfunktion = 1.0;
+      for idx_nat in range(dimensionen):
+         formfunktion *= 0.5*(1.0 + knotenvorzeichen[idx_nat]*natKoord[idx_nat]);
+      #
+      gewichtung += [formfunktion];
+   #
+   return gewichtung;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _LineareGleichungLoesen(matrix, rechteSeite):
+   """Loese das lineare Gleichungssystem matrix*x = rechteSeite mit zwei oder drei Unbekannten mit
+   der Cramerschen Regel. Gibt x zurueck oder None, falls die Determinante von matrix Null ist.
+   """
+   det_gesamt = _Determinante(matrix=matrix);
+   if (det_gesamt == 0.0):
+      return None;
+   #
+   loesung = [];
+   for spalte in range(len(matrix)):
+      teilmatrix = [[rechteSeite[zeile] if (idx == spalte) else matrix[zeile][idx]
+         for idx in range(len(matrix))] for zeile in range(len(matrix))];
+      loesung += [_Determinante(matrix=teilmatrix)/det_gesamt];
+   #
+   return loesung;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _Determinante(matrix):
+   """Berechne die Determinante einer 2x2- oder 3x3-matrix. Gibt die Determinante zurueck.
+   """
+   if (len(matrix) == 2):
+      return matrix[0][0]*matrix[1][1] - matrix[0][1]*matrix[1][0];
+   #
+   return matrix[0][0]*(matrix[1][1]*matrix[2][2] - matrix[1][2]*matrix[2][1]) - \
+      matrix[0][1]*(matrix[1][0]*matrix[2][2] - matrix[1][2]*matrix[2][0]) + \
+      matrix[0][2]*(matrix[1][0]*matrix[2][1] - matrix[1][1]*matrix[2][0]);
+#
+
+
 # -------------------------------------------------------------------------------------------------   
 def _KnotengewichtungPunktInHexaeder(punkte, referenzpunkt):
    """Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in punkte definierten
@@ -209,26 +483,32 @@ def _KnotengewichtungPunktInHexaeder(punkte, referenzpunkt):
    punkte_neu = punkte + [punkt_mitte] + punkte_seiten;
    #
    # Fuer alle 24 Tetraeder pruefen, ob der Punkt darin liegt, und wenn ja, die richtigen Gewichte
-   # zurueckgeben.
+   # zurueckgeben. Da die Seitenflaechen nicht eben sein muessen, kann ein Punkt im Element liegen
+   # ohne (wegen Rundungsfehlern) in einem der Tetraeder zu sein. Dann wird das Tetraeder mit der
+   # groessten minimalen Gewichtung verwendet.
    tetraeder_kombinationen = [
       [0, 1, 8, 9], [0, 1, 8, 10], [0, 3, 8, 9], [0, 3, 8, 11], [0, 4, 8, 10], [0, 4, 8, 11],
       [1, 2, 8, 9], [1, 2, 8, 12], [1, 5, 8, 10], [1, 5, 8, 12], [2, 3, 8, 9], [2, 3, 8, 13],
       [2, 6, 8, 12], [2, 6, 8, 13], [3, 7, 8, 11], [3, 7, 8, 13], [4, 5, 8, 10], [4, 5, 8, 14],
       [4, 7, 8, 11], [4, 7, 8, 14], [5, 6, 8, 12], [5, 6, 8, 14],[6, 7, 8, 13], [6, 7, 8, 14]];
+   beste_kombination = None;
+   beste_gewichte = None;
    for liste_idx_kombination in tetraeder_kombinationen:
       punkteauswahl = [punkte_neu[idx] for idx in liste_idx_kombination];
       tetraeder_gewichte = _KnotengewichtungPunktInTetraeder(punkte=punkteauswahl,
          referenzpunkt=referenzpunkt);
-      if (any(temp_gewicht < 0.0 for temp_gewicht in tetraeder_gewichte)):
-         continue;
+      if ((beste_gewichte is None) or (min(tetraeder_gewichte) > min(beste_gewichte))):
+         beste_kombination = liste_idx_kombination;
+         beste_gewichte = tetraeder_gewichte;
       #
-      gewichtung[liste_idx_kombination[0]] = tetraeder_gewichte[0];
-      gewichtung[liste_idx_kombination[1]] = tetraeder_gewichte[1];
-      for idx in range(8):
-         gewichtung[idx] += 0.125*tetraeder_gewichte[2] + \
-            0.25*tetraeder_gewichte[3]*basisgewichtung[liste_idx_kombination[3]-9][idx];
-      #
-      break;
+      if (min(tetraeder_gewichte) >= 0.0):
+         break;
+   #
+   gewichtung[beste_kombination[0]] = beste_gewichte[0];
+   gewichtung[beste_kombination[1]] = beste_gewichte[1];
+   for idx in range(8):
+      gewichtung[idx] += 0.125*beste_gewichte[2] + \
+         0.25*beste_gewichte[3]*basisgewichtung[beste_kombination[3]-9][idx];
    #
    return gewichtung;
 #
@@ -283,21 +563,25 @@ def _KnotengewichtungPunktInViereck(punkte, referenzpunkt):
    punkte_neu = punkte + [punkt_mitte];
    #
    # Fuer alle 4 Dreiecke pruefen, ob der Punkt darin liegt, und wenn ja, die richtigen Gewichte
-   # zurueckgeben.
+   # zurueckgeben (sonst wie bei Hexaedern das Dreieck mit der groessten minimalen Gewichtung).
    dreieck_kombinationen = [[0, 1, 4], [1, 2, 4], [2, 3, 4], [3, 0, 4]];
-   for liste_idx_kombination in tetraeder_kombinationen:
+   beste_kombination = None;
+   beste_gewichte = None;
+   for liste_idx_kombination in dreieck_kombinationen:
       punkteauswahl = [punkte_neu[idx] for idx in liste_idx_kombination];
       dreieck_gewichte = _KnotengewichtungPunktInDreieck(punkte=punkteauswahl,
          referenzpunkt=referenzpunkt);
-      if (any(temp_gewicht < 0.0 for temp_gewicht in tetraeder_gewichte)):
-         continue;
+      if ((beste_gewichte is None) or (min(dreieck_gewichte) > min(beste_gewichte))):
+         beste_kombination = liste_idx_kombination;
+         beste_gewichte = dreieck_gewichte;
       #
-      gewichtung[liste_idx_kombination[0]] = tetraeder_gewichte[0];
-      gewichtung[liste_idx_kombination[1]] = tetraeder_gewichte[1];
-      for idx in range(4):
-         gewichtung[idx] += 0.25*tetraeder_gewichte[2];
-      #
-      break;
+      if (min(dreieck_gewichte) >= 0.0):
+         break;
+   #
+   gewichtung[beste_kombination[0]] = beste_gewichte[0];
+   gewichtung[beste_kombination[1]] = beste_gewichte[1];
+   for idx in range(4):
+      gewichtung[idx] += 0.25*beste_gewichte[2];
    #
    return gewichtung;
 #
@@ -354,16 +638,122 @@ def ElementInfolisteErstellen(elemente, knoten, listenhilfe=[]):
       else:
          listenhilfe = [idx for idx in range(len(knoten))];
    #
-   elementinfoliste = [];
    dimensionen = 2;
    if ('3D' in str(elemente[0].type)):
       dimensionen = 3;
    #
-   for idx, elem in enumerate(elemente):
-      punkte = PunktkoordinatenVonElement(element=elem, knoten=knoten, listenhilfe=listenhilfe);
-      elementinfoliste += [[punkte, ElementVolumen(punkte=punkte, dimensionen=dimensionen)]];
+   elementpunkte = [PunktkoordinatenVonElement(element=elem, knoten=knoten, listenhilfe=listenhilfe)
+      for elem in elemente];
+   volumina = _ElementpunkteVolumina(elementpunkte=elementpunkte, dimensionen=dimensionen);
+   return [[punkte, volumen] for punkte, volumen in zip(elementpunkte, volumina)];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def ElementVolumina(knotenkoordinaten, elementknoten, dimensionen):
+   """Berechne die Volumina (3D) bzw. Flaechen (2D) aller Elemente in einem Durchgang, abhaengig
+   davon ob dimensionen 2 oder 3 ist. knotenkoordinaten enthaelt die Koordinaten aller Knoten (mit
+   mindestens dimensionen Eintraegen pro Knoten) und elementknoten fuer jedes Element die Indizes
+   seiner Eckpunkte in knotenkoordinaten. Beide koennen Listen oder numpy-Arrays sein. Unterstuetzt
+   werden die gleichen Elementtypen und Knotenreihenfolgen wie in ElementVolumen, d.h. Dreiecke,
+   Vierecke, Tetraeder und Hexaeder. Enthaelt elementknoten Elemente mit unterschiedlicher Anzahl
+   an Eckpunkten, werden die Elemente jeder Anzahl gemeinsam berechnet. Fuer nicht unterstuetzte
+   Elementtypen wird (wie in ElementVolumen) ein Volumen von Null angenommen.
+   Gibt ein numpy-Array mit den Volumina aller Elemente zurueck.
+   """
+   import numpy
+   #
+   koordinaten = numpy.asarray(knotenkoordinaten, dtype=float)[:, :dimensionen];
+   if (isinstance(elementknoten, numpy.ndarray) and (elementknoten.ndim == 2)):
+      return _ElementVoluminaGleicherTyp(koordinaten=koordinaten,
+         verbindungen=elementknoten.astype(int), dimensionen=dimensionen);
+   #
+   volumina = numpy.zeros(len(elementknoten));
+   # Elemente nach der Anzahl ihrer Eckpunkte gruppieren (bspw. gemischte Netze aus Hexaedern und
+   # Tetraedern), da jede Gruppe als eigenes Array berechnet wird
+   gruppen = {};
+   for idx_elem, verbindung in enumerate(elementknoten):
+      gruppen.setdefault(len(verbindung), []).append(idx_elem);
+   #
+   for knotenpunkte, indizes in gruppen.items():
+      verbindungen = numpy.array([elementknoten[idx_elem] for idx_elem in indizes],
+         dtype=int).reshape(len(indizes), knotenpunkte);
+      volumina[indizes] = _ElementVoluminaGleicherTyp(koordinaten=koordinaten,
+         verbindungen=verbindungen, dimensionen=dimensionen);
+   #
+   return volumina;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _ElementVoluminaGleicherTyp(koordinaten, verbindungen, dimensionen):
+   """Berechne die Volumina (3D) bzw. Flaechen (2D) aller Elemente aus dem numpy-Array verbindungen
+   (eine Zeile mit den Indizes der Eckpunkte in koordinaten je Element). Alle Elemente muessen die
+   gleiche Anzahl an Eckpunkten haben (siehe ElementVolumina).
+   Gibt ein numpy-Array mit den Volumina aller Elemente zurueck.
+   """
+   import numpy
+   from hilfen import Log
+   #
+   volumina = numpy.zeros(len(verbindungen));
+   if (len(verbindungen) == 0):
+      return volumina;
+   #
+   knotenpunkte = verbindungen.shape[1];
+   # Die gleiche Aufteilung in Dreiecke bzw. Tetraeder wie in _ViereckFlaeche und _HexaederVolumen
+   teilpunktliste = [];
+   if (dimensionen == 2):
+      if (knotenpunkte == 3):
+         teilpunktliste = [[0, 1, 2]];
+      elif (knotenpunkte == 4):
+         teilpunktliste = [[0, 1, 2], [0, 2, 3]];
+   elif (dimensionen == 3):
+      if (knotenpunkte == 4):
+         teilpunktliste = [[0, 1, 2, 3]];
+      elif (knotenpunkte == 8):
+         teilpunktliste = [[0, 1, 2, 5], [0, 2, 3, 7], [0, 4, 5, 7], [0, 2, 5, 7], [2, 5, 6, 7]];
    #
-   return elementinfoliste;
+   if (teilpunktliste == []):
+      Log('Elementtyp zur Bestimmung des Volumens nicht unterstuetzt C' + str(dimensionen) + 'D' +
+          str(knotenpunkte));
+      return volumina;
+   #
+   for teilpunkte in teilpunktliste:
+      if (dimensionen == 2):
+         basis = koordinaten[verbindungen[:, teilpunkte[0]]];
+         a = koordinaten[verbindungen[:, teilpunkte[1]]] - basis;
+         b = koordinaten[verbindungen[:, teilpunkte[2]]] - basis;
+         volumina += 0.5*numpy.abs(a[:, 0]*b[:, 1] - a[:, 1]*b[:, 0]);
+      else:
+         basis = koordinaten[verbindungen[:, teilpunkte[3]]];
+         a = koordinaten[verbindungen[:, teilpunkte[0]]] - basis;
+         b = koordinaten[verbindungen[:, teilpunkte[1]]] - basis;
+         c = koordinaten[verbindungen[:, teilpunkte[2]]] - basis;
+         volumina += numpy.abs(numpy.sum(c*numpy.cross(a, b), axis=1))/6.0;
+   #
+   return volumina;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _ElementpunkteVolumina(elementpunkte, dimensionen):
+   """Berechne wie ElementVolumina die Volumina aller Elemente, deren Eckpunkte jeweils als Liste
+   von Koordinaten in elementpunkte uebergeben werden (wie von PunktkoordinatenVonElement). Die
+   Elemente duerfen unterschiedlich viele Eckpunkte haben.
+   Gibt eine Liste mit den Volumina aller Elemente zurueck.
+   """
+   if (elementpunkte == []):
+      return [];
+   #
+   knotenkoordinaten = [punkt[:dimensionen] for punkte in elementpunkte for punkt in punkte];
+   elementknoten = [];
+   idx_start = 0;
+   for punkte in elementpunkte:
+      elementknoten += [range(idx_start, idx_start + len(punkte))];
+      idx_start += len(punkte);
+   #
+   return list(ElementVolumina(knotenkoordinaten=knotenkoordinaten, elementknoten=elementknoten,
+      dimensionen=dimensionen));
 #
 
 
@@ -496,7 +886,7 @@ def _DreieckFlaeche(punkt1, punkt2, punkt3):
    X1, Y1 = [a-b for a, b in zip(punkt2, punkt1)];
    X2, Y2 = [a-b for a, b in zip(punkt3, punkt1)];
    #
-   return 0.5*(X1*Y2 - X2*Y1);
+   return 0.5*abs(X1*Y2 - X2*Y1);
 #
 
 
@@ -667,14 +1057,10 @@ def PartVolumen(part):
    if ('3D' in str(part.elements[0].type)):
       dimensionen = 3;
    #
-   elemvol = 0;
-   for elem in part.elements:
-      punkte = [];
-      # Fuer parts muessen die Indizes statt label betrachtet werden
-      for punktidx in elem.connectivity:
-         punkte += [part.nodes[punktidx].coordinates];
-      #
-      elemvol += ElementVolumen(punkte=punkte, dimensionen=dimensionen);
-   #
-   return elemvol;
+   # Fuer parts muessen die Indizes statt label betrachtet werden
+   knotenkoordinaten = [knoten.coordinates for knoten in part.nodes];
+   elementknoten = [elem.connectivity for elem in part.elements];
+   elemvol = ElementVolumina(knotenkoordinaten=knotenkoordinaten, elementknoten=elementknoten,
+      dimensionen=dimensionen);
+   return float(elemvol.sum());
 #
@@ -21,10 +21,24 @@ uebertragung.py   v0.6 (2021-01)
 # along with abapys. If not, see <http://www.gnu.org/licenses/>.
 
 
+# Version des Formats der Dateien fuer zwischengespeicherte Gewichtungen. Bei inkompatiblen
+# Aenderungen erhoehen, damit alte Dateien nicht mehr verwendet werden.
+_gewichtungCacheVersion = 3;
+
+# Version der Schnittstelle der externen Bibliothek gewichtung (Rueckgabe von Gewichtung_Version).
+# Muss mit der Version in gewichtung.cpp uebereinstimmen.
+_gewichtungBibliothekVersion = 2;
+
+# Ausgabedaten fuer das parallele Schreiben der Ergebnisdateien. Sie werden vor dem Start der
+# Prozesse gesetzt und von diesen (per fork) geerbt, sodass sie nicht uebertragen werden muessen.
+_parallelAusgabedaten = None;
+
+
 # -------------------------------------------------------------------------------------------------
 class FieldOutputValue(object):
    """Mini-Klasse zur Erstellung von FieldOutputValues.
    """
+   __slots__ = ['data', 'dataDouble', 'elementLabel', 'nodeLabel', 'precision', 'type'];
    def __init__(self, precision, data=None, dataDouble=None, type=None, elementLabel=None,
       nodeLabel=None):
       self.data = data;
@@ -38,6 +52,192 @@ class FieldOutputValue(object):
 #
 
 
+# -------------------------------------------------------------------------------------------------
+class FieldOutputWerte(object):
+   """Kompakte Sammlung von FieldOutputValues gleicher precision und gleichen type, bei der die
+   Daten aller Eintraege in einem gemeinsamen numpy-Array werte (N x Anzahl Komponenten) und die
+   Labels in den Arrays elementLabels und nodeLabels (oder None) gespeichert werden. Die Werte
+   werden bei DOUBLE_PRECISION als float64 und ansonsten als float32 gespeichert, was den Werten
+   von data aus Abaqus entspricht.
+   
+   Beim Zugriff auf einzelne Eintraege (ueber den Index oder beim Iterieren) wird jeweils ein
+   FieldOutputValue mit data bzw. dataDouble, elementLabel und nodeLabel erzeugt, so dass eine
+   FieldOutputWerte-Sammlung wie die values eines FieldOutputs verwendet werden kann.
+   """
+   def __init__(self, precision, werte, type=None, elementLabels=None, nodeLabels=None):
+      import numpy
+      from abaqusConstants import DOUBLE_PRECISION
+      #
+      self.precision = precision;
+      self.type = type;
+      self.doppelt = (precision == DOUBLE_PRECISION);
+      if (self.doppelt):
+         self.werte = numpy.asarray(werte, dtype=numpy.float64);
+      else:
+         self.werte = numpy.asarray(werte, dtype=numpy.float32);
+      #
+      self.elementLabels = None;
+      if (not (elementLabels is None)):
+         self.elementLabels = numpy.asarray(elementLabels, dtype=int);
+      #
+      self.nodeLabels = None;
+      if (not (nodeLabels is None)):
+         self.nodeLabels = numpy.asarray(nodeLabels, dtype=int);
+   def __len__(self):
+      return len(self.werte);
+   def __getitem__(self, idx):
+      if (isinstance(idx, slice)):
+         elementLabels = None;
+         if (not (self.elementLabels is None)):
+            elementLabels = self.elementLabels[idx];
+         #
+         nodeLabels = None;
+         if (not (self.nodeLabels is None)):
+            nodeLabels = self.nodeLabels[idx];
+         #
+         return FieldOutputWerte(precision=self.precision, werte=self.werte[idx], type=self.type,
+            elementLabels=elementLabels, nodeLabels=nodeLabels);
+      #
+      daten = self.werte[idx].tolist();
+      elementLabel = None;
+      if (not (self.elementLabels is None)):
+         elementLabel = int(self.elementLabels[idx]);
+      #
+      nodeLabel = None;
+      if (not (self.nodeLabels is None)):
+         nodeLabel = int(self.nodeLabels[idx]);
+      #
+      if (self.doppelt):
+         return FieldOutputValue(precision=self.precision, dataDouble=daten, type=self.type,
+            elementLabel=elementLabel, nodeLabel=nodeLabel);
+      else:
+         return FieldOutputValue(precision=self.precision, data=daten, type=self.type,
+            elementLabel=elementLabel, nodeLabel=nodeLabel);
+   def Labelwerte(self, attribut):
+      """Gib die Werte von attribut (elementLabel oder nodeLabel) aller Eintraege als Liste zurueck,
+      ohne einzelne FieldOutputValues zu erzeugen (None fuer andere Attribute).
+      """
+      if ((attribut == 'elementLabel') and (not (self.elementLabels is None))):
+         return self.elementLabels.tolist();
+      elif ((attribut == 'nodeLabel') and (not (self.nodeLabels is None))):
+         return self.nodeLabels.tolist();
+      #
+      return None;
+   def __repr__(self):
+      return 'FieldOutputWerte (abapys)';
+#
+
+
+# -------------------------------------------------------------------------------------------------
+class Transferoperator(object):
+   """Duenn besetzte Interpolationsmatrix (Zielknoten x Quellknoten) im CSR-Format. Fuer jeden
+   Zielknoten (Zeile) sind die Eintraege von zeilenstart[Zeile] bis zeilenstart[Zeile+1] in spalten
+   (Index des Quellknotens bzw. Zeile der Quellwerte) und gewichte gespeichert. Mit Anwenden wird
+   der Operator auf ein Feld mit allen Quellwerten (Quellknoten x Komponenten) angewendet, mit
+   Transponiert ist die Rueckabbildung von Ziel- auf Quellknoten moeglich.
+   
+   Die Beitraege jeder Zeile werden in der gespeicherten Reihenfolge aufsummiert, so dass die
+   Ergebnisse einer elementweisen Summation der Gewichtungen entsprechen.
+   """
+   def __init__(self, zeilenstart, spalten, gewichte, numSpalten):
+      import numpy
+      #
+      self.zeilenstart = numpy.asarray(zeilenstart, dtype=int);
+      self.spalten = numpy.asarray(spalten, dtype=int);
+      self.gewichte = numpy.asarray(gewichte, dtype=numpy.float64);
+      self.numZeilen = len(self.zeilenstart) - 1;
+      self.numSpalten = numSpalten;
+   #
+   def _Zeilenindizes(self):
+      """Gib fuer jeden gespeicherten Eintrag den Index der zugehoerigen Zeile zurueck.
+      """
+      import numpy
+      #
+      return numpy.repeat(numpy.arange(self.numZeilen), numpy.diff(self.zeilenstart));
+   #
+   def Anwenden(self, werte):
+      """Wende den Operator auf werte (numpy-Array mit numSpalten Zeilen und beliebig vielen
+      Komponenten je Zeile) an und gib das Ergebnis mit numZeilen Zeilen als float64-Array zurueck.
+      """
+      import numpy
+      #
+      werte = numpy.asarray(werte, dtype=numpy.float64);
+      ergebnis = numpy.zeros((self.numZeilen,) + werte.shape[1:], dtype=numpy.float64);
+      laengen = numpy.diff(self.zeilenstart);
+      if (len(laengen) == 0):
+         return ergebnis;
+      #
+      # Die Eintraege werden nach ihrer Position innerhalb der Zeile gemeinsam fuer alle Zeilen
+      # aufaddiert, so dass die Reihenfolge der Summation je Zeile erhalten bleibt
+      for position in range(numpy.max(laengen)):
+         zeilen = numpy.nonzero(laengen > position)[0];
+         eintraege = self.zeilenstart[zeilen] + position;
+         gewichte = self.gewichte[eintraege].reshape((-1,) + (1,)*(werte.ndim-1));
+         ergebnis[zeilen] = ergebnis[zeilen] + gewichte*werte[self.spalten[eintraege]];
+      #
+      return ergebnis;
+   #
+   def Spaltenzuordnung(self, zuordnung, numSpalten=None):
+      """Gib einen neuen Transferoperator zurueck, bei dem jede Spalte s durch zuordnung[s] ersetzt
+      wird. Eintraege, deren Spalte ausserhalb von zuordnung liegt oder fuer die zuordnung -1 ist,
+      werden entfernt. Damit kann der Operator bspw. direkt auf die Zeilen von odbergebnisse statt
+      auf Knotenlabels angewendet werden.
+      """
+      import numpy
+      #
+      zuordnung = numpy.asarray(zuordnung, dtype=int);
+      neueSpalten = -numpy.ones(len(self.spalten), dtype=int);
+      innerhalb = (self.spalten >= 0) & (self.spalten < len(zuordnung));
+      neueSpalten[innerhalb] = zuordnung[self.spalten[innerhalb]];
+      gueltig = (neueSpalten != -1);
+      laengen = numpy.bincount(self._Zeilenindizes()[gueltig], minlength=self.numZeilen);
+      if (numSpalten is None):
+         numSpalten = 0;
+         if (numpy.any(gueltig)):
+            numSpalten = int(numpy.max(neueSpalten[gueltig])) + 1;
+      #
+      return Transferoperator(zeilenstart=numpy.concatenate(([0], numpy.cumsum(laengen))),
+         spalten=neueSpalten[gueltig], gewichte=self.gewichte[gueltig], numSpalten=numSpalten);
+   #
+   def Transponiert(self):
+      """Gib den transponierten Transferoperator (Quellknoten x Zielknoten) zurueck, bspw. um Werte
+      von den Ziel- auf die Quellknoten zurueckzuverteilen.
+      """
+      import numpy
+      #
+      reihenfolge = numpy.argsort(self.spalten, kind='mergesort');
+      laengen = numpy.bincount(self.spalten, minlength=self.numSpalten);
+      return Transferoperator(zeilenstart=numpy.concatenate(([0], numpy.cumsum(laengen))),
+         spalten=self._Zeilenindizes()[reihenfolge], gewichte=self.gewichte[reihenfolge],
+         numSpalten=self.numZeilen);
+   #
+   def __repr__(self):
+      return 'Transferoperator (abapys): ' + str(self.numZeilen) + ' x ' + str(self.numSpalten);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def TransferoperatorErstellen(gewichtungKnotenLabels, gewichtungKnotenWerte, knoten_pro_element):
+   """Erstelle aus den Gewichtungen gewichtungKnotenLabels und gewichtungKnotenWerte (bspw. aus
+   Zustandsuebertragung) mit jeweils knoten_pro_element Eintraegen pro Zielknoten einen
+   Transferoperator. Als Spalten werden die Labels der Quellknoten verwendet (Index + 1).
+   Gibt den Transferoperator zurueck.
+   """
+   import numpy
+   #
+   numZeilen = len(gewichtungKnotenLabels) // knoten_pro_element;
+   numEintraege = knoten_pro_element*numZeilen;
+   spalten = numpy.asarray(gewichtungKnotenLabels[0:numEintraege], dtype=int) + 1;
+   gewichte = numpy.asarray(gewichtungKnotenWerte[0:numEintraege], dtype=numpy.float64);
+   numSpalten = 0;
+   if (numEintraege > 0):
+      numSpalten = int(numpy.max(spalten)) + 1;
+   #
+   return Transferoperator(zeilenstart=knoten_pro_element*numpy.arange(numZeilen+1),
+      spalten=spalten, gewichte=gewichte, numSpalten=numSpalten);
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def _ErzeugeAbapysAnfangsbedingungenEintrag(modell):
    """Erzeuge in den Keywordeintraegen des uebergebenen Modells modell einen Block mit den
@@ -337,6 +537,8 @@ def _ZustandsuebertragungDatenVorbereiten(dimensionen, odbknoten, odbelemente, m
    """Formatiere den Input fuer die externe Bibliothek zur Zustandsuebertragung. Wenn entweder
    odbelemente oder mdbelemente None ist, werden die Daten fuer diesen Typ nicht bearbeitet und
    die Rueckgabewerte (cpp_###knoten sowie cpp_###elemente) sind fuer diesen Typ None.
+   Alle Rueckgabewerte sind array.array-Puffer (Typ 'd' fuer Knoten und 'i' fuer Elemente), die
+   ohne Kopie an die Bibliothek uebergeben werden koennen.
    Gibt [cpp_odbknoten, cpp_odbelemente, cpp_mdbknoten, cpp_mdbelemente] zurueck.
    """
    if (odbAbaqus):
@@ -359,23 +561,13 @@ def _ZustandszuweisungVorbereiten(knoten, elemente):
    Zustandsuebertragung. Erwartet eine Matrix bzw. Liste von Tupeln fuer knoten und fuer elemente,
    wobei in knoten jeweils die (i.A. drei) Koordinaten des Punktes sind und ind elemente die
    (oftmals acht) Indizes der dazugehoerigen Punkte in knoten.
-   Gibt [cpp_knoten, cpp_elemente] zurueck.
-   """
-   from ctypes import c_double, c_int
-   #
-   mod_mdbknoten = [punkt for gruppe in knoten for punkt in gruppe];
-   DoubleArray_mdbknoten = c_double * len(mod_mdbknoten);
-   cpp_mdbknoten = DoubleArray_mdbknoten(*list(mod_mdbknoten));
-   #
-   knoten_pro_element = len(elemente[0]);
-   mod_mdbelemente = [-1 for idx in range(knoten_pro_element*len(elemente))];
-   for idx_gruppe, gruppe in enumerate(elemente):
-      #mod_mdbelemente[knoten_pro_element*idx_gruppe:knoten_pro_element*(idx_gruppe+1)] = [int(elem) for elem in gruppe];
-      for idx_elem, elem in enumerate(gruppe):
-         mod_mdbelemente[knoten_pro_element*idx_gruppe + idx_elem] = int(elem);
-   #mod_mdbelemente = [elem for gruppe in elemente for elem in gruppe];
-   IntArray_mdbelemente = c_int * len(mod_mdbelemente);
-   cpp_mdbelemente = IntArray_mdbelemente(*list(mod_mdbelemente));
+   Gibt [cpp_knoten, cpp_elemente] als array.array-Puffer zurueck.
+   """
+   from array import array
+   #
+   # Die Puffer werden direkt aus den Eingabedaten befuellt, ohne Zwischenlisten anzulegen
+   cpp_mdbknoten = array('d', (punkt for gruppe in knoten for punkt in gruppe));
+   cpp_mdbelemente = array('i', (int(elem) for gruppe in elemente for elem in gruppe));
    # Quelle: https://coderwall.com/p/rcmaea/flatten-a-list-of-lists-in-one-line-in-python
    return [cpp_mdbknoten, cpp_mdbelemente];
 #
@@ -384,9 +576,10 @@ def _ZustandszuweisungVorbereiten(knoten, elemente):
 # -------------------------------------------------------------------------------------------------
 def _ZustandsuebertragungOdbVorbereiten(dimensionen, odbknoten, odbelemente):
    """Formatiere Ausgabedaten (odbknoten, odbelemente) fuer die externe Bibliothek zur
-   Zustandsuebertragung. Gibt [cpp_odbknoten, cpp_odbelemente] zurueck.
+   Zustandsuebertragung. Gibt [cpp_odbknoten, cpp_odbelemente] als array.array-Puffer zurueck.
    """
-   from ctypes import c_double, c_int
+   from array import array
+   from erstellung import Koordinatenfeld
    from hilfen import ErstelleLabelsortierteGeomlist
    #
    # Von der externen Bibliothek werden die Knoten-Daten als Array im folgenden Format erwartet:
@@ -403,62 +596,207 @@ def _ZustandsuebertragungOdbVorbereiten(dimensionen, odbknoten, odbelemente):
    # Deshalb wird ein labelsortiertes Dict erstellt, um von den Labels auf die dazugehoerigen
    # Indizes zuweisen zu koennen. Die Labels starten zusaetzlich bei 1 statt bei 0.
    knoten_pro_odbelement = len(odbelemente[0].connectivity);
-   listenhilfe_odbknoten = ErstelleLabelsortierteGeomlist(geomliste=odbknoten);
-   mod_odbknoten = [0.0 for idx in range(int(dimensionen*len(odbknoten)))];
-   for label_knoten in range(0, len(odbknoten)):
-      zielKnoten = odbknoten[listenhilfe_odbknoten[label_knoten+1]];
-      for achse in range(dimensionen):
-         mod_odbknoten[dimensionen*label_knoten+achse] = zielKnoten.coordinates[achse];
-   #
-   DoubleArray_odbknoten = c_double * len(mod_odbknoten);
-   cpp_odbknoten = DoubleArray_odbknoten(*list(mod_odbknoten));
+   if (isinstance(odbknoten, Koordinatenfeld)):
+      # Die Koordinaten liegen bereits als Array vor und muessen nur nach Labels sortiert werden
+      cpp_odbknoten = _KoordinatenfeldPuffer(dimensionen=dimensionen, knoten=odbknoten,
+         labelsortiert=True);
+   else:
+      listenhilfe_odbknoten = ErstelleLabelsortierteGeomlist(geomliste=odbknoten);
+      cpp_odbknoten = array('d', [0.0])*int(dimensionen*len(odbknoten));
+      for label_knoten in range(0, len(odbknoten)):
+         zielKnoten = odbknoten[listenhilfe_odbknoten[label_knoten+1]];
+         for achse in range(dimensionen):
+            cpp_odbknoten[dimensionen*label_knoten+achse] = zielKnoten.coordinates[achse];
    #
    listenhilfe_odbelemente = ErstelleLabelsortierteGeomlist(geomliste=odbelemente);
-   mod_odbelemente = [0 for idx in range(int(knoten_pro_odbelement*len(odbelemente)))];
+   cpp_odbelemente = array('i', [0])*int(knoten_pro_odbelement*len(odbelemente));
    for label_elemente in range(len(odbelemente)):
       zielElement = odbelemente[listenhilfe_odbelemente[label_elemente+1]];
       for idx_eckpunkt in range(knoten_pro_odbelement):
          # Da im Folgenden die Indizes und nicht die Label betrachtet werden,
          # und die Labels mit 1 statt Null starten, ziehe Eins ab
-         mod_odbelemente[knoten_pro_odbelement*label_elemente+idx_eckpunkt] = zielElement.connectivity[idx_eckpunkt]-1;
-   #
-   IntArray_odbelemente = c_int * len(mod_odbelemente);
-   cpp_odbelemente = IntArray_odbelemente(*list(mod_odbelemente));
+         cpp_odbelemente[knoten_pro_odbelement*label_elemente+idx_eckpunkt] = zielElement.connectivity[idx_eckpunkt]-1;
    #
    return [cpp_odbknoten, cpp_odbelemente];
 #
 
 
+# -------------------------------------------------------------------------------------------------
+def _KoordinatenfeldPuffer(dimensionen, knoten, labelsortiert):
+   """Erstelle aus den Koordinaten eines Koordinatenfelds knoten direkt (ohne Zugriff auf einzelne
+   Knoten) einen array.array-Puffer mit dimensionen Koordinaten pro Knoten fuer die externe
+   Bibliothek. Mit labelsortiert=True steht jeder Knoten an der Position seines Labels (beginnend
+   bei 1), ansonsten in der Reihenfolge aus knoten.
+   Gibt den Puffer zurueck.
+   """
+   import numpy
+   from array import array
+   #
+   koordinaten = knoten.koordinaten[:, :dimensionen];
+   if (labelsortiert):
+      sortiert = numpy.zeros((len(knoten), dimensionen));
+      # Wie bei der Zuordnung ueber ErstelleLabelsortierteGeomlist muessen die Labels 1 bis
+      # len(knoten) vorkommen
+      if ((len(knoten) > 0) and ((knoten.labels.min() < 1) or (knoten.labels.max() > len(knoten)))):
+         raise KeyError('Labels von odbknoten muessen zwischen 1 und ' + str(len(knoten)) + ' liegen');
+      #
+      sortiert[knoten.labels-1] = koordinaten;
+      koordinaten = sortiert;
+   #
+   puffer = array('d');
+   daten = numpy.ascontiguousarray(koordinaten, dtype=numpy.float64).tobytes();
+   if (hasattr(puffer, 'frombytes')):
+      puffer.frombytes(daten);
+   else:
+      puffer.fromstring(daten);
+   #
+   return puffer;
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def _ZustandsuebertragungMdbVorbereiten(dimensionen, mdbknoten, mdbelemente):
    """Formatiere Modelldaten (mdbknoten, mdbelemente) fuer die externe Bibliothek zur
-   Zustandsuebertragung. Gibt [cpp_mdbknoten, cpp_mdbelemente] zurueck.
+   Zustandsuebertragung. Gibt [cpp_mdbknoten, cpp_mdbelemente] als array.array-Puffer zurueck.
    """
-   from ctypes import c_double, c_int
+   from array import array
+   from erstellung import Koordinatenfeld
    #
    # Fuer mdbknoten und mdbelemente entspricht der Index eines Knotens dem Label
    # Bei mdbelemente sind die unter connectivity gelisteten Werte die Indizes.
    knoten_pro_mdbelement = len(mdbelemente[0].connectivity);
-   mod_mdbknoten = [0.0 for idx in range(int(dimensionen*len(mdbknoten)))];
-   for idx_knoten in range(0, len(mdbknoten)):
-      for achse in range(dimensionen):
-         mod_mdbknoten[dimensionen*idx_knoten+achse] = mdbknoten[idx_knoten].coordinates[achse];
-   #
-   DoubleArray_mdbknoten = c_double * len(mod_mdbknoten);
-   cpp_mdbknoten = DoubleArray_mdbknoten(*list(mod_mdbknoten));
+   if (isinstance(mdbknoten, Koordinatenfeld)):
+      cpp_mdbknoten = _KoordinatenfeldPuffer(dimensionen=dimensionen, knoten=mdbknoten,
+         labelsortiert=False);
+   else:
+      cpp_mdbknoten = array('d', [0.0])*int(dimensionen*len(mdbknoten));
+      for idx_knoten in range(0, len(mdbknoten)):
+         for achse in range(dimensionen):
+            cpp_mdbknoten[dimensionen*idx_knoten+achse] = mdbknoten[idx_knoten].coordinates[achse];
    #
-   mod_mdbelemente = [-1 for idx in range(int(knoten_pro_mdbelement*len(mdbelemente)))];
+   cpp_mdbelemente = array('i', [-1])*int(knoten_pro_mdbelement*len(mdbelemente));
    for idx_elemente in range(len(mdbelemente)):
       for idx_eckpunkt in range(knoten_pro_mdbelement):
-         mod_mdbelemente[knoten_pro_mdbelement*idx_elemente+idx_eckpunkt] = mdbelemente[idx_elemente].connectivity[idx_eckpunkt];
-   #
-   IntArray_mdbelemente = c_int * len(mod_mdbelemente);
-   cpp_mdbelemente = IntArray_mdbelemente(*list(mod_mdbelemente));
+         cpp_mdbelemente[knoten_pro_mdbelement*idx_elemente+idx_eckpunkt] = mdbelemente[idx_elemente].connectivity[idx_eckpunkt];
    #
    return [cpp_mdbknoten, cpp_mdbelemente];
 #
 
 
+# -------------------------------------------------------------------------------------------------
+def _LabelsOderNone(werte, attribut):
+   """Gib die Werte von attribut (bspw. elementLabel) aller Eintraege in werte als Liste zurueck
+   oder None, falls das attribut beim ersten Eintrag None ist.
+   """
+   if (getattr(werte[0], attribut) is None):
+      return None;
+   #
+   return [getattr(wert, attribut) for wert in werte];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _FieldOutputBlockspalte(feld):
+   """Lies die Werte des skalaren FieldOutputs feld blockweise ueber bulkDataBlocks ein und gib
+   [werte, elementLabels, nodeLabels] als numpy-Arrays (Labels oder None) zurueck. Falls
+   bulkDataBlocks nicht verfuegbar ist oder die Bloecke nicht einer Spalte mit einem Label pro
+   Wert entsprechen, wird None zurueckgegeben.
+   """
+   import numpy
+   from abaqusConstants import DOUBLE_PRECISION
+   #
+   try:
+      bloecke = feld.bulkDataBlocks;
+   except:
+      return None;
+   #
+   if (len(bloecke) == 0):
+      return None;
+   #
+   blockwerte = [];
+   blockelemente = [];
+   blockknoten = [];
+   for block in bloecke:
+      if ((block.precision == DOUBLE_PRECISION) and hasattr(block, 'dataDouble')):
+         daten = numpy.asarray(block.dataDouble);
+      else:
+         daten = numpy.asarray(block.data);
+      if ((daten.ndim == 2) and (daten.shape[1] == 1)):
+         daten = daten[:, 0];
+      #
+      if (daten.ndim != 1):
+         return None;
+      #
+      blockwerte += [daten];
+      elementLabels = block.elementLabels;
+      nodeLabels = block.nodeLabels;
+      if ((elementLabels is not None) and (len(elementLabels) == len(daten))):
+         blockelemente += [numpy.asarray(elementLabels, dtype=int)];
+      elif ((nodeLabels is not None) and (len(nodeLabels) == len(daten))):
+         blockknoten += [numpy.asarray(nodeLabels, dtype=int)];
+      else:
+         return None;
+   #
+   if ((len(blockelemente) > 0) and (len(blockknoten) > 0)):
+      return None;
+   #
+   elementLabels = None;
+   if (len(blockelemente) > 0):
+      elementLabels = numpy.concatenate(blockelemente);
+   #
+   nodeLabels = None;
+   if (len(blockknoten) > 0):
+      nodeLabels = numpy.concatenate(blockknoten);
+   #
+   return [numpy.concatenate(blockwerte), elementLabels, nodeLabels];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _SDVWerteBlockweise(bezugsframe, ausgabevariable):
+   """Lies alle SDVs aus ausgabevariable im bezugsframe jeweils einmalig ueber bulkDataBlocks ein
+   und gib sie als FieldOutputWerte (Werte x SDVs) zurueck. Gibt None zurueck, falls die Daten
+   nicht blockweise gelesen werden koennen oder die Labels der einzelnen SDVs nicht in derselben
+   Reihenfolge vorliegen.
+   """
+   import numpy
+   #
+   referenzfeld = bezugsframe.fieldOutputs[ausgabevariable[0]];
+   referenzspalte = _FieldOutputBlockspalte(feld=referenzfeld);
+   if (referenzspalte is None):
+      return None;
+   #
+   referenzwerte, elementLabels, nodeLabels = referenzspalte;
+   if (len(referenzwerte) == 0):
+      return None;
+   #
+   if (nodeLabels is None):
+      referenzlabels = elementLabels;
+   else:
+      referenzlabels = nodeLabels;
+   #
+   werte = numpy.empty((len(referenzwerte), len(ausgabevariable)), dtype=referenzwerte.dtype);
+   werte[:, 0] = referenzwerte;
+   for idx_var, einzelvar in enumerate(ausgabevariable[1:]):
+      spalte = _FieldOutputBlockspalte(feld=bezugsframe.fieldOutputs[einzelvar]);
+      if (spalte is None):
+         return None;
+      #
+      if (nodeLabels is None):
+         spaltenlabels = spalte[1];
+      else:
+         spaltenlabels = spalte[2];
+      #
+      if ((spaltenlabels is None) or (not numpy.array_equal(spaltenlabels, referenzlabels))):
+         return None;
+      #
+      werte[:, idx_var+1] = spalte[0];
+   #
+   return FieldOutputWerte(precision=referenzfeld.bulkDataBlocks[0].precision, werte=werte,
+      elementLabels=elementLabels, nodeLabels=nodeLabels);
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def _ZustandsuebertragungAusgabeVorbereiten(mdbname, ausgabevariable, bezugsframe=None):
    rueckgabe = [None, None, None];
@@ -466,6 +804,7 @@ def _ZustandsuebertragungAusgabeVorbereiten(mdbname, ausgabevariable, bezugsfram
    ein bezugsframe uebergeben wird werden die entsprechenden odbergebnisse ermittelt, ansonsten
    wird dafuer None angenommen. Gibt [ausgabedatei, ausgabetext, odbergebnisse] zurueck.
    """
+   import numpy
    from abaqusConstants import DOUBLE_PRECISION
    from hilfen import Log
    #
@@ -481,20 +820,32 @@ def _ZustandsuebertragungAusgabeVorbereiten(mdbname, ausgabevariable, bezugsfram
       if (bezugsframe is not None):
          # Da nicht nur ein FieldOutput sondern eine Liste an FieldOutputs betrachtet werden soll
          # (d.h. SDVs sollen zusammengefasst werden), erzeuge eine kuenstliche odbergebnisse-Struktur
-         odbergebnisse = [];
-         num_values = len(bezugsframe.fieldOutputs[ausgabevariable[0]].values);
-         for idx_val in range(num_values):
-            tempdata = None;
-            tempdataDouble = None;
-            tempergebnis = bezugsframe.fieldOutputs[ausgabevariable[0]].values[idx_val];
-            if (tempergebnis.precision == DOUBLE_PRECISION):
-               tempdataDouble = [bezugsframe.fieldOutputs[einzelvar].values[idx_val].dataDouble for einzelvar in ausgabevariable];
-            else:
-               tempdata = [bezugsframe.fieldOutputs[einzelvar].values[idx_val].data for einzelvar in ausgabevariable];
+         # Die Werte aller SDVs werden spaltenweise in einem gemeinsamen Array gespeichert. Wenn
+         # moeglich, wird jede SDV einmalig blockweise (bulkDataBlocks) eingelesen
+         odbergebnisse = _SDVWerteBlockweise(bezugsframe=bezugsframe, ausgabevariable=ausgabevariable);
+         if (odbergebnisse is not None):
+            return [ausgabedatei, ausgabetext, odbergebnisse];
+         #
+         referenzwerte = bezugsframe.fieldOutputs[ausgabevariable[0]].values;
+         num_values = len(referenzwerte);
+         if (num_values > 0):
+            einzelergebnis = referenzwerte[0];
+            datentyp = numpy.float32;
+            if (einzelergebnis.precision == DOUBLE_PRECISION):
+               datentyp = numpy.float64;
             #
-            odbergebnisse += [FieldOutputValue(precision=tempergebnis.precision, data=tempdata,
-               dataDouble=tempdataDouble, elementLabel=tempergebnis.elementLabel,
-               nodeLabel=tempergebnis.nodeLabel)];
+            werte = numpy.zeros((num_values, len(ausgabevariable)), dtype=datentyp);
+            for idx_var, einzelvar in enumerate(ausgabevariable):
+               if (einzelergebnis.precision == DOUBLE_PRECISION):
+                  werte[:, idx_var] = [wert.dataDouble for wert in bezugsframe.fieldOutputs[einzelvar].values];
+               else:
+                  werte[:, idx_var] = [wert.data for wert in bezugsframe.fieldOutputs[einzelvar].values];
+            #
+            odbergebnisse = FieldOutputWerte(precision=einzelergebnis.precision, werte=werte,
+               elementLabels=_LabelsOderNone(werte=referenzwerte, attribut='elementLabel'),
+               nodeLabels=_LabelsOderNone(werte=referenzwerte, attribut='nodeLabel'));
+         else:
+            odbergebnisse = [];
    else:
       if (ausgabevariable == 'S'):
          ausgabedatei = mdbname + '_s.add';
@@ -520,137 +871,376 @@ def _ZustandsuebertragungAusgabeVorbereiten(mdbname, ausgabevariable, bezugsfram
 # -------------------------------------------------------------------------------------------------
 def _ZustandszuweisungErgebnisdateiSchreiben(ausgabedatei, ergebnisse, mdbinstname,
    gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente, mdbknoten, knoten_pro_mdbelement,
-   knotenweise):
+   knotenweise, anzahlProzesse=1):
    """Schreibe den zugewiesenen Zustand aus ergebnisse und bezugsElemente (elementweise Ergebnisse
    mit knotenweise=False) oder ergebnisse und gewichtungKnotenWerte sowie gewichtungKnotenLabels
    (fuer knotenweise Ergebnisse mit knotenweise=True) in eine Datei namens ausgabedatei. Bei
-   knotenweisen Ergebnissen ist auch die Anzahl an knoten_pro_mdbelement noetig.
+   knotenweisen Ergebnissen ist auch die Anzahl an knoten_pro_mdbelement noetig. Die Gewichtungen
+   werden dabei als Transferoperator auf alle Knotenwerte gemeinsam angewendet. Mit
+   anzahlProzesse > 1 wird die Datei abschnittsweise parallel geschrieben.
    """
-   from hilfen import BlockAusgabe
+   import numpy
    #
    laenge_ausgabewerte = len(ergebnisse[0]);
    if (not knotenweise):
-      with open(ausgabedatei, 'w') as ausgabe:
-         for idx_elem, label_odbelem in enumerate(bezugsElemente):
-            # Nur bearbeiten, wenn auch tatsaechlich ein Wert zugewiesen werden soll
-            if (label_odbelem == 0):
-               continue;
-            #
-            elemLabel = idx_elem + 1; # Die Labels der mdb-Elemente sind immer sortiert
-            try:
-               # Da die Anzahl an Elementen in mdb und odb i.d.R. nicht uebereinstimmen, sollen
-               # alle mdbElemente ohne Ergebnisse uebersprungen werden.
-               temp_data = ergebnisse[label_odbelem];
-            except:
-               continue;
-            #
-            temp_ergebnis = [mdbinstname + '.' + str(elemLabel)] + list(temp_data);
-            ausgabe.write(BlockAusgabe(temp_ergebnis));
+      elementlabels = numpy.asarray(bezugsElemente, dtype=int);
+      # Nur mdbElemente bearbeiten, denen tatsaechlich ein Wert zugewiesen werden soll. Da die
+      # Anzahl an Elementen in mdb und odb i.d.R. nicht uebereinstimmen, sollen alle mdbElemente
+      # ohne Ergebnisse uebersprungen werden.
+      indizes = numpy.nonzero((elementlabels != 0) & (elementlabels < len(ergebnisse)) &
+         (elementlabels >= -len(ergebnisse)))[0];
+      werte = numpy.array([ergebnisse[label] for label in elementlabels[indizes].tolist()]).reshape(
+         len(indizes), laenge_ausgabewerte);
+      numpyzahlen = isinstance(ergebnisse[0][0], numpy.generic);
+      # Die Labels der mdb-Elemente sind immer sortiert
+      _AusgabedateienSchreiben(ausgabedateien=[ausgabedatei],
+         ausgabedaten=[[indizes, werte, numpyzahlen]],
+         numZeilen=len(elementlabels), praefix=mdbinstname + '.', anzahlProzesse=anzahlProzesse);
    else:
-      with open(ausgabedatei, 'w') as ausgabe:
-         for idx_knoten in range(len(mdbknoten)):
-            nodeLabel = idx_knoten + 1; # Die Labels der mdb-Elemente sind immer sortiert
-            ausgabewerte = [0.0 for idx in range(laenge_ausgabewerte)];
-            labeltemp = -1;
-            # FIXME: Die Umrechnung von knoten_pro_odbelement auf knoten_pro_mdbelement ist hier
-            #        nicht implementiert -> nachholen
-            for idx_punkt in range(knoten_pro_mdbelement):
-               idxtemp = gewichtungKnotenLabels[knoten_pro_mdbelement*idx_knoten+idx_punkt];
-               labeltemp = idxtemp + 1;
-               try:
-                  # Da die Anzahl an Knoten in mdb und odb i.d.R. nicht uebereinstimmen, sollen
-                  # alle mdbKnoten ohne Ergebnisse uebersprungen werden.
-                  temp_data = ergebnisse[labeltemp];
-               except:
-                  continue;
-               #
-               ausgabewerte = [ausgabewerte[idx] + gewichtungKnotenWerte[knoten_pro_mdbelement*idx_knoten+idx_punkt]*temp_data[idx] for idx in range(laenge_ausgabewerte)];
-            #
-            temp_ergebnis = [mdbinstname + '.' + str(nodeLabel)] + ausgabewerte;
-            ausgabe.write(BlockAusgabe(temp_ergebnis));
+      numKnoten = len(mdbknoten);
+      # FIXME: Die Umrechnung von knoten_pro_odbelement auf knoten_pro_mdbelement ist hier
+      #        nicht implementiert -> nachholen
+      operator = TransferoperatorErstellen(
+         gewichtungKnotenLabels=gewichtungKnotenLabels[0:knoten_pro_mdbelement*numKnoten],
+         gewichtungKnotenWerte=gewichtungKnotenWerte[0:knoten_pro_mdbelement*numKnoten],
+         knoten_pro_element=knoten_pro_mdbelement);
+      # Die Knotenlabels des Operators entsprechen direkt den Indizes in ergebnisse. Da die Anzahl
+      # an Knoten in mdb und odb i.d.R. nicht uebereinstimmen, werden alle Labels ohne Eintrag in
+      # ergebnisse aus dem Operator entfernt.
+      zuordnung = numpy.arange(operator.numSpalten);
+      zuordnung[zuordnung >= len(ergebnisse)] = -1;
+      werte = numpy.array([wert[0:laenge_ausgabewerte] for wert in ergebnisse], dtype=numpy.float64);
+      gewichteteWerte = operator.Spaltenzuordnung(zuordnung=zuordnung,
+         numSpalten=len(werte)).Anwenden(werte.reshape(len(werte), -1));
+      # Die Ausgabe richtet sich danach, ob die Daten als Python- oder numpy-Zahlen vorliegen
+      numpyzahlen = isinstance(ergebnisse[0][0], numpy.generic);
+      # Die Labels der mdb-Knoten sind immer sortiert
+      _AusgabedateienSchreiben(ausgabedateien=[ausgabedatei],
+         ausgabedaten=[[numpy.arange(numKnoten), gewichteteWerte, numpyzahlen]],
+         numZeilen=numKnoten, praefix=mdbinstname + '.', anzahlProzesse=anzahlProzesse);
 #
 
 
 # -------------------------------------------------------------------------------------------------
-def _ZustandsuebertragungErgebnisdateiSchreiben(ausgabedatei, mdbinstname, odbergebnisse,
-   gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente, mdbknoten, knoten_pro_mdbelement):
-   """Schreibe den berechneten Zustand aus odbergebnisse und bezugsElemente (fuer elementweise
-   Ergebnisse) oder odbergebnisse und gewichtungKnotenWerte sowie gewichtungKnotenLabels (fuer
-   knotenweise Ergebnisse) in eine Datei namens ausgabedatei. Bei knotenweisen Ergebnissen ist auch
-   die Anzahl an knoten_pro_mdbelement noetig.
+def _ErgebnisZeilen(odbergebnisse, attribut, labels, zuordnungen):
+   """Gib fuer alle labels (numpy-Array) die Indizes der zugehoerigen Eintraege aus odbergebnisse
+   als numpy-Array zurueck (-1 fuer Labels ohne Eintrag). Als attribut wird elementLabel oder
+   nodeLabel verwendet. Da die Labels verschiedener Ausgabevariablen meist uebereinstimmen, werden
+   bereits bestimmte Indizes in zuordnungen ([Labels der odbergebnisse, Indizes]) gesammelt und
+   wiederverwendet.
    """
-   from abaqusConstants import SCALAR, DOUBLE_PRECISION
-   from hilfen import BlockAusgabe
+   import numpy
    from hilfen import ErstelleElementLabelsortierteGeomlist, ErstelleNodeLabelsortierteGeomlist
    #
-   einzelergebnis = odbergebnisse[0];
-   if (einzelergebnis.type == SCALAR):
-      laenge_ausgabewerte = 1;
+   ergebnislabels = None;
+   if (hasattr(odbergebnisse, 'Labelwerte')):
+      ergebnislabels = odbergebnisse.Labelwerte(attribut);
+   #
+   if (ergebnislabels is None):
+      ergebnislabels = [getattr(wert, attribut) for wert in odbergebnisse];
+   #
+   ergebnislabels = numpy.asarray(ergebnislabels, dtype=int);
+   for bekanntelabels, zeilen in zuordnungen:
+      if (numpy.array_equal(bekanntelabels, ergebnislabels)):
+         return zeilen;
+   #
+   if (attribut == 'elementLabel'):
+      listenhilfe = ErstelleElementLabelsortierteGeomlist(geomliste=odbergebnisse);
    else:
-      if (einzelergebnis.precision == DOUBLE_PRECISION):
-         laenge_ausgabewerte = len(einzelergebnis.dataDouble);
-      else:
-         laenge_ausgabewerte = len(einzelergebnis.data);
-   #
-   if (not (einzelergebnis.elementLabel is None)):
-      listenhilfe_element = ErstelleElementLabelsortierteGeomlist(geomliste=odbergebnisse);
-      with open(ausgabedatei, 'w') as ausgabe:
-         for idx_elem, label_odbelem in enumerate(bezugsElemente):
-            # Nur bearbeiten, wenn auch tatsaechlich ein Wert zugewiesen werden soll
-            if (label_odbelem == 0):
+      listenhilfe = ErstelleNodeLabelsortierteGeomlist(geomliste=odbergebnisse);
+   #
+   eindeutigeLabels, rueckindizes = numpy.unique(labels, return_inverse=True);
+   eindeutigeZeilen = numpy.empty(len(eindeutigeLabels), dtype=int);
+   for idx_label, label in enumerate(eindeutigeLabels.tolist()):
+      try:
+         eindeutigeZeilen[idx_label] = listenhilfe[label];
+      except:
+         eindeutigeZeilen[idx_label] = -1;
+   #
+   zeilen = eindeutigeZeilen[rueckindizes].reshape(numpy.shape(labels));
+   zuordnungen += [[ergebnislabels, zeilen]];
+   return zeilen;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _ErgebnisDaten(odbergebnisse, idx):
+   """Gib die Daten (data bzw. dataDouble) des Eintrags idx aus odbergebnisse zurueck. Bei einer
+   FieldOutputWerte-Sammlung wird direkt die entsprechende Zeile als Liste zurueckgegeben.
+   """
+   from abaqusConstants import DOUBLE_PRECISION
+   #
+   if (isinstance(odbergebnisse, FieldOutputWerte)):
+      return odbergebnisse.werte[idx].tolist();
+   #
+   wert = odbergebnisse[idx];
+   if (wert.precision == DOUBLE_PRECISION):
+      return wert.dataDouble;
+   else:
+      return wert.data;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _ErgebnisWerte(odbergebnisse, indizes):
+   """Gib die Daten der Eintraege indizes (numpy-Array) aus odbergebnisse als numpy-Array mit einer
+   Zeile pro Eintrag zurueck. Gibt [werte, numpyzahlen] zurueck, wobei numpyzahlen angibt, ob die
+   Daten als numpy-Zahlen (bspw. float32 aus Abaqus) statt Python-Zahlen vorliegen.
+   """
+   import numpy
+   #
+   if (isinstance(odbergebnisse, FieldOutputWerte)):
+      return [odbergebnisse.werte.reshape(len(odbergebnisse), -1)[indizes], False];
+   #
+   daten = [_ErgebnisDaten(odbergebnisse=odbergebnisse, idx=idx) for idx in indizes.tolist()];
+   if (daten == []):
+      return [numpy.zeros((0, 1)), False];
+   #
+   probe = daten[0];
+   if (numpy.ndim(probe) > 0):
+      probe = probe[0];
+   #
+   return [numpy.array(daten).reshape(len(daten), -1), isinstance(probe, numpy.generic)];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _AusgabeteilSchreiben(auftrag):
+   """Schreibe einen Teil einer Ausgabedatei aus auftrag ([teildatei, idx_datei, idx_von, idx_bis,
+   praefix, blockgroesse]) mit BlockAusgabeSchreiben in die Datei teildatei. Geschrieben werden die
+   Zeilen idx_von bis idx_bis der Ausgabedaten mit dem Index idx_datei aus _parallelAusgabedaten
+   (siehe _AusgabedateienParallelSchreiben). Die Funktion ist fuer die Verwendung in einem
+   multiprocessing.Pool auf Modulebene definiert. Gibt teildatei zurueck.
+   """
+   from hilfen import BlockAusgabeSchreiben
+   #
+   teildatei, idx_datei, idx_von, idx_bis, praefix, blockgroesse = auftrag;
+   indizes, werte, numpyzahlen = _parallelAusgabedaten[idx_datei];
+   labels = [praefix + str(label) for label in (indizes[idx_von:idx_bis] + 1).tolist()];
+   with open(teildatei, 'w') as ausgabe:
+      BlockAusgabeSchreiben(ausgabe=ausgabe, labels=labels, werte=werte[idx_von:idx_bis],
+         numpyzahlen=numpyzahlen, blockgroesse=blockgroesse);
+   #
+   return teildatei;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _AusgabedateienSchreiben(ausgabedateien, ausgabedaten, numZeilen, praefix,
+   blockgroesse=10000, anzahlProzesse=1):
+   """Schreibe fuer jede Datei aus ausgabedateien die entsprechenden ausgabedaten
+   ([indizes, werte, numpyzahlen]) mit BlockAusgabeSchreiben. Die (aufsteigenden) indizes geben an,
+   welchen der numZeilen mdb-Knoten bzw. -Elemente (Label = Index + 1) die Zeilen aus werte
+   zugeordnet sind. Alle Dateien werden gemeinsam in Bloecken von jeweils blockgroesse mdb-Knoten
+   bzw. -Elementen geschrieben. Vor jedes Label wird praefix gesetzt.
+   
+   Mit anzahlProzesse > 1 wird der Bereich der mdb-Labels in Abschnitte aufgeteilt, die in
+   entsprechend vielen lokalen Prozessen (multiprocessing) in temporaere Teildateien geschrieben
+   und anschliessend der Reihe nach zur jeweiligen Ausgabedatei zusammengefuegt werden. Das ist nur
+   auf Systemen mit fork (bspw. Linux) moeglich, da die Prozesse die ausgabedaten erben. Unter
+   Windows wuerde jeder Prozess einen neuen Abaqus-Kernel starten, daher werden die Dateien dort
+   immer seriell geschrieben.
+   """
+   import numpy
+   import os
+   from hilfen import Log, BlockAusgabeSchreiben
+   #
+   if (anzahlProzesse > 1):
+      if (hasattr(os, 'fork')):
+         _AusgabedateienParallelSchreiben(ausgabedateien=ausgabedateien, ausgabedaten=ausgabedaten,
+            numZeilen=numZeilen, praefix=praefix, blockgroesse=blockgroesse,
+            anzahlProzesse=anzahlProzesse);
+         return;
+      #
+      Log('# Warnung: Paralleles Schreiben nur mit fork moeglich - schreibe Ergebnisdateien seriell');
+   #
+   dateien = [];
+   try:
+      for ausgabedatei in ausgabedateien:
+         dateien += [open(ausgabedatei, 'w')];
+      #
+      for idx_start in range(0, numZeilen, blockgroesse):
+         for datei, (indizes, werte, numpyzahlen) in zip(dateien, ausgabedaten):
+            idx_von, idx_bis = numpy.searchsorted(indizes, [idx_start, idx_start + blockgroesse]);
+            if (idx_bis == idx_von):
                continue;
             #
-            elemLabel = idx_elem + 1; # Die Labels der mdb-Elemente sind immer sortiert
-            try:
-               # Da die Anzahl an Elementen in mdb und odb i.d.R. nicht uebereinstimmen, sollen
-               # alle mdbElemente ohne Ergebnisse uebersprungen werden.
-               zielElement = odbergebnisse[listenhilfe_element[label_odbelem]];
-            except:
+            labels = [praefix + str(label) for label in (indizes[idx_von:idx_bis] + 1).tolist()];
+            BlockAusgabeSchreiben(ausgabe=datei, labels=labels, werte=werte[idx_von:idx_bis],
+               numpyzahlen=numpyzahlen, blockgroesse=blockgroesse);
+   finally:
+      for datei in dateien:
+         datei.close();
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _AusgabedateienParallelSchreiben(ausgabedateien, ausgabedaten, numZeilen, praefix,
+   blockgroesse, anzahlProzesse):
+   """Schreibe die ausgabedaten wie _AusgabedateienSchreiben, aber teile dazu den Bereich der
+   numZeilen mdb-Labels in Abschnitte auf. Jeder Abschnitt wird in einem von anzahlProzesse lokalen
+   Prozessen in eine temporaere Teildatei (im Verzeichnis der jeweiligen Ausgabedatei) geschrieben.
+   Anschliessend werden die Teildateien in der Reihenfolge der Labels zur Ausgabedatei
+   zusammengefuegt und geloescht.
+   
+   Die Prozesse werden per fork gestartet und erben die ausgabedaten ueber _parallelAusgabedaten,
+   sodass an sie nur die Grenzen der Abschnitte uebergeben werden.
+   """
+   import multiprocessing
+   import numpy
+   import os
+   import shutil
+   import tempfile
+   global _parallelAusgabedaten;
+   #
+   # Mehrere Abschnitte pro Prozess, damit unterschiedlich schnelle Abschnitte ausgeglichen werden
+   abschnittsgroesse = max(blockgroesse, int(numpy.ceil(numZeilen/(4.0*anzahlProzesse))));
+   auftraege = [];
+   teildateien = [[] for ausgabedatei in ausgabedateien];
+   try:
+      for idx_datei, (ausgabedatei, (indizes, werte, numpyzahlen)) in enumerate(zip(ausgabedateien, ausgabedaten)):
+         verzeichnis = os.path.dirname(os.path.abspath(ausgabedatei));
+         for idx_start in range(0, numZeilen, abschnittsgroesse):
+            idx_von, idx_bis = numpy.searchsorted(indizes, [idx_start, idx_start + abschnittsgroesse]);
+            if (idx_bis == idx_von):
                continue;
             #
-            if (zielElement.precision == DOUBLE_PRECISION):
-               temp_data = zielElement.dataDouble;
-            else:
-               temp_data = zielElement.data;
-            #
-            if (einzelergebnis.type == SCALAR):
-               temp_ergebnis = [mdbinstname + '.' + str(elemLabel)] + [str(temp_data)];
-            else:
-               temp_ergebnis = [mdbinstname + '.' + str(elemLabel)] + list(temp_data);
-            #
-            ausgabe.write(BlockAusgabe(temp_ergebnis));
-   #
-   if (not (einzelergebnis.nodeLabel is None)):
-      listenhilfe_node = ErstelleNodeLabelsortierteGeomlist(geomliste=odbergebnisse);
-      with open(ausgabedatei, 'w') as ausgabe:
-         for idx_knoten in range(len(mdbknoten)):
-            nodeLabel = idx_knoten + 1; # Die Labels der mdb-Elemente sind immer sortiert
-            ausgabewerte = [0.0 for idx in range(laenge_ausgabewerte)];
-            labeltemp = -1;
-            # FIXME: Die Umrechnung von knoten_pro_odbelement auf knoten_pro_mdbelement ist hier
-            #        scheinbar noch nicht implementiert -> nachholen
-            for idx_punkt in range(knoten_pro_mdbelement):
-               idxtemp = gewichtungKnotenLabels[knoten_pro_mdbelement*idx_knoten+idx_punkt];
-               labeltemp = idxtemp + 1;
-               try:
-                  # Da die Anzahl an Knoten in mdb und odb i.d.R. nicht uebereinstimmen, sollen
-                  # alle mdbKnoten ohne Ergebnisse uebersprungen werden.
-                  zielKnoten = odbergebnisse[listenhilfe_node[labeltemp]];
-               except:
-                  continue;
-               #
-               if (zielKnoten.precision == DOUBLE_PRECISION):
-                  temp_data = zielKnoten.dataDouble;
-               else:
-                  temp_data = zielKnoten.data;
-               #
-               if (einzelergebnis.type == SCALAR):
-                  ausgabewerte[0] += gewichtungKnotenWerte[knoten_pro_mdbelement*idx_knoten+idx_punkt]*temp_data;
-               else:
-                  ausgabewerte = [ausgabewerte[idx] + gewichtungKnotenWerte[knoten_pro_mdbelement*idx_knoten+idx_punkt]*temp_data[idx] for idx in range(laenge_ausgabewerte)];
-            #
-            temp_ergebnis = [mdbinstname + '.' + str(nodeLabel)] + ausgabewerte;
-            ausgabe.write(BlockAusgabe(temp_ergebnis));
+            kennung, teildatei = tempfile.mkstemp(prefix=os.path.basename(ausgabedatei) + '.',
+               suffix='.teil', dir=verzeichnis);
+            os.close(kennung);
+            teildateien[idx_datei] += [teildatei];
+            auftraege += [[teildatei, idx_datei, int(idx_von), int(idx_bis), praefix, blockgroesse]];
+      #
+      # Neuere Python-Versionen verwenden nicht unbedingt fork als Standard fuer neue Prozesse
+      kontext = multiprocessing;
+      if (hasattr(multiprocessing, 'get_context')):
+         kontext = multiprocessing.get_context('fork');
+      #
+      _parallelAusgabedaten = ausgabedaten;
+      prozesse = kontext.Pool(processes=anzahlProzesse);
+      try:
+         prozesse.map(_AusgabeteilSchreiben, auftraege);
+         prozesse.close();
+      except:
+         prozesse.terminate();
+         raise;
+      finally:
+         prozesse.join();
+      #
+      for ausgabedatei, teile in zip(ausgabedateien, teildateien):
+         with open(ausgabedatei, 'wb') as ausgabe:
+            for teildatei in teile:
+               with open(teildatei, 'rb') as teil:
+                  shutil.copyfileobj(teil, ausgabe, 16*1024*1024);
+   finally:
+      _parallelAusgabedaten = None;
+      for teile in teildateien:
+         for teildatei in teile:
+            if (os.path.isfile(teildatei)):
+               os.remove(teildatei);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _ZustandsuebertragungErgebnisdateienSchreiben(ausgaben, mdbinstname, gewichtungKnotenLabels,
+   gewichtungKnotenWerte, bezugsElemente, mdbknoten, knoten_pro_mdbelement, anzahlProzesse=1):
+   """Schreibe die berechneten Zustaende aller Ausgabevariablen aus ausgaben (Liste aus
+   [ausgabedatei, odbergebnisse]) in die jeweilige ausgabedatei. Fuer elementweise Ergebnisse
+   werden odbergebnisse und bezugsElemente verwendet, fuer knotenweise Ergebnisse odbergebnisse
+   und gewichtungKnotenWerte sowie gewichtungKnotenLabels. Bei knotenweisen Ergebnissen ist auch
+   die Anzahl an knoten_pro_mdbelement noetig.
+   
+   Die Werte aller knotenweisen Ausgabevariablen werden zunaechst in einer gemeinsamen Matrix
+   gesammelt, auf die die Gewichtungen fuer alle Variablen gleichzeitig angewendet werden.
+   Anschliessend werden alle Dateien in einem gemeinsamen Durchlauf ueber die mdb-Elemente bzw.
+   mdb-Knoten geschrieben. Die Ausgabe entspricht dabei der einer getrennten Bearbeitung jeder
+   Ausgabevariablen. Mit anzahlProzesse > 1 werden die Dateien abschnittsweise parallel geschrieben
+   (siehe _AusgabedateienSchreiben).
+   """
+   import numpy
+   #
+   elementausgaben = [];
+   knotenausgaben = [];
+   for ausgabedatei, odbergebnisse in ausgaben:
+      einzelergebnis = odbergebnisse[0];
+      if (not (einzelergebnis.nodeLabel is None)):
+         knotenausgaben += [[ausgabedatei, odbergebnisse]];
+      elif (not (einzelergebnis.elementLabel is None)):
+         elementausgaben += [[ausgabedatei, odbergebnisse]];
+   #
+   if (not (elementausgaben == [])):
+      elementlabels = numpy.asarray(bezugsElemente, dtype=int);
+      zuordnungen = [];
+      elementdaten = [];
+      for ausgabedatei, odbergebnisse in elementausgaben:
+         zeilen = _ErgebnisZeilen(odbergebnisse=odbergebnisse, attribut='elementLabel',
+            labels=elementlabels, zuordnungen=zuordnungen);
+         # Nur mdbElemente bearbeiten, denen tatsaechlich ein Wert zugewiesen werden soll. Da die
+         # Anzahl an Elementen in mdb und odb i.d.R. nicht uebereinstimmen, sollen alle
+         # mdbElemente ohne Ergebnisse uebersprungen werden.
+         indizes = numpy.nonzero((elementlabels != 0) & (zeilen != -1))[0];
+         werte, numpyzahlen = _ErgebnisWerte(odbergebnisse=odbergebnisse, indizes=zeilen[indizes]);
+         elementdaten += [[indizes, werte, numpyzahlen]];
+      #
+      # Die Labels der mdb-Elemente sind immer sortiert
+      _AusgabedateienSchreiben(ausgabedateien=[ausgabe[0] for ausgabe in elementausgaben],
+         ausgabedaten=elementdaten, numZeilen=len(elementlabels), praefix=mdbinstname + '.',
+         anzahlProzesse=anzahlProzesse);
+   #
+   if (not (knotenausgaben == [])):
+      numKnoten = len(mdbknoten);
+      # FIXME: Die Umrechnung von knoten_pro_odbelement auf knoten_pro_mdbelement ist hier
+      #        scheinbar noch nicht implementiert -> nachholen
+      operator = TransferoperatorErstellen(
+         gewichtungKnotenLabels=gewichtungKnotenLabels[0:knoten_pro_mdbelement*numKnoten],
+         gewichtungKnotenWerte=gewichtungKnotenWerte[0:knoten_pro_mdbelement*numKnoten],
+         knoten_pro_element=knoten_pro_mdbelement);
+      knotenlabels = numpy.arange(operator.numSpalten);
+      #
+      # Die Werte aller Ausgabevariablen mit gleicher Zuordnung der Labels werden spaltenweise in
+      # einer gemeinsamen Matrix gesammelt, damit die Gewichtungen nur einmal angewendet werden
+      zuordnungen = [];
+      gruppen = [];
+      spalten = [];
+      for ausgabedatei, odbergebnisse in knotenausgaben:
+         zeilen = _ErgebnisZeilen(odbergebnisse=odbergebnisse, attribut='nodeLabel',
+            labels=knotenlabels, zuordnungen=zuordnungen);
+         idx_gruppe = -1;
+         for idx, gruppe in enumerate(gruppen):
+            if (gruppe[0] is zeilen):
+               idx_gruppe = idx;
+               break;
+         #
+         if (idx_gruppe == -1):
+            gruppen += [[zeilen, [], 0]];
+            idx_gruppe = len(gruppen) - 1;
+         #
+         werte, numpytyp = _ErgebnisWerte(odbergebnisse=odbergebnisse,
+            indizes=numpy.arange(len(odbergebnisse)));
+         werte = werte.astype(numpy.float64);
+         #
+         startspalte = gruppen[idx_gruppe][2];
+         gruppen[idx_gruppe][1] += [werte];
+         gruppen[idx_gruppe][2] += werte.shape[1];
+         spalten += [[idx_gruppe, startspalte, startspalte + werte.shape[1], numpytyp]];
+      #
+      gewichteteWerte = [];
+      for zeilen, werteliste, numSpalten in gruppen:
+         ergebnismatrix = numpy.concatenate(werteliste, axis=1);
+         # Da die Anzahl an Knoten in mdb und odb i.d.R. nicht uebereinstimmen, werden alle
+         # Knotenlabels ohne Ergebnisse (Zeile -1) aus dem Operator entfernt.
+         gewichteteWerte += [operator.Spaltenzuordnung(zuordnung=zeilen,
+            numSpalten=len(ergebnismatrix)).Anwenden(ergebnismatrix)];
+      #
+      # Die Labels der mdb-Knoten sind immer sortiert
+      knotendaten = [];
+      for idx_gruppe, startspalte, endspalte, numpytyp in spalten:
+         knotendaten += [[numpy.arange(numKnoten), gewichteteWerte[idx_gruppe][:, startspalte:endspalte],
+            numpytyp]];
+      #
+      _AusgabedateienSchreiben(ausgabedateien=[ausgabe[0] for ausgabe in knotenausgaben],
+         ausgabedaten=knotendaten, numZeilen=numKnoten, praefix=mdbinstname + '.',
+         anzahlProzesse=anzahlProzesse);
 #
 
 
@@ -673,9 +1263,391 @@ def _UebertragungGueltigeElementeCheck(dimensionen, ecken):
 #
 
 
+# -------------------------------------------------------------------------------------------------
+def _ZielwertquaderGitterErstellen(dimensionen, cpp_knoten, cpp_elemente):
+   """Pruefe, ob die Knoten cpp_knoten und Elemente cpp_elemente (wie aus
+   _ZustandszuweisungVorbereiten) ein regelmaessiges Gitter bilden, wie es bspw. von
+   ZielwertquaderEinlesen erzeugt wird. Dazu muss jeder Knoten genau einer Kombination von Werten
+   der (sortierten) Koordinatenachsen entsprechen und jedes Element (Viereck bzw. Hexaeder) genau
+   eine Gitterzelle abdecken.
+   Gibt [numAchsenwerte, achsenwerte, gitterKnoten, gitterElemente] als array.array-Puffer fuer
+   Gewichtung_Zielwertquader_Bestimmen zurueck oder None, falls kein solches Gitter vorliegt.
+   """
+   from array import array
+   from bisect import bisect_left
+   #
+   tol = 1e-6;
+   ecken = 2**dimensionen;
+   numKnoten = len(cpp_knoten) // dimensionen;
+   numElemente = len(cpp_elemente) // ecken;
+   if ((numKnoten*dimensionen != len(cpp_knoten)) or (numElemente*ecken != len(cpp_elemente))):
+      return None;
+   #
+   # Achsen aus allen (bis auf tol) unterschiedlichen Koordinaten jeder Richtung
+   achsen = [];
+   for idx_dim in range(dimensionen):
+      achse = [];
+      for wert in sorted(set(cpp_knoten[idx_dim::dimensionen])):
+         if ((achse == []) or (wert - achse[-1] > tol)):
+            achse += [wert];
+      #
+      achsen += [achse];
+   #
+   numAchsenwerte = array('i', [len(achse) for achse in achsen]);
+   numGitterpunkte = 1;
+   numZellen = 1;
+   for numWerte in numAchsenwerte:
+      numGitterpunkte *= numWerte;
+      numZellen *= numWerte - 1;
+   #
+   if ((not (numGitterpunkte == numKnoten)) or (numZellen < 1)):
+      return None;
+   #
+   # Gitterindex jedes Knotens bestimmen
+   knotenGitterindex = [[0 for idx in range(numKnoten)] for idx_dim in range(dimensionen)];
+   gitterKnoten = array('i', [-1])*numGitterpunkte;
+   for idx_knoten in range(numKnoten):
+      idx_gitterpunkt = 0;
+      for idx_dim in reversed(range(dimensionen)):
+         achse = achsen[idx_dim];
+         wert = cpp_knoten[dimensionen*idx_knoten+idx_dim];
+         idx_achse = bisect_left(achse, wert - tol);
+         if ((idx_achse == len(achse)) or (abs(achse[idx_achse] - wert) > tol)):
+            return None;
+         #
+         knotenGitterindex[idx_dim][idx_knoten] = idx_achse;
+         idx_gitterpunkt = idx_gitterpunkt*numAchsenwerte[idx_dim] + idx_achse;
+      #
+      if (not (gitterKnoten[idx_gitterpunkt] == -1)):
+         return None;
+      #
+      gitterKnoten[idx_gitterpunkt] = idx_knoten;
+   #
+   # Gitterzelle jedes Elements aus den Gitterindizes seiner Eckpunkte bestimmen
+   gitterElemente = array('i', [-1])*numZellen;
+   for idx_element in range(numElemente):
+      eckpunkte = cpp_elemente[ecken*idx_element:ecken*(idx_element+1)];
+      idx_zelle = 0;
+      for idx_dim in reversed(range(dimensionen)):
+         indizes = [knotenGitterindex[idx_dim][idx_knoten] for idx_knoten in eckpunkte];
+         if (not (max(indizes) - min(indizes) == 1)):
+            return None;
+         #
+         idx_zelle = idx_zelle*(numAchsenwerte[idx_dim]-1) + min(indizes);
+      #
+      if (not (gitterElemente[idx_zelle] == -1)):
+         return None;
+      #
+      gitterElemente[idx_zelle] = idx_element;
+   #
+   achsenwerte = array('d', [wert for achse in achsen for wert in achse]);
+   return [numAchsenwerte, achsenwerte, gitterKnoten, gitterElemente];
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _PufferAnsicht(puffer, ctyp):
+   """Erstelle ein ctypes-Array vom Typ ctyp, das sich den Speicher mit dem array.array puffer
+   teilt. Aenderungen im zurueckgegebenen Array sind direkt in puffer sichtbar (und umgekehrt).
+   """
+   return (ctyp * len(puffer)).from_buffer(puffer);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _GewichtungSchluesselErstellen(dimensionen, knoten_pro_odbelement, knoten_pro_mdbelement,
+   suchmodus, gewichtungsmodus, cpp_odbknoten, cpp_odbelemente, cpp_mdbknoten, cpp_mdbelemente):
+   """Erstelle einen Fingerabdruck aus den Koordinaten und Verknuepfungen beider Netze, wie sie an
+   die externe Bibliothek uebergeben werden. Sobald sich eines der beiden Netze aendert, aendert
+   sich auch der Fingerabdruck. suchmodus und gewichtungsmodus werden ebenfalls beruecksichtigt,
+   der ausgabemodus nicht (er wird in der Kopfzeile der Cachedatei vermerkt).
+   Gibt den Fingerabdruck als Hex-String zurueck.
+   """
+   import hashlib
+   from ctypes import addressof, sizeof, string_at
+   #
+   fingerabdruck = hashlib.sha1();
+   fingerabdruck.update(str([_gewichtungCacheVersion, dimensionen, knoten_pro_odbelement,
+      knoten_pro_mdbelement, suchmodus, gewichtungsmodus, len(cpp_odbknoten),
+      len(cpp_odbelemente), len(cpp_mdbknoten), len(cpp_mdbelemente)]).encode('ascii'));
+   for cpp_array in [cpp_odbknoten, cpp_odbelemente, cpp_mdbknoten, cpp_mdbelemente]:
+      fingerabdruck.update(string_at(addressof(cpp_array), sizeof(cpp_array)));
+   #
+   return fingerabdruck.hexdigest();
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _GewichtungCacheLesen(cachedatei, schluessel, cpp_gewKnotenLabels, cpp_gewKnotenWerte,
+   cpp_bezugsElemente):
+   """Lese die in cachedatei gespeicherten Gewichtungen in die uebergebenen Arrays
+   cpp_gewKnotenLabels, cpp_gewKnotenWerte und cpp_bezugsElemente ein, falls die Datei existiert,
+   zum uebergebenen schluessel passt und die Groesse der Arrays uebereinstimmt.
+   Gibt den ausgabemodus zurueck, mit dem die gespeicherten Gewichtungen bestimmt worden sind
+   (siehe _GewichtungAusgabemodus), oder None, falls sie nicht gelesen werden konnten.
+   """
+   import os
+   from ctypes import memmove, sizeof
+   #
+   if (not os.path.isfile(cachedatei)):
+      return None;
+   #
+   cpp_arrays = [cpp_gewKnotenLabels, cpp_gewKnotenWerte, cpp_bezugsElemente];
+   kopfzeile = ('abapys_gewichtung ' + schluessel + ' ').encode('ascii');
+   try:
+      with open(cachedatei, 'rb') as eingabe:
+         if (not (eingabe.read(len(kopfzeile)) == kopfzeile)):
+            return None;
+         #
+         modusangabe = eingabe.read(2).decode('ascii');
+         if (modusangabe not in ['0\n', '1\n', '2\n']):
+            return None;
+         #
+         for cpp_array in cpp_arrays:
+            daten = eingabe.read(sizeof(cpp_array));
+            if (not (len(daten) == sizeof(cpp_array))):
+               return None;
+            #
+            memmove(cpp_array, daten, sizeof(cpp_array));
+         #
+         if (not (eingabe.read(1) == ''.encode('ascii'))):
+            return None;
+   except (IOError, UnicodeDecodeError):
+      return None;
+   #
+   return int(modusangabe[0]);
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _GewichtungCacheSchreiben(cachedatei, schluessel, ausgabemodus, cpp_gewKnotenLabels,
+   cpp_gewKnotenWerte, cpp_bezugsElemente):
+   """Speichere die Gewichtungen aus cpp_gewKnotenLabels, cpp_gewKnotenWerte und cpp_bezugsElemente
+   zusammen mit dem schluessel und dem ausgabemodus, mit dem sie bestimmt worden sind, binaer in
+   cachedatei.
+   """
+   from hilfen import Log
+   #
+   try:
+      with open(cachedatei, 'wb') as ausgabe:
+         ausgabe.write(('abapys_gewichtung ' + schluessel + ' ' + str(ausgabemodus)
+            + '\n').encode('ascii'));
+         for cpp_array in [cpp_gewKnotenLabels, cpp_gewKnotenWerte, cpp_bezugsElemente]:
+            ausgabe.write(bytearray(cpp_array));
+   except IOError:
+      Log('# Warnung: Gewichtungen konnten nicht in ' + cachedatei + ' gespeichert werden');
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _GewichtungAusgabemodus(odbergebnisliste):
+   """Bestimme aus den Positionen aller odbergebnisse in odbergebnisliste, welche Zuordnungen in
+   _GewichtungBestimmen benoetigt werden. Fuer Ergebnisse mit nodeLabel werden die Gewichtungen der
+   Knoten benoetigt, fuer Ergebnisse mit elementLabel (und ohne nodeLabel) die bezugsElemente.
+   Gibt den ausgabemodus zurueck (1: nur bezugsElemente, 2: nur Knoten, 0: beide).
+   """
+   elementeBenoetigt = False;
+   knotenBenoetigt = False;
+   for odbergebnisse in odbergebnisliste:
+      if (len(odbergebnisse) == 0):
+         continue;
+      #
+      einzelergebnis = odbergebnisse[0];
+      if (not (einzelergebnis.nodeLabel is None)):
+         knotenBenoetigt = True;
+      elif (not (einzelergebnis.elementLabel is None)):
+         elementeBenoetigt = True;
+   #
+   if (elementeBenoetigt and (not knotenBenoetigt)):
+      return 1;
+   elif (knotenBenoetigt and (not elementeBenoetigt)):
+      return 2;
+   #
+   return 0;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _GewichtungBibliothekPruefen(bibliothek):
+   """Pruefe, ob die geladene externe bibliothek die von diesem Modul erwartete Schnittstelle
+   (_gewichtungBibliothekVersion) bereitstellt. Aeltere Versionen ohne Gewichtung_Version oder mit
+   abweichender Version erwarten andere Argumente und duerfen nicht aufgerufen werden.
+   Gibt True zurueck, wenn die Versionen uebereinstimmen, sonst False.
+   """
+   from ctypes import c_int
+   from hilfen import Log
+   #
+   if (not hasattr(bibliothek, 'Gewichtung_Version')):
+      Log('# Abbruch: Externe Bibliothek gewichtung veraltet (keine Versionsangabe) - bitte neu kompilieren');
+      return False;
+   #
+   cpp_version = bibliothek.Gewichtung_Version;
+   cpp_version.argtypes = [];
+   cpp_version.restype = c_int;
+   version = cpp_version();
+   if (not (version == _gewichtungBibliothekVersion)):
+      Log('# Abbruch: Externe Bibliothek gewichtung hat Version ' + str(version) + ' statt ' +
+         str(_gewichtungBibliothekVersion) + ' - bitte neu kompilieren');
+      return False;
+   #
+   return True;
+#
+
+
+# -------------------------------------------------------------------------------------------------
+def _GewichtungBestimmen(bibliothek, dimensionen, knoten_pro_odbelement, knoten_pro_mdbelement,
+   cpp_odbknoten, numOdbElemente, cpp_odbelemente, numMdbKnoten, cpp_mdbknoten, numMdbElemente,
+   cpp_mdbelemente, anzahlThreads=1, nachbarsuche=False, cachedatei=None, gitter=None,
+   isoparametrisch=False, ausgabemodus=0):
+   """Bestimme mit der externen bibliothek fuer jeden der numMdbKnoten Knoten das Element des alten
+   Netzes (odb), in dem der Punkt liegt, und die Gewichtungen der Knoten dieses odb-Elements.
+   Zusaetzlich wird fuer jedes der numMdbElemente Elemente das odb-Element bestimmt, in dem der
+   Elementmittelpunkt liegt. Mit nachbarsuche=True beginnt die Suche fuer jeden Punkt beim Element
+   des vorherigen Punktes und folgt den Nachbarelementen des odb-Netzes. Wenn das odb-Netz ein
+   regelmaessiges gitter ist (Rueckgabe von _ZielwertquaderGitterErstellen), wird die Zelle jedes
+   Punktes stattdessen direkt ueber eine binaere Suche auf den Achsen bestimmt, sofern die
+   bibliothek diese Suche unterstuetzt.
+   Mit isoparametrisch=True werden die Gewichtungen fuer Vierecke und Hexaeder aus den bi- bzw.
+   trilinearen Formfunktionen bestimmt statt ueber eine Aufteilung in Dreiecke bzw. Tetraeder.
+   Liegt ein Knoten knapp ausserhalb der isoparametrischen Abbildung des gefundenen Elements, wird
+   zuerst das angrenzende Element versucht. Die Anzahl der Knoten, fuer die trotzdem die Aufteilung
+   verwendet werden muss (mit ggfs. negativen Gewichtungen), wird ausgegeben.
+   Mit ausgabemodus=1 werden nur die bezugsElemente bestimmt, mit ausgabemodus=2 nur die
+   Gewichtungen der Knoten (mit 0 beide). Die nicht bestimmten Rueckgabewerte entsprechen dann
+   nicht gefundenen Elementen bzw. Knoten (siehe _GewichtungAusgabemodus).
+
+   Falls eine cachedatei uebergeben wird und diese Gewichtungen fuer die gleichen Netze enthaelt,
+   werden die Gewichtungen daraus gelesen statt neu berechnet. Das gilt, wenn der Eintrag mit
+   ausgabemodus=0 oder dem gleichen ausgabemodus bestimmt worden ist. Enthaelt die cachedatei nur
+   den jeweils anderen Teil, wird nur der fehlende Teil berechnet und beide Teile zusammen
+   (ausgabemodus=0) gespeichert, so dass sich abwechselnde Aufrufe nicht gegenseitig verdraengen.
+   In diesem Fall enthalten die Rueckgabewerte auch den nicht angeforderten Teil. Andernfalls
+   werden die berechneten Gewichtungen in cachedatei gespeichert.
+
+   Die Eingabedaten cpp_### werden als array.array-Puffer erwartet (siehe
+   _ZustandsuebertragungDatenVorbereiten) und ohne Kopie an die Bibliothek uebergeben.
+   Gibt [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente] als array.array-Puffer
+   zurueck, die von der Bibliothek direkt befuellt werden, oder None, falls die Version der
+   bibliothek nicht passt (siehe _GewichtungBibliothekPruefen).
+   """
+   from array import array
+   from ctypes import c_double, c_int, memmove, sizeof, POINTER
+   from hilfen import Log
+   #
+   if (not _GewichtungBibliothekPruefen(bibliothek=bibliothek)):
+      return None;
+   #
+   # Rueckgabewerte ueber Pointer
+   # Fuer die gewichtungen wird jedem Knoten des neuen Modells (mdb) das Element in der odb bestimmt,
+   # in dem der Punkt liegt. Fuer jeden Knoten aus der odb, die dieses odb-Element definieren,
+   # wird die Gewichtung bestimmt
+   gewichtungKnotenLabels = array('i', [0])*(knoten_pro_odbelement*numMdbKnoten);
+   gewichtungKnotenWerte = array('d', [0.0])*(knoten_pro_odbelement*numMdbKnoten);
+   bezugsElemente = array('i', [0])*numMdbElemente;
+   #
+   # Die ctypes-Arrays teilen sich den Speicher mit den array.array-Puffern
+   cpp_gewKnotenLabels = _PufferAnsicht(puffer=gewichtungKnotenLabels, ctyp=c_int);
+   cpp_gewKnotenWerte = _PufferAnsicht(puffer=gewichtungKnotenWerte, ctyp=c_double);
+   cpp_bezugsElemente = _PufferAnsicht(puffer=bezugsElemente, ctyp=c_int);
+   cpp_odbknoten = _PufferAnsicht(puffer=cpp_odbknoten, ctyp=c_double);
+   cpp_odbelemente = _PufferAnsicht(puffer=cpp_odbelemente, ctyp=c_int);
+   cpp_mdbknoten = _PufferAnsicht(puffer=cpp_mdbknoten, ctyp=c_double);
+   cpp_mdbelemente = _PufferAnsicht(puffer=cpp_mdbelemente, ctyp=c_int);
+   #
+   # Aeltere Versionen der Bibliothek unterstuetzen die direkte Suche im Gitter nicht
+   if ((gitter is not None) and (not hasattr(bibliothek, 'Gewichtung_Zielwertquader_Bestimmen'))):
+      Log('# Warnung: Externe Bibliothek gewichtung ohne Gittersuche - verwende Elementsuche');
+      gitter = None;
+   #
+   suchmodus = 0;
+   if (nachbarsuche):
+      suchmodus = 1;
+   #
+   if (gitter is not None):
+      suchmodus = 2;
+   #
+   gewichtungsmodus = 0;
+   if (isoparametrisch):
+      gewichtungsmodus = 1;
+   #
+   gespeicherterModus = None;
+   if (cachedatei is not None):
+      schluessel = _GewichtungSchluesselErstellen(dimensionen=dimensionen,
+         knoten_pro_odbelement=knoten_pro_odbelement, knoten_pro_mdbelement=knoten_pro_mdbelement,
+         suchmodus=suchmodus, gewichtungsmodus=gewichtungsmodus, cpp_odbknoten=cpp_odbknoten,
+         cpp_odbelemente=cpp_odbelemente, cpp_mdbknoten=cpp_mdbknoten,
+         cpp_mdbelemente=cpp_mdbelemente);
+      gespeicherterModus = _GewichtungCacheLesen(cachedatei=cachedatei, schluessel=schluessel,
+         cpp_gewKnotenLabels=cpp_gewKnotenLabels, cpp_gewKnotenWerte=cpp_gewKnotenWerte,
+         cpp_bezugsElemente=cpp_bezugsElemente);
+   #
+   if ((gespeicherterModus == 0) or (gespeicherterModus == ausgabemodus)):
+      Log('# Gewichtungen aus ' + cachedatei + ' uebernommen');
+   else:
+      # Falls die cachedatei nur den anderen Teil enthaelt (gespeicherterModus 1 oder 2), wird nur
+      # der fehlende Teil bestimmt. Der gelesene Teil wird vorher gesichert, da die Bibliothek die
+      # nicht bestimmten Rueckgabewerte ueberschreibt
+      bestimmungsmodus = ausgabemodus;
+      vorhandeneTeile = [];
+      if (gespeicherterModus is not None):
+         bestimmungsmodus = 3 - gespeicherterModus;
+         if (gespeicherterModus == 1):
+            vorhandeneTeile = [cpp_bezugsElemente];
+         else:
+            vorhandeneTeile = [cpp_gewKnotenLabels, cpp_gewKnotenWerte];
+         #
+         vorhandeneTeile = [(cpp_array, type(cpp_array).from_buffer_copy(cpp_array))
+            for cpp_array in vorhandeneTeile];
+      #
+      if (gitter is not None):
+         numAchsenwerte, achsenwerte, gitterKnoten, gitterElemente = gitter;
+         cpp_gewichtung_bestimmen = bibliothek.Gewichtung_Zielwertquader_Bestimmen;
+         cpp_gewichtung_bestimmen.argtypes = [c_int, POINTER(c_int), POINTER(c_double),
+            POINTER(c_int), POINTER(c_int), c_int, c_int, POINTER(c_double), c_int,
+            POINTER(c_int), POINTER(c_int), POINTER(c_double), POINTER(c_int), c_int, c_int];
+         cpp_gewichtung_bestimmen.restype = None;
+         cpp_gewichtung_bestimmen(c_int(dimensionen),
+            _PufferAnsicht(puffer=numAchsenwerte, ctyp=c_int),
+            _PufferAnsicht(puffer=achsenwerte, ctyp=c_double),
+            _PufferAnsicht(puffer=gitterKnoten, ctyp=c_int),
+            _PufferAnsicht(puffer=gitterElemente, ctyp=c_int), c_int(knoten_pro_mdbelement),
+            c_int(numMdbKnoten), cpp_mdbknoten, c_int(numMdbElemente), cpp_mdbelemente,
+            cpp_gewKnotenLabels, cpp_gewKnotenWerte, cpp_bezugsElemente, c_int(anzahlThreads),
+            c_int(bestimmungsmodus));
+      else:
+         cpp_gewichtung_bestimmen = bibliothek.Gewichtung_Bestimmen;
+         cpp_gewichtung_bestimmen.argtypes = [c_int, c_int, c_int, POINTER(c_double), c_int,
+            POINTER(c_int), c_int, POINTER(c_double), c_int, POINTER(c_int), POINTER(c_int),
+            POINTER(c_double), POINTER(c_int), c_int, c_int, c_int, c_int];
+         cpp_gewichtung_bestimmen.restype = c_int;
+         numRueckfaelle = cpp_gewichtung_bestimmen(c_int(dimensionen), c_int(knoten_pro_odbelement),
+            c_int(knoten_pro_mdbelement), cpp_odbknoten, c_int(numOdbElemente), cpp_odbelemente,
+            c_int(numMdbKnoten), cpp_mdbknoten, c_int(numMdbElemente), cpp_mdbelemente,
+            cpp_gewKnotenLabels, cpp_gewKnotenWerte, cpp_bezugsElemente, c_int(anzahlThreads),
+            c_int(suchmodus), c_int(gewichtungsmodus), c_int(bestimmungsmodus));
+         if (numRueckfaelle > 0):
+            Log('# Hinweis: Fuer ' + str(numRueckfaelle) + ' Knoten keine isoparametrische ' +
+               'Gewichtung moeglich - Aufteilung in Dreiecke/Tetraeder verwendet');
+      #
+      for cpp_array, gesichert in vorhandeneTeile:
+         memmove(cpp_array, gesichert, sizeof(cpp_array));
+      #
+      if (len(vorhandeneTeile) > 0):
+         bestimmungsmodus = 0;
+      #
+      if (cachedatei is not None):
+         _GewichtungCacheSchreiben(cachedatei=cachedatei, schluessel=schluessel,
+            ausgabemodus=bestimmungsmodus, cpp_gewKnotenLabels=cpp_gewKnotenLabels,
+            cpp_gewKnotenWerte=cpp_gewKnotenWerte, cpp_bezugsElemente=cpp_bezugsElemente);
+   #
+   return [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente];
+#
+
+
 # -------------------------------------------------------------------------------------------------
 def Zustandsuebertragung(session, odbname, odbinstname, variablenliste, modell, mdbinstname,
-   mdbknoten=[], odbknoten=[], step=-1, frame=-1):
+   mdbknoten=[], odbknoten=[], step=-1, frame=-1, anzahlThreads=1,
+   gewichtungCache=False, nachbarsuche=False, isoparametrisch=False, anzahlProzesse=1):
    """Uebertrage den Zustand aus einer odb namens odbname auf ein in der aktuellen session geladenes
    Modell modell. Dazu wird jeden in variablenliste uebergebene Variable an jedem Knoten bzw.
    Element (je nach Typ) der odbinstname aus dem angegebenen step und frame ausgelesen und als
@@ -689,8 +1661,29 @@ def Zustandsuebertragung(session, odbname, odbinstname, variablenliste, modell,
    verschoben sind (anderes Nulloffset o.ae.), dann bietet sich eine Transformation der Koordinaten
    an (bspw. mit der Funktion Knotentransformation). Die aktualisierten mdbknoten oder/und odbknoten
    muessen dann entsprechend uebergeben werden.
+   Mit Knotentransformation(..., kompakt=True) erstellte Koordinatenfelder werden dabei direkt als
+   Array uebernommen, ohne auf die einzelnen Knoten zuzugreifen.
    
-   Gibt [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente] zurueck.
+   Die Bestimmung der Gewichtungen in der externen Bibliothek kann mit anzahlThreads auf mehrere
+   Threads verteilt werden. Das Ergebnis ist unabhaengig von anzahlThreads.
+   Mit gewichtungCache=True werden die Gewichtungen in einer Datei <modell.name>_gewichtung.bin
+   gespeichert und bei spaeteren Aufrufen mit unveraenderten Netzen daraus gelesen statt neu
+   bestimmt. Mit nachbarsuche=True wird fuer jeden Punkt ausgehend vom Element des vorherigen
+   Punktes ueber die Nachbarelemente gesucht, was bei strukturierten Netzen schneller sein kann.
+   Mit isoparametrisch=True werden die Gewichtungen in Vierecken und Hexaedern aus den bi- bzw.
+   trilinearen Formfunktionen bestimmt (glattere Interpolation). Standardmaessig wird eine
+   Aufteilung in Dreiecke bzw. Tetraeder verwendet, die auch bei stark verzerrten Elementen
+   funktioniert. Knoten, fuer die keine isoparametrische Gewichtung moeglich ist, werden ebenfalls
+   mit dieser Aufteilung gewichtet und ihre Anzahl ausgegeben.
+   Bei sehr grossen Modellen koennen die Ergebnisdateien (*.add) mit anzahlProzesse > 1 in
+   Abschnitten von entsprechend vielen lokalen Prozessen geschrieben und anschliessend
+   zusammengefuegt werden. Das ist nur auf Systemen mit fork (bspw. Linux) moeglich, unter Windows
+   werden die Dateien immer seriell geschrieben.
+   
+   Gibt [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente] (als array.array)
+   zurueck. Dabei werden nur die fuer die Positionen der Ausgabevariablen benoetigten Zuordnungen
+   bestimmt (Knotengewichtungen fuer Knotenwerte, bezugsElemente fuer Elementwerte), die anderen
+   entsprechen nicht gefundenen Knoten bzw. Elementen.
    
    Es wird 2D -> 2D und 3D -> 3D unterstuetzt, aber nicht gemischt. Fuer 2D-Elemente sind Dreiecke
    und Vierecke zulaessig, fuer 3D-Elemente Tetraeder und Hexahedrons. Die Unterscheidung wird am
@@ -698,9 +1691,8 @@ def Zustandsuebertragung(session, odbname, odbinstname, variablenliste, modell,
       
    Wichtig: Alle Elemente des parts muessen den gleichen Elementyp haben.
    """
-   from ctypes import c_double, c_int
    import odbAccess
-   from hilfen import Log, BibliothekLaden
+   from hilfen import Log, BibliothekLaden, LabelzuordnungenZuruecksetzen
    # Odb-Datei oeffnen, falls nicht schon offen
    if session.odbData.has_key(odbname):
       odb = session.odbs[odbname];
@@ -734,8 +1726,6 @@ def Zustandsuebertragung(session, odbname, odbinstname, variablenliste, modell,
       Log('# Abbruch: Externe Bibliothek gewichtung nicht gefunden');
       return [];
    #
-   cpp_gewichtung_bestimmen = bibliothek.Gewichtung_Bestimmen;
-   #
    Log('# 1-3: Bereite Daten fuer Zustandsuebertragung vor');
    #
    odbelemente = odb.rootAssembly.instances[odbinstname.upper()].elements;
@@ -769,57 +1759,63 @@ def Zustandsuebertragung(session, odbname, odbinstname, variablenliste, modell,
    cpp_odbknoten, cpp_odbelemente, cpp_mdbknoten, cpp_mdbelemente = _ZustandsuebertragungDatenVorbereiten(dimensionen=dimensionen,
       odbknoten=odbknoten, odbelemente=odbelemente, mdbknoten=mdbknoten, mdbelemente=mdbelemente);
    #
-   # Rueckgabewerte ueber Pointer
-   # Fuer die gewichtungen wird jedem Knoten des neuen Modells (mdb) das Element in der odb bestimmt,
-   # in dem der Punkt liegt. Fuer jeden Knoten aus der odb, die dieses odb-Element definieren,
-   # wird die Gewichtung bestimmt
-   gewichtungKnotenLabels = [0 for idx in range(knoten_pro_odbelement*len(mdbknoten))];
-   IntArray_gewKnotenLabels = c_int * len(gewichtungKnotenLabels);
-   cpp_gewKnotenLabels = IntArray_gewKnotenLabels(*list(gewichtungKnotenLabels));
-   #
-   gewichtungKnotenWerte = [0.0 for idx in range(knoten_pro_odbelement*len(mdbknoten))];
-   DoubleArray_gewKnotenWerte = c_double * len(gewichtungKnotenWerte);
-   cpp_gewKnotenWerte = DoubleArray_gewKnotenWerte(*list(gewichtungKnotenWerte));
-   #
-   bezugsElemente = [0 for idx in range(len(mdbelemente))];
-   IntArray_bezugsElemente = c_int * len(bezugsElemente);
-   cpp_bezugsElemente = IntArray_bezugsElemente(*list(bezugsElemente));
-   #
-   Log('# 2-3: Ermittle Gewichtungen');
-   cpp_gewichtung_bestimmen(c_int(dimensionen), c_int(knoten_pro_odbelement),
-      c_int(knoten_pro_mdbelement), cpp_odbknoten, c_int(len(odbelemente)), cpp_odbelemente,
-      c_int(len(mdbknoten)), cpp_mdbknoten, c_int(len(mdbelemente)), cpp_mdbelemente,
-      cpp_gewKnotenLabels, cpp_gewKnotenWerte, cpp_bezugsElemente);
-   #
-   # Wieder Listen aus den uebergebenen Pointern erzeugen
-   gewichtungKnotenLabels = list(cpp_gewKnotenLabels);
-   gewichtungKnotenWerte = list(cpp_gewKnotenWerte);
-   bezugsElemente = list(cpp_bezugsElemente);
-   #
-   Log('# 3-3: Weise Werte zu'); 
-   idx_naechstereintrag = _ErzeugeAbapysAnfangsbedingungenEintrag(modell=modell);
-   #
-   # Anzahl der Ausgabewerte pro Knoten/Element ermitteln
+   # Ergebnisse aller Ausgabevariablen vorab auslesen, damit nur die fuer deren Positionen (Knoten
+   # oder Elemente) benoetigten Zuordnungen bestimmt werden muessen
+   ausgaben = [];
    for ausgabevariable in mod_variablenliste:
       ausgabedatei, ausgabetext, odbergebnisse = _ZustandsuebertragungAusgabeVorbereiten(mdbname=modell.name,
          ausgabevariable=ausgabevariable, bezugsframe=bezugsframe);
       if (any([ausgabedatei, ausgabetext, odbergebnisse]) is None):
          Log('# Abbruch: Zugriffsprobleme auf Datei oder ungueltige Ergebnisse');
+         LabelzuordnungenZuruecksetzen();
          return [];
       #
+      ausgaben += [[ausgabedatei, ausgabetext, odbergebnisse]];
+   #
+   Log('# 2-3: Ermittle Gewichtungen');
+   cachedatei = None;
+   if (gewichtungCache):
+      cachedatei = modell.name + '_gewichtung.bin';
+   #
+   gewichtung = _GewichtungBestimmen(
+      bibliothek=bibliothek, dimensionen=dimensionen, knoten_pro_odbelement=knoten_pro_odbelement,
+      knoten_pro_mdbelement=knoten_pro_mdbelement, cpp_odbknoten=cpp_odbknoten,
+      numOdbElemente=len(odbelemente), cpp_odbelemente=cpp_odbelemente,
+      numMdbKnoten=len(mdbknoten), cpp_mdbknoten=cpp_mdbknoten, numMdbElemente=len(mdbelemente),
+      cpp_mdbelemente=cpp_mdbelemente, anzahlThreads=anzahlThreads, nachbarsuche=nachbarsuche,
+      cachedatei=cachedatei, isoparametrisch=isoparametrisch,
+      ausgabemodus=_GewichtungAusgabemodus(odbergebnisliste=[ausgabe[2] for ausgabe in ausgaben]));
+   if (gewichtung is None):
+      LabelzuordnungenZuruecksetzen();
+      return [];
+   #
+   gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente = gewichtung;
+   #
+   Log('# 3-3: Weise Werte zu'); 
+   idx_naechstereintrag = _ErzeugeAbapysAnfangsbedingungenEintrag(modell=modell);
+   #
+   # Ergebnisse aller Ausgabevariablen gemeinsam in die Dateien schreiben
+   dateiausgaben = [];
+   for ausgabedatei, ausgabetext, odbergebnisse in ausgaben:
       modell.keywordBlock.insert(idx_naechstereintrag, ausgabetext);
-      _ZustandsuebertragungErgebnisdateiSchreiben(ausgabedatei=ausgabedatei,
-         odbergebnisse=odbergebnisse, mdbinstname=mdbinstname,
-         gewichtungKnotenLabels=gewichtungKnotenLabels, gewichtungKnotenWerte=gewichtungKnotenWerte,
-         bezugsElemente=bezugsElemente, mdbknoten=mdbknoten, knoten_pro_mdbelement=knoten_pro_mdbelement);
+      dateiausgaben += [[ausgabedatei, odbergebnisse]];
+   #
+   _ZustandsuebertragungErgebnisdateienSchreiben(ausgaben=dateiausgaben, mdbinstname=mdbinstname,
+      gewichtungKnotenLabels=gewichtungKnotenLabels, gewichtungKnotenWerte=gewichtungKnotenWerte,
+      bezugsElemente=bezugsElemente, mdbknoten=mdbknoten, knoten_pro_mdbelement=knoten_pro_mdbelement,
+      anzahlProzesse=anzahlProzesse);
    #
+   # Zwischengespeicherte Labelzuordnungen nicht ueber die Zustandsuebertragung hinaus vorhalten
+   LabelzuordnungenZuruecksetzen();
    return [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente];
 #
 
 
 # -------------------------------------------------------------------------------------------------
 def Zustandszuweisung(session, modell, zielkoordinaten, zielelemente, zielwerte, mdbinstname,
-   mdbknoten=[], variablentyp=['SDV']):
+   mdbknoten=[], variablentyp=['SDV'], anzahlThreads=1,
+   gewichtungCache=False, nachbarsuche=False, zielwertquader=False, isoparametrisch=False,
+   anzahlProzesse=1):
    """Weise die zielwerte an den zielkoordinaten bze. zielelemente einem in der aktuellen session
    geladenem Modell modell zu als Anfangsloesung fuer variablentyp SDV zu.
    
@@ -839,12 +1835,35 @@ def Zustandszuweisung(session, modell, zielkoordinaten, zielelemente, zielwerte,
    eine Transformation der Koordinaten an (bspw. mit der Funktion Knotentransformation). Die
    aktualisierten mdbknoten muessen dann entsprechend uebergeben werden.
    
-   Gibt [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente] zurueck.
+   Die Bestimmung der Gewichtungen in der externen Bibliothek kann mit anzahlThreads auf mehrere
+   Threads verteilt werden. Das Ergebnis ist unabhaengig von anzahlThreads.
+   Mit gewichtungCache=True werden die Gewichtungen in einer Datei <modell.name>_gewichtung.bin
+   gespeichert und bei spaeteren Aufrufen mit unveraenderten Netzen daraus gelesen statt neu
+   bestimmt. Mit nachbarsuche=True wird fuer jeden Punkt ausgehend vom Element des vorherigen
+   Punktes ueber die Nachbarelemente gesucht, was bei strukturierten Netzen schneller sein kann.
+   Mit isoparametrisch=True werden die Gewichtungen in Vierecken und Hexaedern aus den bi- bzw.
+   trilinearen Formfunktionen bestimmt (glattere Interpolation). Standardmaessig wird eine
+   Aufteilung in Dreiecke bzw. Tetraeder verwendet, die auch bei stark verzerrten Elementen
+   funktioniert. Knoten, fuer die keine isoparametrische Gewichtung moeglich ist, werden ebenfalls
+   mit dieser Aufteilung gewichtet und ihre Anzahl ausgegeben.
+   Bei sehr grossen Modellen koennen die Ergebnisdateien (*.add) mit anzahlProzesse > 1 in
+   Abschnitten von entsprechend vielen lokalen Prozessen geschrieben und anschliessend
+   zusammengefuegt werden. Das ist nur auf Systemen mit fork (bspw. Linux) moeglich, unter Windows
+   werden die Dateien immer seriell geschrieben.
+   Wenn zielkoordinaten und zielelemente aus ZielwertquaderEinlesen stammen, kann mit
+   zielwertquader=True die Zelle jedes Punktes direkt ueber eine binaere Suche auf den
+   Koordinatenachsen bestimmt und die Gewichtung bi- bzw. trilinear berechnet werden (ohne
+   Elementsuche). Bilden zielkoordinaten und zielelemente kein regelmaessiges Gitter, wird die
+   normale Elementsuche verwendet.
+   
+   Gibt [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente] (als array.array)
+   zurueck. Dabei werden nur die fuer die zielwerte benoetigten Zuordnungen bestimmt
+   (Knotengewichtungen fuer Knotenwerte, bezugsElemente fuer Elementwerte), die anderen entsprechen
+   nicht gefundenen Knoten bzw. Elementen.
    
    Wichtig: Alle Elemente des parts muessen den gleichen Elementyp haben.
    """
-   from ctypes import c_double, c_int
-   from hilfen import Log, BibliothekLaden
+   from hilfen import Log, BibliothekLaden, LabelzuordnungenZuruecksetzen
    #
    if (mdbknoten == []):
       mdbknoten = modell.rootAssembly.instances[mdbinstname].nodes;
@@ -855,8 +1874,6 @@ def Zustandszuweisung(session, modell, zielkoordinaten, zielelemente, zielwerte,
       Log('# Abbruch: Externe Bibliothek gewichtung nicht gefunden');
       return [None, None, None];
    #
-   cpp_gewichtung_bestimmen = bibliothek.Gewichtung_Bestimmen;
-   #
    Log('# 1-3: Bereite Daten fuer Zustandszuweisung vor');
    #
    mdbelemente = modell.rootAssembly.instances[mdbinstname].elements;
@@ -887,36 +1904,43 @@ def Zustandszuweisung(session, modell, zielkoordinaten, zielelemente, zielwerte,
       Log('# Abbruch: Anzahl Ergebnisse muss Anzahl Knoten oder Elementen entsprechen');
       return [None, None, None];
    #
+   # Fuer knotenweise Ergebnisse werden nur die Gewichtungen der Knoten benoetigt, ansonsten nur die
+   # bezugsElemente (siehe _GewichtungAusgabemodus)
+   ausgabemodus = 1;
+   if (knotenweise):
+      ausgabemodus = 2;
+   #
    cpp_odbknoten, cpp_odbelemente, cpp_mdbknoten, cpp_mdbelemente = _ZustandsuebertragungDatenVorbereiten(dimensionen=dimensionen,
       odbknoten=zielkoordinaten, odbelemente=odbelemente, mdbknoten=mdbknoten, mdbelemente=mdbelemente,
       odbAbaqus=False);
    #
-   # Rueckgabewerte ueber Pointer
-   # Fuer die gewichtungen wird jedem Knoten des neuen Modells (mdb) das Element in der odb bestimmt,
-   # in dem der Punkt liegt. Fuer jeden Knoten aus der odb, die dieses odb-Element definieren,
-   # wird die Gewichtung bestimmt
-   gewichtungKnotenLabels = [0 for idx in range(knoten_pro_odbelement*len(mdbknoten))];
-   IntArray_gewKnotenLabels = c_int * len(gewichtungKnotenLabels);
-   cpp_gewKnotenLabels = IntArray_gewKnotenLabels(*list(gewichtungKnotenLabels));
-   #
-   gewichtungKnotenWerte = [0.0 for idx in range(knoten_pro_odbelement*len(mdbknoten))];
-   DoubleArray_gewKnotenWerte = c_double * len(gewichtungKnotenWerte);
-   cpp_gewKnotenWerte = DoubleArray_gewKnotenWerte(*list(gewichtungKnotenWerte));
-   #
-   bezugsElemente = [0 for idx in range(len(mdbelemente))];
-   IntArray_bezugsElemente = c_int * len(bezugsElemente);
-   cpp_bezugsElemente = IntArray_bezugsElemente(*list(bezugsElemente));
+   gitter = None;
+   if (zielwertquader):
+      if (knoten_pro_odbelement == 2**dimensionen):
+         gitter = _ZielwertquaderGitterErstellen(dimensionen=dimensionen, cpp_knoten=cpp_odbknoten,
+            cpp_elemente=cpp_odbelemente);
+      #
+      if (gitter is None):
+         Log('# Warnung: zielkoordinaten/zielelemente bilden kein regelmaessiges Gitter - verwende Elementsuche');
    #
    Log('# 2-3: Ermittle Gewichtungen');
-   cpp_gewichtung_bestimmen(c_int(dimensionen), c_int(knoten_pro_odbelement),
-      c_int(knoten_pro_mdbelement), cpp_odbknoten, c_int(len(odbelemente)), cpp_odbelemente,
-      c_int(len(mdbknoten)), cpp_mdbknoten, c_int(len(mdbelemente)), cpp_mdbelemente,
-      cpp_gewKnotenLabels, cpp_gewKnotenWerte, cpp_bezugsElemente);
+   cachedatei = None;
+   if (gewichtungCache):
+      cachedatei = modell.name + '_gewichtung.bin';
+   #
+   gewichtung = _GewichtungBestimmen(
+      bibliothek=bibliothek, dimensionen=dimensionen, knoten_pro_odbelement=knoten_pro_odbelement,
+      knoten_pro_mdbelement=knoten_pro_mdbelement, cpp_odbknoten=cpp_odbknoten,
+      numOdbElemente=len(odbelemente), cpp_odbelemente=cpp_odbelemente,
+      numMdbKnoten=len(mdbknoten), cpp_mdbknoten=cpp_mdbknoten, numMdbElemente=len(mdbelemente),
+      cpp_mdbelemente=cpp_mdbelemente, anzahlThreads=anzahlThreads, nachbarsuche=nachbarsuche,
+      cachedatei=cachedatei, gitter=gitter, isoparametrisch=isoparametrisch,
+      ausgabemodus=ausgabemodus);
+   if (gewichtung is None):
+      LabelzuordnungenZuruecksetzen();
+      return [None, None, None];
    #
-   # Wieder Listen aus den uebergebenen Pointern erzeugen
-   gewichtungKnotenLabels = list(cpp_gewKnotenLabels);
-   gewichtungKnotenWerte = list(cpp_gewKnotenWerte);
-   bezugsElemente = list(cpp_bezugsElemente);
+   gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente = gewichtung;
    #
    Log('# 3-3: Weise Werte zu'); 
    idx_naechstereintrag = _ErzeugeAbapysAnfangsbedingungenEintrag(modell=modell);
@@ -925,13 +1949,17 @@ def Zustandszuweisung(session, modell, zielkoordinaten, zielelemente, zielwerte,
       ausgabevariable=variablentyp, bezugsframe=None);
    if (any([ausgabedatei, ausgabetext]) is None):
       Log('# Abbruch: Zugriffsprobleme auf Datei oder ungueltige Ergebnisse');
+      LabelzuordnungenZuruecksetzen();
       return [];
    #
    modell.keywordBlock.insert(idx_naechstereintrag, ausgabetext);
    _ZustandszuweisungErgebnisdateiSchreiben(ausgabedatei=ausgabedatei,
       ergebnisse=zielwerte, mdbinstname=mdbinstname, gewichtungKnotenLabels=gewichtungKnotenLabels,
       gewichtungKnotenWerte=gewichtungKnotenWerte, bezugsElemente=bezugsElemente,
-      mdbknoten=mdbknoten, knoten_pro_mdbelement=knoten_pro_mdbelement, knotenweise=knotenweise);
+      mdbknoten=mdbknoten, knoten_pro_mdbelement=knoten_pro_mdbelement, knotenweise=knotenweise,
+      anzahlProzesse=anzahlProzesse);
    #
+   # Zwischengespeicherte Labelzuordnungen nicht ueber die Zustandszuweisung hinaus vorhalten
+   LabelzuordnungenZuruecksetzen();
    return [gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElemente];
 #
@@ -1,25 +1,28 @@
-// gewichtung.cpp   v0.4 (2020-09)
+// gewichtung.cpp   v0.5 (2026-10)
 
 // Copyright 2020 Dominik Zobel.
 // All rights reserved.
-// 
+//
 // This file is part of the abapys library.
 // abapys is free software: you can redistribute it and/or modify
 // it under the terms of the GNU General Public License as published by
 // the Free Software Foundation, either version 3 of the License, or
 // (at your option) any later version.
-// 
+//
 // abapys is distributed in the hope that it will be useful,
 // but WITHOUT ANY WARRANTY; without even the implied warranty of
 // MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
 // GNU General Public License for more details.
-// 
+//
 // You should have received a copy of the GNU General Public License
 // along with abapys. If not, see <http://www.gnu.org/licenses/>.
 
 #include <iostream>
 #include <vector>
 #include <cmath>
+#include <algorithm>
+#include <thread>
+#include <functional>
 
 
 #ifdef _WIN32
@@ -37,39 +40,65 @@
 #endif
 
 
-extern "C" ADDAPI void ADDCALL Gewichtung_Bestimmen(const int dimensionen, const int eckenAlt,
+extern "C" ADDAPI int ADDCALL Gewichtung_Version();
+
+extern "C" ADDAPI int ADDCALL Gewichtung_Bestimmen(const int dimensionen, const int eckenAlt,
    const int eckenNeu, const double* knotenKoordinatenAlt, int numElementeAlt,
    const int* elementeEckenAlt, int numKnotenNeu, const double* knotenKoordinatenNeu,
    int numElementeNeu, int* const elementeEckenNeu, int* gewichtungKnotenLabels,
-   double* gewichtungKnotenWerte, int* bezugsElement);
+   double* gewichtungKnotenWerte, int* bezugsElement, const int numThreads,
+   const int suchmodus, const int gewichtungsmodus, const int ausgabemodus);
+
+extern "C" ADDAPI void ADDCALL Gewichtung_Zielwertquader_Bestimmen(const int dimensionen,
+   const int* numAchsenwerte, const double* achsenwerte, const int* gitterKnoten,
+   const int* gitterElemente, const int eckenNeu, int numKnotenNeu,
+   const double* knotenKoordinatenNeu, int numElementeNeu, int* const elementeEckenNeu,
+   int* gewichtungKnotenLabels, double* gewichtungKnotenWerte, int* bezugsElement,
+   const int numThreads, const int ausgabemodus);
+
+
+struct Elementtabelle {
+   // Einmalig vorberechnete Geometriedaten aller Elemente, damit bei den (sehr vielen) Abfragen
+   // keine Koordinaten mehr zusammengesucht, keine Volumina neu berechnet und kein Speicher mehr
+   // angefordert werden muss. Alle Eintraege eines Elements stehen jeweils zusammenhaengend:
+   // - punkte: dimensionen*ecken Koordinaten, bspw. fuer ein Hexaeder
+   //   [P0x, P0y, P0z, P1x, P1y, P1z, ..., P7x, P7y, P7z]
+   // - minKoord/maxKoord: dimensionen Koordinaten des Begrenzungsquaders (bounding box)
+   // - volumen: Flaeche (2D) bzw. Volumen (3D) des Elements wie in PunktInnerhalbElement verwendet
+   // - hilfspunkte: numHilfspunkte*dimensionen Koordinaten der zusaetzlichen Punkte fuer die
+   //   Knotengewichtung (Viereck: Mittelpunkt, Hexaeder: Mittelpunkt und sechs Seitenmitten)
+   int dimensionen;
+   int ecken;
+   int numElemente;
+   int numHilfspunkte;
+   std::vector<double> punkte;
+   std::vector<double> minKoord;
+   std::vector<double> maxKoord;
+   std::vector<double> volumen;
+   std::vector<double> hilfspunkte;
+};
 
 
-bool PunktMoeglicherweiseInElement(std::vector<double> punkte, std::vector<double> referenzpunkt,
-   const int dimensionen, const int ecken) {
+// Mit der Definition der Punkte wie in PunktInnerhalbElement beschrieben, ergeben sich die
+// sechs Seitenmitten eines Hexaeders aus den Punkten mit den folgenden Indizes
+static const int hexaeder_seitenmitten[24] = {0, 1, 2, 3,   0, 1, 4, 5,   0, 3, 4, 7,
+                                              1, 2, 5, 6,   2, 3, 6, 7,   4, 5, 6, 7};
+
+
+bool PunktMoeglicherweiseInElement(const Elementtabelle &tabelle, const int idx_element,
+   const double* referenzpunkt) {
    // Ueberpruefe, ob der Punkt zwischen x-, y- und z-Koordinaten aller Elementknoten liegt.
    // (Notwendige aber nicht hinreichende Bedingung, dass der Punkt auch tatsaechlich im Element ist).
-   // Der erste Array enthaelt dimensionen*ecken Werte, bspw. fuer ein Hexaeder
-   // [P0x, P0y, P0z, P1x, P1y, P1z, ..., P7x, P7y, P7z]
-   // und der zweite Array dimensionen Werte, bspw. fuer drei Achsen [Rx, Ry, Rz]
-   int idxPosition = 0;
+   // Dazu wird der vorberechnete Begrenzungsquader des Elements idx_element verwendet. Gleichheit
+   // mit den Grenzen ist noch in Ordnung.
+   const int dimensionen = tabelle.dimensionen;
+   const double* minKoord = &tabelle.minKoord[dimensionen*idx_element];
+   const double* maxKoord = &tabelle.maxKoord[dimensionen*idx_element];
    for (int idx_richtung = 0; idx_richtung < dimensionen; idx_richtung++) {
-      int sum_kleiner = 0;
-      int sum_groesser = 0;
-      for (int idx_eckpunkt = 0; idx_eckpunkt < ecken; idx_eckpunkt++) {
-         idxPosition = dimensionen*idx_eckpunkt+idx_richtung;
-         // Ueberpruefe echt groesser und echt kleiner, da Gleichheit noch in Ordnung ist
-         if (punkte[idxPosition] < referenzpunkt[idx_richtung]) {
-            sum_kleiner += 1;
-         }
-         else {
-            if (punkte[idxPosition] > referenzpunkt[idx_richtung]) {
-               sum_groesser += 1;
-            }
-         }
-      }
       // Sobald alle Punkte einer beliebigen Koordinate echt groesser oder echt kleiner
       // als der Referenzpunkt sind, ist der Punkt garantiert nicht im Element
-      if ((sum_groesser == ecken) || (sum_kleiner == ecken)) {
+      if ((referenzpunkt[idx_richtung] < minKoord[idx_richtung]) ||
+         (referenzpunkt[idx_richtung] > maxKoord[idx_richtung])) {
          return false;
       }
    }
@@ -77,212 +106,156 @@ bool PunktMoeglicherweiseInElement(std::vector<double> punkte, std::vector<doubl
 }
 
 
-double TetraederVolumen(std::vector<double> punkte) {
-   // Gibt das Volumen eines Tetraeders zurueck, der durch vier Koordinaten definiert ist.
-   // Die vier Koordinaten sind im Array gespeichert [P0x, P0y, P0z, ..., P3x, P3y, P3z]
+double TetraederVolumen(const double* p0, const double* p1, const double* p2, const double* p3) {
+   // Gibt das Volumen eines Tetraeders zurueck, der durch die vier Punkte p0 bis p3 mit jeweils
+   // drei Koordinaten definiert ist.
    double svol = 0.0;
-   double a[3] = {punkte[0] - punkte[9], punkte[1] - punkte[10], punkte[2] - punkte[11]};
-   double b[3] = {punkte[3] - punkte[9], punkte[4] - punkte[10], punkte[5] - punkte[11]};
-   double c[3] = {punkte[6] - punkte[9], punkte[7] - punkte[10], punkte[8] - punkte[11]};
+   double a[3] = {p0[0] - p3[0], p0[1] - p3[1], p0[2] - p3[2]};
+   double b[3] = {p1[0] - p3[0], p1[1] - p3[1], p1[2] - p3[2]};
+   double c[3] = {p2[0] - p3[0], p2[1] - p3[1], p2[2] - p3[2]};
    svol = fabs(c[0]*(a[1]*b[2]-a[2]*b[1]) + c[1]*(a[2]*b[0]-a[0]*b[2]) + c[2]*(a[0]*b[1]-a[1]*b[0]));
    return svol/6.0;
 }
 
 
-double DreieckFlaeche(std::vector<double> punkte) {
-   // Gibt das Volumen eines Dreiecks zurueck, das durch drei Koordinaten definiert ist.
-   // Die drei Koordinaten sind im Array gespeichert [P0x, P0y,  P1x, P1y,  P2x, P2y]
+double DreieckFlaeche(const double* p0, const double* p1, const double* p2) {
+   // Gibt die (vorzeichenbehaftete) Flaeche eines Dreiecks zurueck, das durch die drei Punkte p0 bis
+   // p2 mit jeweils zwei Koordinaten definiert ist.
    double sflaeche = 0.0;
-   double a[2] = {punkte[2] - punkte[0], punkte[3] - punkte[1]};
-   double b[2] = {punkte[4] - punkte[0], punkte[5] - punkte[1]};
+   double a[2] = {p1[0] - p0[0], p1[1] - p0[1]};
+   double b[2] = {p2[0] - p0[0], p2[1] - p0[1]};
    sflaeche = (a[0]*b[1] - a[1]*b[0])/2.0;
    return sflaeche;
 }
 
 
-double PunktInnerhalbDreieck(std::vector<double> punkte, std::vector<double> referenzpunkt) {
-   // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Dreiecks liegt, das durch die
-   // uebergebenen Punkte definiert wird, werden zwei Flaechen berechnet und verglichen: Zum einen
-   // wird die Flaeche des Dreiecks direkt bestimmt und zum anderen aus den Kanten mit dem
-   // uebergebenen referenzpunkt. Nur wenn der referenzpunkt nicht ausserhalb des Dreiecks ist,
-   // sind die Flaechen gleich gross.
-   const int dimensionen = 2;
+double ElementVolumen(const double* punkte, const int dimensionen, const int ecken) {
+   // Gibt die Flaeche (2D) bzw. das Volumen (3D) des Elements zurueck, dessen dimensionen*ecken
+   // Koordinaten in punkte gespeichert sind. Vierecke werden dazu in zwei Dreiecke und Hexaeder in
+   // fuenf Tetraeder zerlegt.
    double elemvol = 0.0;
-   double referenzpunktvol = 0.0;
-   std::vector<double> punktliste(dimensionen*3, 0.0);
-   int idxZielKnoten = 0;
-   //
-   // Die Flaeche kann direkt ueber die Eckpunkte bestimmt werden
-   elemvol = DreieckFlaeche(punkte);
-   // Jede Kante kann als Basisseite fuer Dreiecke unterteilt werden. Nach dem gleichen Schema
-   // wie fuer die komplette Flaechenberechnung wird aus folgenden Punktindizes die Flaeche
-   // aller Dreieckseiten mit referenzpunkt als Spitze der Dreiecke bestimmt
-   int dreieck_basispunktliste[6] = {0, 1,   1, 2,   2, 0};
-   //
-   // _ElementZuReferenzpunktVolumen
-   // Einmal zuweisen der Referenzpunktkoordinaten reicht, da die Punkte nicht mehr ueberschrieben
-   // werden
-   punktliste[4] = referenzpunkt[0];
-   punktliste[5] = referenzpunkt[1];
-   //
-   for (int idx_dreieck = 0; idx_dreieck < 3; idx_dreieck++) {
-      for (int idx_knoten = 0; idx_knoten < 2; idx_knoten++) {
-         idxZielKnoten = dreieck_basispunktliste[2*idx_dreieck+idx_knoten];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            punktliste[dimensionen*idx_knoten+idx_dim] = punkte[dimensionen*idxZielKnoten+idx_dim];
+   if (dimensionen == 2) {
+      if (ecken == 3) {
+         elemvol = fabs(DreieckFlaeche(punkte, punkte+2, punkte+4));
+      }
+      else {
+         // Die Indizes von zwei Dreiecken, die das Viereck komplett fuellen
+         elemvol = fabs(DreieckFlaeche(punkte, punkte+2, punkte+4)
+            + DreieckFlaeche(punkte, punkte+4, punkte+6));
+      }
+   }
+   else {
+      if (ecken == 4) {
+         elemvol = TetraederVolumen(punkte, punkte+3, punkte+6, punkte+9);
+      }
+      else {
+         // Die Indizes von fuenf Tetraedern, die das Hexaeder komplett fuellen
+         static const int tetraeder_punktliste[20] = {0, 1, 2, 5,   0, 2, 3, 7,   0, 4, 5, 7,
+                                                      0, 2, 5, 7,   2, 5, 6, 7};
+         for (int idx_tetra = 0; idx_tetra < 5; idx_tetra++) {
+            const int* tetra = tetraeder_punktliste + 4*idx_tetra;
+            elemvol += TetraederVolumen(punkte+3*tetra[0], punkte+3*tetra[1], punkte+3*tetra[2],
+               punkte+3*tetra[3]);
          }
       }
-      referenzpunktvol += DreieckFlaeche(punktliste);
    }
-   return referenzpunktvol/elemvol;
+   return elemvol;
 }
 
 
-double PunktInnerhalbViereck(std::vector<double> punkte, std::vector<double> referenzpunkt) {
-   // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Vierecks liegt, das durch die
-   // uebergebenen Punkte definiert wird, werden zwei Flaechen berechnet und verglichen: Zum einen
-   // wird die Flaeche des Vierecks ueber zwei Dreiecke bestimmt und zum anderen werden Dreiecke aus
-   // den Kanten mit dem uebergebenen referenzpunkt gebildet. Nur wenn der referenzpunkt nicht
-   // ausserhalb des Vierecks ist, sind die Flaechen gleich gross.
-   const int dimensionen = 2;
-   double elemvol = 0.0;
+double PunktInnerhalbDreieck(const double* punkte, const double* referenzpunkt,
+   const double elemvol) {
+   // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Dreiecks liegt, das durch die
+   // uebergebenen Punkte definiert wird, werden zwei Flaechen verglichen: Zum einen die (vorab
+   // bestimmte) Flaeche elemvol des Dreiecks und zum anderen die Summe der Flaechen aus den Kanten
+   // mit dem uebergebenen referenzpunkt. Nur wenn der referenzpunkt nicht ausserhalb des Dreiecks
+   // ist, sind die Flaechen gleich gross.
+   //
+   // Jede Kante kann als Basisseite fuer Dreiecke unterteilt werden. Aus folgenden Punktindizes
+   // wird die Flaeche aller Dreieckseiten mit referenzpunkt als Spitze der Dreiecke bestimmt
+   static const int dreieck_basispunktliste[6] = {0, 1,   1, 2,   2, 0};
    double referenzpunktvol = 0.0;
-   std::vector<double> punktliste(dimensionen*3, 0.0);
-   int idxZielKnoten = 0;
-   // Die Indizes von zwei Dreiecken, die das Viereck komplett fuellen
-   int dreieck_punktliste[6] = {0, 1, 2,   1, 2, 3};
-   // Bestimme die Elementflaeche des Vierecks
-   for (int idx_dreieck = 0; idx_dreieck < 2; idx_dreieck++) {
-      for (int idx_knoten = 0; idx_knoten < 3; idx_knoten++) {
-         idxZielKnoten = dreieck_punktliste[3*idx_dreieck+idx_knoten];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            punktliste[dimensionen*idx_knoten+idx_dim] = punkte[dimensionen*idxZielKnoten+idx_dim];
-         }
-      }
-      elemvol += DreieckFlaeche(punktliste);
+   for (int idx_dreieck = 0; idx_dreieck < 3; idx_dreieck++) {
+      referenzpunktvol += fabs(DreieckFlaeche(punkte+2*dreieck_basispunktliste[2*idx_dreieck],
+         punkte+2*dreieck_basispunktliste[2*idx_dreieck+1], referenzpunkt));
    }
-   // Jede Kante kann als Basisseite fuer Dreiecke unterteilt werden. Nach dem gleichen Schema
-   // wie fuer die komplette Flaechenberechnung wird aus folgenden Punktindizes die Flaeche
-   // aller Dreieckseiten mit referenzpunkt als Spitze der Dreiecke bestimmt
-   int dreieck_basispunktliste[8] = {0, 1,   1, 2,   2, 3,   3, 0};
-   //
-   // _ElementZuReferenzpunktVolumen
-   // Einmal zuweisen der Referenzpunktkoordinaten reicht, da die Punkte nicht mehr ueberschrieben
-   // werden
-   punktliste[4] = referenzpunkt[0];
-   punktliste[5] = referenzpunkt[1];
+   return referenzpunktvol/elemvol;
+}
+
+
+double PunktInnerhalbViereck(const double* punkte, const double* referenzpunkt,
+   const double elemvol) {
+   // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Vierecks liegt, das durch die
+   // uebergebenen Punkte definiert wird, werden zwei Flaechen verglichen: Zum einen die (vorab
+   // bestimmte) Flaeche elemvol des Vierecks und zum anderen werden Dreiecke aus den Kanten mit dem
+   // uebergebenen referenzpunkt gebildet. Nur wenn der referenzpunkt nicht ausserhalb des Vierecks
+   // ist, sind die Flaechen gleich gross.
    //
+   // Jede Kante kann als Basisseite fuer Dreiecke unterteilt werden. Aus folgenden Punktindizes
+   // wird die Flaeche aller Dreieckseiten mit referenzpunkt als Spitze der Dreiecke bestimmt
+   static const int dreieck_basispunktliste[8] = {0, 1,   1, 2,   2, 3,   3, 0};
+   double referenzpunktvol = 0.0;
    for (int idx_dreieck = 0; idx_dreieck < 4; idx_dreieck++) {
-      for (int idx_knoten = 0; idx_knoten < 2; idx_knoten++) {
-         idxZielKnoten = dreieck_basispunktliste[2*idx_dreieck+idx_knoten];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            punktliste[dimensionen*idx_knoten+idx_dim] = punkte[dimensionen*idxZielKnoten+idx_dim];
-         }
-      }
-      referenzpunktvol += DreieckFlaeche(punktliste);
+      referenzpunktvol += fabs(DreieckFlaeche(punkte+2*dreieck_basispunktliste[2*idx_dreieck],
+         punkte+2*dreieck_basispunktliste[2*idx_dreieck+1], referenzpunkt));
    }
    return referenzpunktvol/elemvol;
 }
 
 
-double PunktInnerhalbTetraeder(std::vector<double> punkte, std::vector<double> referenzpunkt) {
+double PunktInnerhalbTetraeder(const double* punkte, const double* referenzpunkt,
+   const double elemvol) {
    // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Tetraeders liegt, das durch die
-   // uebergebenen Punkte definiert wird, werden zwei Volumina berechnet und verglichen: Zum einen
-   // wird das Volumen des Tetraeders direkt bestimmt und zum anderen werden Tetraeder aus den
+   // uebergebenen Punkte definiert wird, werden zwei Volumina verglichen: Zum einen das (vorab
+   // bestimmte) Volumen elemvol des Tetraeders und zum anderen werden Tetraeder aus den
    // Aussenflaechen mit dem uebergebenen referenzpunkt gebildet. Nur wenn der referenzpunkt nicht
    // ausserhalb des Tetraeders ist, sind die Volumina gleich gross.
-   const int dimensionen = 3;
-   double elemvol = 0.0;
-   double referenzpunktvol = 0.0;
-   std::vector<double> punktliste(dimensionen*4, 0.0);
-   int idxZielKnoten = 0;
-   //
-   // Das Volumen kann direkt ueber die Eckpunkte bestimmt werden
-   elemvol = TetraederVolumen(punkte);
-   // Jede Aussenflaeche kann als Basisflaeche fuer Tetraeder verwendet werden. Nach dem gleichen
-   // Schema wie fuer die komplette Volumenberechnung wird aus folgenden Punktindizes das Volumen
-   // aller Aussenflaechen mit referenzpunkt als Spitze der Tetraeder bestimmt
-   int tetraeder_basispunktliste[12] = {0, 1, 2,   0, 1, 3,   0, 2, 3,   1, 2, 3};
-   //
-   // _ElementZuReferenzpunktVolumen
-   // Einmal zuweisen der Referenzpunktkoordinaten reicht, da die Punkte nicht mehr ueberschrieben
-   // werden
-   punktliste[9] = referenzpunkt[0];
-   punktliste[10] = referenzpunkt[1];
-   punktliste[11] = referenzpunkt[2];
    //
+   // Jede Aussenflaeche kann als Basisflaeche fuer Tetraeder verwendet werden. Aus folgenden
+   // Punktindizes wird das Volumen aller Aussenflaechen mit referenzpunkt als Spitze der Tetraeder
+   // bestimmt
+   static const int tetraeder_basispunktliste[12] = {0, 1, 2,   0, 1, 3,   0, 2, 3,   1, 2, 3};
+   double referenzpunktvol = 0.0;
    for (int idx_tetra = 0; idx_tetra < 4; idx_tetra++) {
-      for (int idx_knoten = 0; idx_knoten < 3; idx_knoten++) {
-         idxZielKnoten = tetraeder_basispunktliste[3*idx_tetra+idx_knoten];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            punktliste[dimensionen*idx_knoten+idx_dim] = punkte[dimensionen*idxZielKnoten+idx_dim];
-         }
-      }
-      referenzpunktvol += TetraederVolumen(punktliste);
+      const int* basis = tetraeder_basispunktliste + 3*idx_tetra;
+      referenzpunktvol += TetraederVolumen(punkte+3*basis[0], punkte+3*basis[1],
+         punkte+3*basis[2], referenzpunkt);
    }
    return referenzpunktvol/elemvol;
 }
 
 
-double PunktInnerhalbHexaeder(std::vector<double> punkte, std::vector<double> referenzpunkt) {
+double PunktInnerhalbHexaeder(const double* punkte, const double* referenzpunkt,
+   const double elemvol) {
    // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Hexaeders liegt, das durch die
-   // uebergebenen Punkte definiert wird, werden zwei Volumina berechnet und verglichen: Zum einen
-   // wird das Volumen des Hexaeders direkt aus zusammengesetzten Tetraedern bestimmt und zum
-   // anderen werden je vier Tetraeder pro Aussenflaeche mit dem uebergebenen referenzpunkt
-   // gebildet. Nur wenn der referenzpunkt nicht ausserhalb des Tetraeders ist, sind die Volumina
-   // gleich gross.
-   const int dimensionen = 3;
-   double elemvol = 0.0;
-   double referenzpunktvol = 0.0;
-   std::vector<double> punktliste(dimensionen*4, 0.0);
-   int idxZielKnoten = 0;
+   // uebergebenen Punkte definiert wird, werden zwei Volumina verglichen: Zum einen das (vorab aus
+   // zusammengesetzten Tetraedern bestimmte) Volumen elemvol des Hexaeders und zum anderen werden
+   // je zwei Tetraeder pro Aussenflaeche mit dem uebergebenen referenzpunkt gebildet. Nur wenn der
+   // referenzpunkt nicht ausserhalb des Hexaeders ist, sind die Volumina gleich gross.
    //
-   // Die Indizes von fuenf Tetraedern, die das Hexaeder komplett fuellen
-   int tetraeder_punktliste[20] = {0, 1, 2, 5,   0, 2, 3, 7,   0, 4, 5, 7,   0, 2, 5, 7,   2, 5, 6, 7};
-   // Bestimme das Elementvolumen des Hexaeders
-   for (int idx_tetra = 0; idx_tetra < 5; idx_tetra++) {
-      for (int idx_knoten = 0; idx_knoten < 4; idx_knoten++) {
-         idxZielKnoten = tetraeder_punktliste[4*idx_tetra+idx_knoten];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            punktliste[dimensionen*idx_knoten+idx_dim] = punkte[dimensionen*idxZielKnoten+idx_dim];
-         }
-      }
-      elemvol += TetraederVolumen(punktliste);
-   }
-   // Jedes Viertel einer Aussenflaeche kann als Basisflaeche fuer Tetraeder verwendet werden. Nach
+   // Jede Haelfte einer Aussenflaeche kann als Basisflaeche fuer Tetraeder verwendet werden. Nach
    // dem gleichen Schema wie fuer die komplette Volumenberechnung wird aus folgenden Punktindizes
    // das Volumen aller Aussenflaechen mit referenzpunkt als Spitze der Tetraeder bestimmt
-   int tetraeder_basispunktliste[36] = {0, 1, 2,   0, 1, 5,   0, 2, 3,   0, 3, 7,
-                                        0, 4, 5,   0, 4, 7,   1, 2, 5,   2, 3, 7,
-                                        2, 5, 6,   2, 6, 7,   4, 5, 7,   5, 6, 7};
-   //
-   // _ElementZuReferenzpunktVolumen
-   // Einmal zuweisen der Referenzpunktkoordinaten reicht, da die Punkte nicht mehr ueberschrieben
-   // werden
-   punktliste[9] = referenzpunkt[0];
-   punktliste[10] = referenzpunkt[1];
-   punktliste[11] = referenzpunkt[2];
-   //
+   static const int tetraeder_basispunktliste[36] = {0, 1, 2,   0, 1, 5,   0, 2, 3,   0, 3, 7,
+                                                     0, 4, 5,   0, 4, 7,   1, 2, 5,   2, 3, 7,
+                                                     2, 5, 6,   2, 6, 7,   4, 5, 7,   5, 6, 7};
+   double referenzpunktvol = 0.0;
    for (int idx_tetra = 0; idx_tetra < 12; idx_tetra++) {
-      for (int idx_knoten = 0; idx_knoten < 3; idx_knoten++) {
-         idxZielKnoten = tetraeder_basispunktliste[3*idx_tetra+idx_knoten];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            punktliste[dimensionen*idx_knoten+idx_dim] = punkte[dimensionen*idxZielKnoten+idx_dim];
-         }
-      }
-      referenzpunktvol += TetraederVolumen(punktliste);
+      const int* basis = tetraeder_basispunktliste + 3*idx_tetra;
+      referenzpunktvol += TetraederVolumen(punkte+3*basis[0], punkte+3*basis[1],
+         punkte+3*basis[2], referenzpunkt);
    }
    return referenzpunktvol/elemvol;
 }
 
 
-double PunktInnerhalbElement(std::vector<double> punkte, std::vector<double> referenzpunkt,
-   const int dimensionen, const int ecken) {
-   // Fuer die Bestimmung, ob ein referenzpunkt innerhalb eines Elements liegt, das durch die
-   // uebergebenen Punkte definiert wird, werden zwei Flaechen (2D) bzw. zwei Volumina (3D) berechnet
-   // und verglichen: Zum einen wird die Berechnung mit den Eckpunkten des Elements durchgefuehrt,
-   // zum anderen mit dem uebergebenene referenzpunkt. Nur wenn der referenzpunkt nicht ausserhalb
-   // des Elements ist, sind die Flaechen bzw. Volumina gleich gross.
+double PunktInnerhalbElement(const Elementtabelle &tabelle, const int idx_element,
+   const double* referenzpunkt) {
+   // Fuer die Bestimmung, ob ein referenzpunkt innerhalb des Elements idx_element liegt, werden zwei
+   // Flaechen (2D) bzw. zwei Volumina (3D) verglichen: Zum einen die vorab mit den Eckpunkten des
+   // Elements berechnete, zum anderen die mit dem uebergebenene referenzpunkt. Nur wenn der
+   // referenzpunkt nicht ausserhalb des Elements ist, sind die Flaechen bzw. Volumina gleich gross.
+   // Zurueckgegeben wird das Verhaeltnis beider Werte (1.0 fuer Punkte innerhalb des Elements).
    //
    // Folgende Varianten werden unterstuetzt:
    // - je zwei Koordinaten pro Punkt (dimensionen == 2)
@@ -291,10 +264,6 @@ double PunktInnerhalbElement(std::vector<double> punkte, std::vector<double> ref
    // - je drei Koordinaten pro Punkt (dimensionen == 3)
    //   -> Volumenberechnung mit Tetraedern (ecken == 4 punkte) oder Hexaeders (ecken == 8 punkte)
    //
-   // Der erste Array enthaelt dimensionen*ecken Werte, bspw. bei einem Hexaeder die 3 Koordinaten
-   // der 8 Eckpunkte
-   // [P0x, P0y, P0z, P1x, P1y, P1z, ..., P7x, P7y, P7z].
-   //
    // Fuer die korrekte Berechnung muessen die Knoten von Hexaeder und Viereck-Elements in der
    // dargestellen Reihenfolge gespeichert sein:
    //
@@ -310,55 +279,271 @@ double PunktInnerhalbElement(std::vector<double> punkte, std::vector<double> ref
    //       \|_________|         #   2                1
    //      0             1       #
    //
+   const int dimensionen = tabelle.dimensionen;
+   const int ecken = tabelle.ecken;
+   const double* punkte = &tabelle.punkte[dimensionen*ecken*idx_element];
+   const double elemvol = tabelle.volumen[idx_element];
    double retval = 0.0;
    if (dimensionen == 2) {
       if (ecken == 3) {
-         retval = PunktInnerhalbDreieck(punkte, referenzpunkt);
+         retval = PunktInnerhalbDreieck(punkte, referenzpunkt, elemvol);
       }
       else {
-         retval = PunktInnerhalbViereck(punkte, referenzpunkt);
+         retval = PunktInnerhalbViereck(punkte, referenzpunkt, elemvol);
       }
    }
    else {
       if (ecken == 4) {
-         retval = PunktInnerhalbTetraeder(punkte, referenzpunkt);
+         retval = PunktInnerhalbTetraeder(punkte, referenzpunkt, elemvol);
       }
       else {
-         retval = PunktInnerhalbHexaeder(punkte, referenzpunkt);
+         retval = PunktInnerhalbHexaeder(punkte, referenzpunkt, elemvol);
       }
    }
    return retval;
 }
 
 
-int PunktInElement(const double* knotenKoordinaten, int numElemente, const int* elementeEcken,
-   std::vector<double> referenzpunkt, const int dimensionen, const int ecken) {
-   // Gebe den Index des Elements zurueck, das referenzpunkt enthaelt.
-   // Der Array elementEcken hat ecken*numElemente Eintraege, bspw fuer 8 ecken
+void ElementtabelleErstellen(const double* knotenKoordinaten, int numElemente,
+   const int* elementeEcken, const int dimensionen, const int ecken, Elementtabelle &tabelle) {
+   // Erstelle einmalig die Elementtabelle fuer alle numElemente Elemente. Der Array elementeEcken
+   // hat ecken*numElemente Eintraege, bspw fuer 8 ecken
    // [E0_P0, E0_P1, E0_P2, E0_P3, E0_P4, E0_P5, E0_P6, E0_P7,   E1_P0, E1_P1, E1_P2, ...]
-   // knotenKoordinaten dimensionen-mal soviele Eintraege haben wie der groesste Wert aus elementeEcken
+   // und knotenKoordinaten dimensionen-mal soviele Eintraege wie der groesste Wert aus elementeEcken.
+   tabelle.dimensionen = dimensionen;
+   tabelle.ecken = ecken;
+   tabelle.numElemente = numElemente;
+   tabelle.numHilfspunkte = 0;
+   if ((dimensionen == 2) && (ecken == 4)) {
+      tabelle.numHilfspunkte = 1;
+   }
+   if ((dimensionen == 3) && (ecken == 8)) {
+      tabelle.numHilfspunkte = 7;
+   }
+   const int numHilfspunkte = tabelle.numHilfspunkte;
+   tabelle.punkte.assign(dimensionen*ecken*numElemente, 0.0);
+   tabelle.minKoord.assign(dimensionen*numElemente, 0.0);
+   tabelle.maxKoord.assign(dimensionen*numElemente, 0.0);
+   tabelle.volumen.assign(numElemente, 0.0);
+   tabelle.hilfspunkte.assign(dimensionen*numHilfspunkte*numElemente, 0.0);
    int idxZielKnoten = 0;
-   std::vector<double> punkte(dimensionen*ecken, 0.0);
-   //double punkte[dimensionen*ecken] = {0.0};
-   int zielElement = -1;
-   double minverhaeltnis = 2.0;
-   double volverhaeltnis = 2.0;
    for (int idx_element = 0; idx_element < numElemente; idx_element++) {
       // Jedes Element besteht aus ecken (bspw. 8) Punkten mit dimensionen (bspw. 3) Koordinaten
+      double* punkte = &tabelle.punkte[dimensionen*ecken*idx_element];
       for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
          idxZielKnoten = elementeEcken[idx_element*ecken+idx_ecken];
          for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
             punkte[dimensionen*idx_ecken+idx_dim] = knotenKoordinaten[dimensionen*idxZielKnoten+idx_dim];
          }
       }
+      // Begrenzungsquader
+      double* minKoord = &tabelle.minKoord[dimensionen*idx_element];
+      double* maxKoord = &tabelle.maxKoord[dimensionen*idx_element];
+      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+         minKoord[idx_dim] = punkte[idx_dim];
+         maxKoord[idx_dim] = punkte[idx_dim];
+         for (int idx_ecken = 1; idx_ecken < ecken; idx_ecken++) {
+            minKoord[idx_dim] = std::min(minKoord[idx_dim], punkte[dimensionen*idx_ecken+idx_dim]);
+            maxKoord[idx_dim] = std::max(maxKoord[idx_dim], punkte[dimensionen*idx_ecken+idx_dim]);
+         }
+      }
+      tabelle.volumen[idx_element] = ElementVolumen(punkte, dimensionen, ecken);
+      if (numHilfspunkte == 0) {
+         continue;
+      }
+      // Der erste Hilfspunkt ist der Mittelpunkt, danach folgen (bei Hexaedern) die Seitenmitten
+      double* hilfspunkte = &tabelle.hilfspunkte[dimensionen*numHilfspunkte*idx_element];
+      for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
+         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+            hilfspunkte[idx_dim] += punkte[dimensionen*idx_ecken+idx_dim]/ecken;
+         }
+      }
+      for (int idx_seiten = 0; idx_seiten < numHilfspunkte-1; idx_seiten++) {
+         for (int idx_knoten = 0; idx_knoten < 4; idx_knoten++) {
+            idxZielKnoten = hexaeder_seitenmitten[4*idx_seiten+idx_knoten];
+            for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+               hilfspunkte[dimensionen*(idx_seiten+1)+idx_dim] += punkte[dimensionen*idxZielKnoten+idx_dim]/4.0;
+            }
+         }
+      }
+   }
+}
+
+
+int PunktInElement(const Elementtabelle &tabelle, const double* referenzpunkt) {
+   // Gebe den Index des Elements zurueck, das referenzpunkt enthaelt.
+   //
+   // Hinweis: Hier werden alle Elemente untersucht. Fuer viele Abfragen sollte stattdessen
+   // PunktInElementRaster mit einem einmal erstellten Suchraster verwendet werden.
+   int zielElement = -1;
+   double minverhaeltnis = 2.0;
+   double volverhaeltnis = 2.0;
+   for (int idx_element = 0; idx_element < tabelle.numElemente; idx_element++) {
       // Ueberpruefe, ob sich der Referenzpunkt (wahrscheinlich) im Element befindet
       // (notwendige Bedingung - schnelle Berechnung)
-      if (!PunktMoeglicherweiseInElement(punkte, referenzpunkt, dimensionen, ecken)) {
+      if (!PunktMoeglicherweiseInElement(tabelle, idx_element, referenzpunkt)) {
          continue;
       }
       // Nur wenn die notwendige Bedingung erfuellt ist, kann genauer untersucht
       // werden, ob der Punkt tatsaechlich innerhalb des Elements ist
-      volverhaeltnis = PunktInnerhalbElement(punkte, referenzpunkt, dimensionen, ecken);
+      volverhaeltnis = PunktInnerhalbElement(tabelle, idx_element, referenzpunkt);
+      if (volverhaeltnis < minverhaeltnis) {
+         zielElement = idx_element;
+         minverhaeltnis = volverhaeltnis;
+      }
+   }
+   return zielElement;
+}
+
+
+struct Suchraster {
+   // Gleichmaessiges Raster ueber die Begrenzungsquader (bounding boxes) aller Elemente. Fuer jede
+   // Rasterzelle werden die Indizes aller Elemente gespeichert, deren Begrenzungsquader die Zelle
+   // schneidet. Die Indizes einer Zelle stehen in zellElemente zwischen zellStart[idx_zelle] und
+   // zellStart[idx_zelle+1] und sind aufsteigend sortiert.
+   int dimensionen;
+   double minKoord[3];
+   double maxKoord[3];
+   double zellgroesse[3];
+   int numZellen[3];
+   std::vector<int> zellStart;
+   std::vector<int> zellElemente;
+};
+
+
+int RasterIndex(const Suchraster &raster, const int idx_dim, const double koordinate) {
+   // Gibt den Zellindex in Richtung idx_dim fuer die uebergebene koordinate zurueck. Werte ausserhalb
+   // des Rasters werden auf die erste bzw. letzte Zelle begrenzt.
+   int idx = static_cast<int>(std::floor((koordinate - raster.minKoord[idx_dim])/raster.zellgroesse[idx_dim]));
+   if (idx < 0) {
+      idx = 0;
+   }
+   if (idx >= raster.numZellen[idx_dim]) {
+      idx = raster.numZellen[idx_dim] - 1;
+   }
+   return idx;
+}
+
+
+void SuchrasterErstellen(const Elementtabelle &tabelle, Suchraster &raster) {
+   // Erstelle einmalig ein Suchraster fuer alle Elemente der tabelle. Die Zellgroesse wird so
+   // gewaehlt, dass im Mittel etwa ein Element pro Zelle vorhanden ist.
+   const int dimensionen = tabelle.dimensionen;
+   const int numElemente = tabelle.numElemente;
+   raster.dimensionen = dimensionen;
+   for (int idx_dim = 0; idx_dim < 3; idx_dim++) {
+      raster.minKoord[idx_dim] = 0.0;
+      raster.maxKoord[idx_dim] = 0.0;
+      raster.zellgroesse[idx_dim] = 1.0;
+      raster.numZellen[idx_dim] = 1;
+   }
+   // Begrenzungsquader des gesamten Netzes aus denen aller Elemente bestimmen
+   for (int idx_element = 0; idx_element < numElemente; idx_element++) {
+      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+         if ((idx_element == 0) || (tabelle.minKoord[dimensionen*idx_element+idx_dim] < raster.minKoord[idx_dim])) {
+            raster.minKoord[idx_dim] = tabelle.minKoord[dimensionen*idx_element+idx_dim];
+         }
+         if ((idx_element == 0) || (tabelle.maxKoord[dimensionen*idx_element+idx_dim] > raster.maxKoord[idx_dim])) {
+            raster.maxKoord[idx_dim] = tabelle.maxKoord[dimensionen*idx_element+idx_dim];
+         }
+      }
+   }
+   // Zellgroesse aus dem mittleren Elementvolumen (bzw. der mittleren Elementflaeche) bestimmen
+   double gesamtvolumen = 1.0;
+   int numAusgedehnt = 0;
+   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+      if (raster.maxKoord[idx_dim] - raster.minKoord[idx_dim] > 0.0) {
+         gesamtvolumen *= raster.maxKoord[idx_dim] - raster.minKoord[idx_dim];
+         numAusgedehnt += 1;
+      }
+   }
+   double kantenlaenge = 1.0;
+   if ((numAusgedehnt > 0) && (numElemente > 0)) {
+      kantenlaenge = std::pow(gesamtvolumen/numElemente, 1.0/numAusgedehnt);
+   }
+   // Sehr grosse Raster vermeiden (bspw. bei sehr ungleichmaessig verteilten Elementen)
+   const double maxZellenProRichtung = 1000.0;
+   int numZellenGesamt = 1;
+   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+      double ausdehnung = raster.maxKoord[idx_dim] - raster.minKoord[idx_dim];
+      if ((ausdehnung > 0.0) && (kantenlaenge > 0.0)) {
+         double anzahl = std::ceil(ausdehnung/kantenlaenge);
+         if (anzahl > maxZellenProRichtung) {
+            anzahl = maxZellenProRichtung;
+         }
+         if (anzahl < 1.0) {
+            anzahl = 1.0;
+         }
+         raster.numZellen[idx_dim] = static_cast<int>(anzahl);
+         raster.zellgroesse[idx_dim] = ausdehnung/raster.numZellen[idx_dim];
+      }
+      numZellenGesamt *= raster.numZellen[idx_dim];
+   }
+   // Elemente in alle Zellen eintragen, die ihr Begrenzungsquader schneidet. Zuerst zaehlen, dann
+   // (in aufsteigender Reihenfolge der Elemente) zuweisen.
+   std::vector<int> idxVon(3, 0);
+   std::vector<int> idxBis(3, 0);
+   raster.zellStart.assign(numZellenGesamt+1, 0);
+   for (int durchgang = 0; durchgang < 2; durchgang++) {
+      std::vector<int> belegung;
+      if (durchgang == 1) {
+         for (int idx_zelle = 0; idx_zelle < numZellenGesamt; idx_zelle++) {
+            raster.zellStart[idx_zelle+1] += raster.zellStart[idx_zelle];
+         }
+         raster.zellElemente.assign(raster.zellStart[numZellenGesamt], 0);
+         belegung.assign(raster.zellStart.begin(), raster.zellStart.end()-1);
+      }
+      for (int idx_element = 0; idx_element < numElemente; idx_element++) {
+         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+            idxVon[idx_dim] = RasterIndex(raster, idx_dim, tabelle.minKoord[dimensionen*idx_element+idx_dim]);
+            idxBis[idx_dim] = RasterIndex(raster, idx_dim, tabelle.maxKoord[dimensionen*idx_element+idx_dim]);
+         }
+         for (int idx_z = idxVon[2]; idx_z <= idxBis[2]; idx_z++) {
+            for (int idx_y = idxVon[1]; idx_y <= idxBis[1]; idx_y++) {
+               for (int idx_x = idxVon[0]; idx_x <= idxBis[0]; idx_x++) {
+                  int idx_zelle = (idx_z*raster.numZellen[1] + idx_y)*raster.numZellen[0] + idx_x;
+                  if (durchgang == 0) {
+                     raster.zellStart[idx_zelle+1] += 1;
+                  }
+                  else {
+                     raster.zellElemente[belegung[idx_zelle]] = idx_element;
+                     belegung[idx_zelle] += 1;
+                  }
+               }
+            }
+         }
+      }
+   }
+}
+
+
+int PunktInElementRaster(const Suchraster &raster, const Elementtabelle &tabelle,
+   const double* referenzpunkt) {
+   // Gebe den Index des Elements zurueck, das referenzpunkt enthaelt (wie PunktInElement). Statt
+   // alle Elemente zu untersuchen, werden nur die Elemente aus der Rasterzelle von referenzpunkt
+   // betrachtet. Da die Elemente jeder Zelle aufsteigend sortiert sind, ist das Ergebnis identisch
+   // zu PunktInElement.
+   const int dimensionen = tabelle.dimensionen;
+   int zielElement = -1;
+   // Ausserhalb des gesamten Begrenzungsquaders kann kein Element gefunden werden
+   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+      if ((referenzpunkt[idx_dim] < raster.minKoord[idx_dim]) ||
+         (referenzpunkt[idx_dim] > raster.maxKoord[idx_dim])) {
+         return zielElement;
+      }
+   }
+   int idx_zelle = 0;
+   for (int idx_dim = dimensionen-1; idx_dim >= 0; idx_dim--) {
+      idx_zelle = idx_zelle*raster.numZellen[idx_dim] + RasterIndex(raster, idx_dim, referenzpunkt[idx_dim]);
+   }
+   double minverhaeltnis = 2.0;
+   double volverhaeltnis = 2.0;
+   for (int idx_kandidat = raster.zellStart[idx_zelle]; idx_kandidat < raster.zellStart[idx_zelle+1]; idx_kandidat++) {
+      int idx_element = raster.zellElemente[idx_kandidat];
+      if (!PunktMoeglicherweiseInElement(tabelle, idx_element, referenzpunkt)) {
+         continue;
+      }
+      volverhaeltnis = PunktInnerhalbElement(tabelle, idx_element, referenzpunkt);
       if (volverhaeltnis < minverhaeltnis) {
          zielElement = idx_element;
          minverhaeltnis = volverhaeltnis;
@@ -368,22 +553,253 @@ int PunktInElement(const double* knotenKoordinaten, int numElemente, const int*
 }
 
 
-void KnotengewichtungPunktInDreieck(std::vector<double> dreieckpunkte, std::vector<double> referenzpunkt,
-   std::vector<double> gewichtung) {
-   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in dreieckpunkte
+struct Nachbarschaft {
+   // Nachbarelemente ueber gemeinsame Aussenflaechen (3D) bzw. Kanten (2D). Fuer jedes Element
+   // stehen in nachbarn numFlaechen Eintraege, wobei der Eintrag idx_flaeche den Index des Elements
+   // enthaelt, das sich die Flaeche idx_flaeche teilt (oder -1 am Rand des Netzes). Die Eckpunkte
+   // der Flaechen sind in flaechenEcken (jeweils eckenProFlaeche Eintraege) gespeichert. Ist nachbarn
+   // leer, wird keine Nachbarschaftssuche verwendet.
+   int numFlaechen;
+   int eckenProFlaeche;
+   const int* flaechenEcken;
+   std::vector<int> nachbarn;
+};
+
+
+struct FlaechenEintrag {
+   // Hilfsstruktur zum Sortieren der Flaechen aller Elemente nach ihren (sortierten) Knoten
+   int knoten[4];
+   int element;
+   int flaeche;
+};
+
+
+bool FlaechenEintragKleiner(const FlaechenEintrag &a, const FlaechenEintrag &b) {
+   for (int idx_knoten = 0; idx_knoten < 4; idx_knoten++) {
+      if (a.knoten[idx_knoten] != b.knoten[idx_knoten]) {
+         return a.knoten[idx_knoten] < b.knoten[idx_knoten];
+      }
+   }
+   return false;
+}
+
+
+bool FlaechenEintragGleich(const FlaechenEintrag &a, const FlaechenEintrag &b) {
+   for (int idx_knoten = 0; idx_knoten < 4; idx_knoten++) {
+      if (a.knoten[idx_knoten] != b.knoten[idx_knoten]) {
+         return false;
+      }
+   }
+   return true;
+}
+
+
+void NachbarschaftErstellen(int numElemente, const int* elementeEcken, const int dimensionen,
+   const int ecken, Nachbarschaft &nachbarschaft) {
+   // Bestimme einmalig fuer alle Elemente die Nachbarelemente ueber die gemeinsamen Flaechen. Dazu
+   // werden die Flaechen aller Elemente nach ihren Knoten sortiert, so dass gemeinsame Flaechen
+   // zweier Elemente direkt aufeinander folgen. Die Reihenfolge der Flaechen entspricht der
+   // Knotenreihenfolge aus PunktInnerhalbElement.
+   static const int dreieck_flaechen[6] = {0, 1,   1, 2,   2, 0};
+   static const int viereck_flaechen[8] = {0, 1,   1, 2,   2, 3,   3, 0};
+   static const int tetraeder_flaechen[12] = {0, 1, 2,   0, 1, 3,   1, 2, 3,   0, 2, 3};
+   static const int hexaeder_flaechen[24] = {0, 1, 2, 3,   4, 5, 6, 7,   0, 1, 5, 4,
+                                             1, 2, 6, 5,   2, 3, 7, 6,   3, 0, 4, 7};
+   if (dimensionen == 2) {
+      nachbarschaft.eckenProFlaeche = 2;
+      nachbarschaft.numFlaechen = ecken;
+      if (ecken == 3) {
+         nachbarschaft.flaechenEcken = dreieck_flaechen;
+      }
+      else {
+         nachbarschaft.flaechenEcken = viereck_flaechen;
+      }
+   }
+   else {
+      if (ecken == 4) {
+         nachbarschaft.eckenProFlaeche = 3;
+         nachbarschaft.numFlaechen = 4;
+         nachbarschaft.flaechenEcken = tetraeder_flaechen;
+      }
+      else {
+         nachbarschaft.eckenProFlaeche = 4;
+         nachbarschaft.numFlaechen = 6;
+         nachbarschaft.flaechenEcken = hexaeder_flaechen;
+      }
+   }
+   const int numFlaechen = nachbarschaft.numFlaechen;
+   const int eckenProFlaeche = nachbarschaft.eckenProFlaeche;
+   std::vector<FlaechenEintrag> flaechen(numElemente*numFlaechen);
+   for (int idx_element = 0; idx_element < numElemente; idx_element++) {
+      for (int idx_flaeche = 0; idx_flaeche < numFlaechen; idx_flaeche++) {
+         FlaechenEintrag &eintrag = flaechen[idx_element*numFlaechen+idx_flaeche];
+         for (int idx_knoten = 0; idx_knoten < 4; idx_knoten++) {
+            eintrag.knoten[idx_knoten] = -1;
+            if (idx_knoten < eckenProFlaeche) {
+               eintrag.knoten[idx_knoten] = elementeEcken[idx_element*ecken
+                  + nachbarschaft.flaechenEcken[idx_flaeche*eckenProFlaeche+idx_knoten]];
+            }
+         }
+         std::sort(eintrag.knoten, eintrag.knoten+eckenProFlaeche);
+         eintrag.element = idx_element;
+         eintrag.flaeche = idx_flaeche;
+      }
+   }
+   std::sort(flaechen.begin(), flaechen.end(), FlaechenEintragKleiner);
+   nachbarschaft.nachbarn.assign(numElemente*numFlaechen, -1);
+   for (std::size_t idx_eintrag = 1; idx_eintrag < flaechen.size(); idx_eintrag++) {
+      const FlaechenEintrag &vorgaenger = flaechen[idx_eintrag-1];
+      const FlaechenEintrag &eintrag = flaechen[idx_eintrag];
+      if (FlaechenEintragGleich(vorgaenger, eintrag)) {
+         nachbarschaft.nachbarn[vorgaenger.element*numFlaechen+vorgaenger.flaeche] = eintrag.element;
+         nachbarschaft.nachbarn[eintrag.element*numFlaechen+eintrag.flaeche] = vorgaenger.element;
+      }
+   }
+}
+
+
+int PunktInElementNachbarn(const Suchraster &raster, const Nachbarschaft &nachbarschaft,
+   const Elementtabelle &tabelle, const double* referenzpunkt, const int startElement) {
+   // Gebe den Index des Elements zurueck, das referenzpunkt enthaelt. Ausgehend von startElement
+   // wird jeweils ueber die Flaeche zum Nachbarelement gewechselt, hinter der referenzpunkt am
+   // weitesten entfernt liegt, bis referenzpunkt im aktuellen Element liegt. Wenn dabei der Rand
+   // des Netzes erreicht wird oder zu viele Schritte noetig sind (bspw. bei stark verzerrten
+   // Elementen), wird PunktInElementRaster verwendet.
+   //
+   // Ohne Nachbarschaft oder gueltiges startElement direkt das Suchraster verwenden
+   if (nachbarschaft.nachbarn.empty() || (startElement < 0)) {
+      return PunktInElementRaster(raster, tabelle, referenzpunkt);
+   }
+   const int dimensionen = tabelle.dimensionen;
+   const int ecken = tabelle.ecken;
+   // Ausserhalb des gesamten Begrenzungsquaders kann kein Element gefunden werden
+   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+      if ((referenzpunkt[idx_dim] < raster.minKoord[idx_dim]) ||
+         (referenzpunkt[idx_dim] > raster.maxKoord[idx_dim])) {
+         return -1;
+      }
+   }
+   // Ein gerader Weg durch das Netz sollte nicht mehr Schritte benoetigen als es Rasterzellen
+   // entlang aller Richtungen gibt
+   int maxSchritte = 10;
+   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+      maxSchritte += 2*raster.numZellen[idx_dim];
+   }
+   const int numFlaechen = nachbarschaft.numFlaechen;
+   const int eckenProFlaeche = nachbarschaft.eckenProFlaeche;
+   double mittelpunkt[3];
+   double flaechenmitte[3];
+   double normale[3];
+   int aktuellesElement = startElement;
+   for (int idx_schritt = 0; idx_schritt < maxSchritte; idx_schritt++) {
+      const double* punkte = &tabelle.punkte[dimensionen*ecken*aktuellesElement];
+      // In 3D entscheidet (wie bei PunktInElementRaster) das Volumenverhaeltnis, ob referenzpunkt
+      // im aktuellen Element liegt. Die Flaechen dienen dann nur zur Bestimmung der Richtung.
+      if ((dimensionen == 3) && PunktMoeglicherweiseInElement(tabelle, aktuellesElement, referenzpunkt)) {
+         if (PunktInnerhalbElement(tabelle, aktuellesElement, referenzpunkt) <= 1.0 + 1.0e-10) {
+            return aktuellesElement;
+         }
+      }
+      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+         mittelpunkt[idx_dim] = 0.0;
+         for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
+            mittelpunkt[idx_dim] += punkte[dimensionen*idx_ecken+idx_dim]/ecken;
+         }
+      }
+      int naechsteFlaeche = -1;
+      double maxAbstand = 0.0;
+      double laenge = 0.0;
+      for (int idx_flaeche = 0; idx_flaeche < numFlaechen; idx_flaeche++) {
+         const int* flaeche = nachbarschaft.flaechenEcken + idx_flaeche*eckenProFlaeche;
+         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+            flaechenmitte[idx_dim] = 0.0;
+            for (int idx_knoten = 0; idx_knoten < eckenProFlaeche; idx_knoten++) {
+               flaechenmitte[idx_dim] += punkte[dimensionen*flaeche[idx_knoten]+idx_dim]/eckenProFlaeche;
+            }
+         }
+         // Normale der Flaeche bzw. Kante (nicht normiert)
+         const double* p0 = punkte+dimensionen*flaeche[0];
+         const double* p1 = punkte+dimensionen*flaeche[1];
+         if (dimensionen == 2) {
+            normale[0] = p1[1] - p0[1];
+            normale[1] = p0[0] - p1[0];
+         }
+         else {
+            const double* p2 = punkte+dimensionen*flaeche[2];
+            double a[3];
+            double b[3];
+            for (int idx_dim = 0; idx_dim < 3; idx_dim++) {
+               if (eckenProFlaeche == 3) {
+                  a[idx_dim] = p1[idx_dim] - p0[idx_dim];
+                  b[idx_dim] = p2[idx_dim] - p0[idx_dim];
+               }
+               else {
+                  // Fuer Vierecksflaechen das Kreuzprodukt der Diagonalen verwenden
+                  a[idx_dim] = p2[idx_dim] - p0[idx_dim];
+                  b[idx_dim] = punkte[dimensionen*flaeche[3]+idx_dim] - p1[idx_dim];
+               }
+            }
+            normale[0] = a[1]*b[2] - a[2]*b[1];
+            normale[1] = a[2]*b[0] - a[0]*b[2];
+            normale[2] = a[0]*b[1] - a[1]*b[0];
+         }
+         // Normale nach aussen (vom Elementmittelpunkt weg) ausrichten und normieren
+         double richtung = 0.0;
+         double betrag = 0.0;
+         double abstand = 0.0;
+         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+            richtung += normale[idx_dim]*(flaechenmitte[idx_dim] - mittelpunkt[idx_dim]);
+            betrag += normale[idx_dim]*normale[idx_dim];
+         }
+         betrag = std::sqrt(betrag);
+         if (betrag == 0.0) {
+            continue;
+         }
+         if (richtung < 0.0) {
+            betrag = -betrag;
+         }
+         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+            abstand += normale[idx_dim]*(referenzpunkt[idx_dim] - flaechenmitte[idx_dim])/betrag;
+         }
+         laenge = std::max(laenge, std::fabs(richtung/betrag));
+         if (abstand > maxAbstand) {
+            maxAbstand = abstand;
+            naechsteFlaeche = idx_flaeche;
+         }
+      }
+      // Kleine Abstaende (Rundungsfehler bei Punkten auf einer Flaeche) werden toleriert
+      if ((naechsteFlaeche == -1) || (maxAbstand <= 1.0e-10*laenge)) {
+         if (dimensionen == 2) {
+            return aktuellesElement;
+         }
+         // Bei gekruemmten Aussenflaechen (3D) kann die Richtung ungenau sein
+         break;
+      }
+      aktuellesElement = nachbarschaft.nachbarn[aktuellesElement*numFlaechen+naechsteFlaeche];
+      if (aktuellesElement == -1) {
+         break;
+      }
+   }
+   return PunktInElementRaster(raster, tabelle, referenzpunkt);
+}
+
+
+void KnotengewichtungPunktInDreieck(const double* p0, const double* p1, const double* p2,
+   const double* referenzpunkt, double* gewichtung) {
+   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des durch p0, p1 und p2
    // definierten Dreiecks hat. Dabei wird ein linearer Ansatz verwendet. Falls einer der
-   // Rueckgabewerte kleiner als Null ist, liegt der Referenzpunkt nicht im durch punkte definierten
-   // Dreieck. Der Array dreieckpunkte hat 2*3 Eintraege  [P0x, P0y, P1x, P1y, P2x, P2y]
+   // Rueckgabewerte kleiner als Null ist, liegt der Referenzpunkt nicht im durch die Punkte
+   // definierten Dreieck. Jeder Punkt hat zwei Koordinaten.
    // Gewichtung muss drei Eintraege bereitstellen, die in dieser Funktion beschrieben werden.
    //
    // Aktuelle Implementierung basierend auf der 2D-Punktgleichung
    // (referenzpunkt-p0) = (p1-p0)*s + (p2-p0)*t
-   double Rx = referenzpunkt[0] - dreieckpunkte[0];
-   double Ry = referenzpunkt[1] - dreieckpunkte[1];
-   double X1 = dreieckpunkte[2] - dreieckpunkte[0];
-   double Y1 = dreieckpunkte[3] - dreieckpunkte[1];
-   double X2 = dreieckpunkte[4] - dreieckpunkte[0];
-   double Y2 = dreieckpunkte[5] - dreieckpunkte[1];
+   double Rx = referenzpunkt[0] - p0[0];
+   double Ry = referenzpunkt[1] - p0[1];
+   double X1 = p1[0] - p0[0];
+   double Y1 = p1[1] - p0[1];
+   double X2 = p2[0] - p0[0];
+   double Y2 = p2[1] - p0[1];
    double det_gesamt = X1*Y2 - X2*Y1;
    // Berechnung kann nur sinnvoll fortgesetzt werden, wenn sich die Determinante von Null unterscheidet
    if (fabs(det_gesamt) > 0.0000001) {
@@ -405,105 +821,28 @@ void KnotengewichtungPunktInDreieck(std::vector<double> dreieckpunkte, std::vect
 }
 
 
-void KnotengewichtungPunktInViereck(std::vector<double> zielPunktListe, std::vector<double> referenzpunkt,
-   std::vector<double> gewichtung) {
-   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in zielPunktListe
-   // definierten Elements hat. Der Array enthaelt 2*4 Werte
-   // [P0x, P0y,  P1x, P1y,  P2x, P2y,  P3x, P3y]
-   // Gewichtung muss vier Eintraege bereitstellen, die in dieser Funktion beschrieben werden.
-   // KnotengewichtungPunktInElement
-   const int dimensionen = 2;
-   const int ecken = 4;
-   //
-   for (int idx_gewichtung = 0; idx_gewichtung < ecken; idx_gewichtung++) {
-      gewichtung[idx_gewichtung] = 0.0;
-   }
-   std::vector<double> dreieck_gewichte(ecken, 0.0);
-   std::vector<double> mittelpunkt(dimensionen, 0.0);
-   std::vector<double> dreieckpunkte(3*dimensionen, 0.0);
-   //
-   double temp_summe = 0.0;
-   int idxZielKnoten = 0;
-   // Mittelpunkt
-   for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
-      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-         mittelpunkt[idx_dim] += zielPunktListe[dimensionen*idx_ecken+idx_dim]/ecken;
-      }
-   }
-   // Einmaliges Zuweisen der Mittelpunktkoordinaten reicht, da die Punkte im folgenden nicht mehr
-   // ueberschrieben werden
-   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-      dreieckpunkte[dimensionen*2+idx_dim] = mittelpunkt[idx_dim];
-   }
-   // Mit der Definition der Punkte wie in PunktInnerhalbElement beschrieben (0-3) und dem Mittelpunkt
-   // als (4) ergeben sich 4 Dreiecke mit Punkten der folgenden Indizes
-   int ref_kombinationen = 4;
-   //int dreieck_komb[3*ref_kombinationen] = {0, 1, 4,    1, 2, 4,    2, 3, 4,    3, 0, 4};
-   static const int dreieck_komb[] = {0, 1, 4,    1, 2, 4,    2, 3, 4,    3, 0, 4};
-   //
-   bool gueltigeGewichtung = true;
-   for (int idx_dreieck = 0; idx_dreieck < ref_kombinationen; idx_dreieck++) {
-      // Fuer jedes der moeglichen Dreiecke werden die Eckpunkte bestimmt (2*3 Werte)
-      gueltigeGewichtung = true;
-      for (int idx_eckpunkt = 0; idx_eckpunkt < 2; idx_eckpunkt++) {
-         idxZielKnoten = dreieck_komb[3*idx_dreieck+idx_eckpunkt];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            dreieckpunkte[dimensionen*idx_eckpunkt+idx_dim] = zielPunktListe[dimensionen*idxZielKnoten+idx_dim];
-         }
-      }
-      //
-      KnotengewichtungPunktInDreieck(dreieckpunkte, referenzpunkt, dreieck_gewichte);
-      // Nur wenn der Referenzpunkt sich auf oder im Dreieck befindet, sind alle Gewichtungen
-      // zwischen 0 und 1 und somit gueltig.
-      for (int idx_gewichtung = 0; idx_gewichtung < ecken; idx_gewichtung++) {
-         if (dreieck_gewichte[idx_gewichtung] < 0.0) {
-            gueltigeGewichtung = false;
-            break;
-         }
-      }
-      if (!gueltigeGewichtung) {
-        continue;
-      }
-      // Die ersten beiden Gewichtungen stammen von zwei Eckpunkten des Vierecks und
-      // gehen dementsprechend 1:1 in die finale Gewichtung ein
-      gewichtung[dreieck_komb[3*idx_dreieck]] = dreieck_gewichte[0];
-      gewichtung[dreieck_komb[3*idx_dreieck+1]] = dreieck_gewichte[1];
-      // Die Gewichtung des Mittelpunktes geht ueberall gleichmaessig ein
-      for (int idx_gewichtung_mp = 0; idx_gewichtung_mp < ecken; idx_gewichtung_mp++) {
-         gewichtung[idx_gewichtung_mp] += dreieck_gewichte[2]/ecken;
-      }
-      // Sobald eine Zuweisung stattgefunden hat, sind wir fertig. Entweder, der Punkt lag
-      // echt innerhalb des Tetraeders, dann kaemen keine weiteren Anteile hinzu. Oder der Punkt
-      // lag auf einer Aussenseite, Kante oder Eckpunkt des Tetraeders. In dem Fall wuerde er auch so
-      // bei anderen Tetraedern gefunden werden, aber das Ergebnis bliebe das selbe.
-      break;
-   }
-}
-
-
-void KnotengewichtungPunktInTetraeder(std::vector<double> tetraederpunkte, std::vector<double> referenzpunkt,
-   std::vector<double> gewichtung) {
-   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in tetraederpunkte
+void KnotengewichtungPunktInTetraeder(const double* p0, const double* p1, const double* p2,
+   const double* p3, const double* referenzpunkt, double* gewichtung) {
+   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des durch p0 bis p3
    // definierten Tetraeders hat. Dabei wird ein linearer Ansatz verwendet. Falls einer der
-   // Rueckgabewerte kleiner als Null ist, liegt der Referenzpunkt nicht im durch punkte definierten
-   // Tetraeder. Der Array tetraederpunkte hat 4*3 Eintraege
-   // [P0x, P0y, P0z, P1x, P1y, P1z, P2x, P2y, P2z, P3x, P3y, P3z]
+   // Rueckgabewerte kleiner als Null ist, liegt der Referenzpunkt nicht im durch die Punkte
+   // definierten Tetraeder. Jeder Punkt hat drei Koordinaten.
    // Gewichtung muss vier Eintraege bereitstellen, die in dieser Funktion beschrieben werden.
    //
    // Aktuelle Implementierung basierend auf der 3D-Punktgleichung
    // (referenzpunkt-p0) = (p1-p0)*r + (p2-p1)*s + (p3-p1)*t
-   double Rx = referenzpunkt[0] - tetraederpunkte[0];
-   double Ry = referenzpunkt[1] - tetraederpunkte[1];
-   double Rz = referenzpunkt[2] - tetraederpunkte[2];
-   double X1 = tetraederpunkte[3] - tetraederpunkte[0];
-   double Y1 = tetraederpunkte[4] - tetraederpunkte[1];
-   double Z1 = tetraederpunkte[5] - tetraederpunkte[2];
-   double X2 = tetraederpunkte[6] - tetraederpunkte[3];
-   double Y2 = tetraederpunkte[7] - tetraederpunkte[4];
-   double Z2 = tetraederpunkte[8] - tetraederpunkte[5];
-   double X3 = tetraederpunkte[9] - tetraederpunkte[3];
-   double Y3 = tetraederpunkte[10] - tetraederpunkte[4];
-   double Z3 = tetraederpunkte[11] - tetraederpunkte[5];
+   double Rx = referenzpunkt[0] - p0[0];
+   double Ry = referenzpunkt[1] - p0[1];
+   double Rz = referenzpunkt[2] - p0[2];
+   double X1 = p1[0] - p0[0];
+   double Y1 = p1[1] - p0[1];
+   double Z1 = p1[2] - p0[2];
+   double X2 = p2[0] - p1[0];
+   double Y2 = p2[1] - p1[1];
+   double Z2 = p2[2] - p1[2];
+   double X3 = p3[0] - p1[0];
+   double Y3 = p3[1] - p1[1];
+   double Z3 = p3[2] - p1[2];
    double det_gesamt = X1*(Y2*Z3-Y3*Z2) - X2*(Y1*Z3-Y3*Z1) + X3*(Y1*Z2-Y2*Z1);
    // Berechnung kann nur sinnvoll fortgesetzt werden, wenn sich die Determinante von Null unterscheidet
    if (fabs(det_gesamt) > 0.0000001) {
@@ -529,55 +868,93 @@ void KnotengewichtungPunktInTetraeder(std::vector<double> tetraederpunkte, std::
 }
 
 
-void KnotegewichtungPunktInHexaeder(std::vector<double> zielPunktListe, std::vector<double> referenzpunkt,
-   std::vector<double> gewichtung) {
-   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in zielPunktListe
-   // definierten Elements hat. Der Array enthaelt 3*8 Werte
-   //  [P0x, P0y, P0z, P1x, P1y, P1z, ..., P7x, P7y, P7z]
-   // Gewichtung muss acht Eintraege bereitstellen, die in dieser Funktion beschrieben werden.
+double MinimaleGewichtung(const double* gewichtung, const int anzahl) {
+   // Gibt den kleinsten der anzahl Eintraege aus gewichtung zurueck
+   double minimum = gewichtung[0];
+   for (int idx_gewichtung = 1; idx_gewichtung < anzahl; idx_gewichtung++) {
+      minimum = std::min(minimum, gewichtung[idx_gewichtung]);
+   }
+   return minimum;
+}
+
+
+void KnotengewichtungPunktInViereck(const double* punkte, const double* mittelpunkt,
+   const double* referenzpunkt, double* gewichtung) {
+   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in punkte definierten
+   // Elements hat. Der Array enthaelt 2*4 Werte
+   // [P0x, P0y,  P1x, P1y,  P2x, P2y,  P3x, P3y]
+   // und mittelpunkt die zwei (vorab bestimmten) Koordinaten des Elementmittelpunkts.
+   // Gewichtung muss vier Eintraege bereitstellen, die in dieser Funktion beschrieben werden.
    // KnotengewichtungPunktInElement
-   const int dimensionen = 3;
-   const int ecken = 8;
+   const int dimensionen = 2;
+   const int ecken = 4;
+   double dreieck_gewichte[3];
    //
-   for (int idx_gewichtung = 0; idx_gewichtung < ecken; idx_gewichtung++) {
-      gewichtung[idx_gewichtung] = 0.0;
-   }
-   std::vector<double> tetraeder_gewichte(ecken, 0.0);
-   // Mit der Definition der Punkte wie in PunktInnerhalbElement beschrieben, ergeben sich die
-   // sechs Seitenmitten aus den Punkten mit den folgenden Indizes
-   int idxliste_seitenmitten[24] = {0, 1, 2, 3,   0, 1, 4, 5,   0, 3, 4, 7,
-                                    1, 2, 5, 6,   2, 3, 6, 7,   4, 5, 6, 7};
-   std::vector<double> mittelpunkt(dimensionen, 0.0);
-   std::vector<double> seitenmitten(6*dimensionen, 0.0);
-   std::vector<double> tetraederpunkte(4*dimensionen, 0.0);
+   // Mit der Definition der Punkte wie in PunktInnerhalbElement beschrieben (0-3) und dem Mittelpunkt
+   // als (4) ergeben sich 4 Dreiecke mit Punkten der folgenden Indizes
+   const int ref_kombinationen = 4;
+   static const int dreieck_komb[] = {0, 1, 4,    1, 2, 4,    2, 3, 4,    3, 0, 4};
    //
-   double temp_summe = 0.0;
-   int idxZielKnoten = 0;
-   // Mittelpunkt
-   for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
-      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-         mittelpunkt[idx_dim] += zielPunktListe[dimensionen*idx_ecken+idx_dim]/ecken;
+   // Nur wenn der Referenzpunkt sich auf oder im Dreieck befindet, sind alle Gewichtungen
+   // zwischen 0 und 1 und somit gueltig. Falls das fuer keines der Dreiecke gilt (bspw. durch
+   // Rundungsfehler bei Punkten auf dem Rand), wird das Dreieck mit der groessten kleinsten
+   // Gewichtung verwendet.
+   int bestesDreieck = 0;
+   double besteGewichtung = -1.0e300;
+   for (int idx_dreieck = 0; idx_dreieck < ref_kombinationen; idx_dreieck++) {
+      // Fuer jedes der moeglichen Dreiecke werden die Eckpunkte bestimmt
+      KnotengewichtungPunktInDreieck(punkte+dimensionen*dreieck_komb[3*idx_dreieck],
+         punkte+dimensionen*dreieck_komb[3*idx_dreieck+1], mittelpunkt, referenzpunkt,
+         dreieck_gewichte);
+      double minGewichtung = MinimaleGewichtung(dreieck_gewichte, 3);
+      if (minGewichtung > besteGewichtung) {
+         besteGewichtung = minGewichtung;
+         bestesDreieck = idx_dreieck;
       }
-   }
-   // Seitenmitten
-   for (int idx_seiten = 0; idx_seiten < 6; idx_seiten++) {
-      for (int idx_tetra = 0; idx_tetra < 4; idx_tetra++) {
-         idxZielKnoten = idxliste_seitenmitten[4*idx_seiten+idx_tetra];
-         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            seitenmitten[dimensionen*idx_seiten+idx_dim] += zielPunktListe[dimensionen*idxZielKnoten+idx_dim]/4.0;
-         }
+      // Sobald ein gueltiges Dreieck gefunden worden ist, sind wir fertig. Entweder, der Punkt lag
+      // echt innerhalb des Dreiecks, dann kaemen keine weiteren Anteile hinzu. Oder der Punkt lag
+      // auf einer Kante oder einem Eckpunkt des Dreiecks. In dem Fall wuerde er auch so bei anderen
+      // Dreiecken gefunden werden, aber das Ergebnis bliebe das selbe.
+      if (minGewichtung >= 0.0) {
+         break;
       }
    }
-   // Einmaliges Zuweisen der Mittelpunktkoordinaten reicht, da die Punkte im folgenden nicht mehr
-   // ueberschrieben werden
-   for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-      tetraederpunkte[6+idx_dim] = mittelpunkt[idx_dim];
+   KnotengewichtungPunktInDreieck(punkte+dimensionen*dreieck_komb[3*bestesDreieck],
+      punkte+dimensionen*dreieck_komb[3*bestesDreieck+1], mittelpunkt, referenzpunkt,
+      dreieck_gewichte);
+   for (int idx_gewichtung = 0; idx_gewichtung < ecken; idx_gewichtung++) {
+      gewichtung[idx_gewichtung] = 0.0;
    }
+   // Die ersten beiden Gewichtungen stammen von zwei Eckpunkten des Vierecks und
+   // gehen dementsprechend 1:1 in die finale Gewichtung ein
+   gewichtung[dreieck_komb[3*bestesDreieck]] = dreieck_gewichte[0];
+   gewichtung[dreieck_komb[3*bestesDreieck+1]] = dreieck_gewichte[1];
+   // Die Gewichtung des Mittelpunktes geht ueberall gleichmaessig ein
+   for (int idx_gewichtung_mp = 0; idx_gewichtung_mp < ecken; idx_gewichtung_mp++) {
+      gewichtung[idx_gewichtung_mp] += dreieck_gewichte[2]/ecken;
+   }
+}
+
+
+void KnotengewichtungPunktInHexaeder(const double* punkte, const double* hilfspunkte,
+   const double* referenzpunkt, double* gewichtung) {
+   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in punkte definierten
+   // Elements hat. Der Array enthaelt 3*8 Werte
+   //  [P0x, P0y, P0z, P1x, P1y, P1z, ..., P7x, P7y, P7z]
+   // und hilfspunkte die (vorab bestimmten) 3*7 Koordinaten von Mittelpunkt und sechs Seitenmitten.
+   // Gewichtung muss acht Eintraege bereitstellen, die in dieser Funktion beschrieben werden.
+   // KnotengewichtungPunktInElement
+   const int dimensionen = 3;
+   const int ecken = 8;
+   double tetraeder_gewichte[4];
+   const double* mittelpunkt = hilfspunkte;
+   const double* seitenmitten = hilfspunkte + dimensionen;
+   int idxZielKnoten = 0;
+   //
    // Mit der Definition der Punkte wie in PunktInnerhalbElement beschrieben (0-7), dem Mittelpunkt
    // als (8) und allen sechs Seitenmitten (9-14) ergeben sich 24 Tetraeder mit Punkten der
    // folgenden Indizes
-   int ref_kombinationen = 24;
-   //int tetraeder_kombinationen[4*ref_kombinationen] = {
+   const int ref_kombinationen = 24;
    static const int tetraeder_kombinationen[] = {
       0, 1, 8, 9,    0, 1, 8, 10,   0, 3, 8, 9,    0, 3, 8, 11,
       0, 4, 8, 10,   0, 4, 8, 11,   1, 2, 8, 9,    1, 2, 8, 12,
@@ -585,115 +962,305 @@ void KnotegewichtungPunktInHexaeder(std::vector<double> zielPunktListe, std::vec
       2, 6, 8, 12,   2, 6, 8, 13,   3, 7, 8, 11,   3, 7, 8, 13,
       4, 5, 8, 10,   4, 5, 8, 14,   4, 7, 8, 11,   4, 7, 8, 14,
       5, 6, 8, 12,   5, 6, 8, 14,   6, 7, 8, 13,   6, 7, 8, 14};
-   bool gueltigeGewichtung = true;
+   //
+   // Nur wenn der Referenzpunkt sich auf oder im Tetraeder befindet, sind alle Gewichtungen
+   // zwischen 0 und 1 und somit gueltig. Falls das fuer keinen der Tetraeder gilt (bspw. durch
+   // Rundungsfehler bei Punkten auf dem Rand), wird der Tetraeder mit der groessten kleinsten
+   // Gewichtung verwendet.
+   int besterTetraeder = 0;
+   double besteGewichtung = -1.0e300;
    for (int idx_tetra = 0; idx_tetra < ref_kombinationen; idx_tetra++) {
-      // Fuer jedes der moeglichen Tetraeder werden die Eckpunkte bestimmt (3*4 Werte)
-      gueltigeGewichtung = true;
-      for (int idx_eckpunkt = 0; idx_eckpunkt < 2; idx_eckpunkt++) {
-         idxZielKnoten = tetraeder_kombinationen[4*idx_tetra+idx_eckpunkt];
+      const int* tetra = tetraeder_kombinationen + 4*idx_tetra;
+      KnotengewichtungPunktInTetraeder(punkte+dimensionen*tetra[0], punkte+dimensionen*tetra[1],
+         mittelpunkt, seitenmitten+dimensionen*(tetra[3]-9), referenzpunkt, tetraeder_gewichte);
+      double minGewichtung = MinimaleGewichtung(tetraeder_gewichte, 4);
+      if (minGewichtung > besteGewichtung) {
+         besteGewichtung = minGewichtung;
+         besterTetraeder = idx_tetra;
+      }
+      // Sobald ein gueltiger Tetraeder gefunden worden ist, sind wir fertig. Entweder, der Punkt lag
+      // echt innerhalb des Tetraeders, dann kaemen keine weiteren Anteile hinzu. Oder der Punkt
+      // lag auf einer Aussenseite, Kante oder Eckpunkt des Tetraeders. In dem Fall wuerde er auch so
+      // bei anderen Tetraedern gefunden werden, aber das Ergebnis bliebe das selbe.
+      if (minGewichtung >= 0.0) {
+         break;
+      }
+   }
+   const int* tetra = tetraeder_kombinationen + 4*besterTetraeder;
+   KnotengewichtungPunktInTetraeder(punkte+dimensionen*tetra[0], punkte+dimensionen*tetra[1],
+      mittelpunkt, seitenmitten+dimensionen*(tetra[3]-9), referenzpunkt, tetraeder_gewichte);
+   for (int idx_gewichtung = 0; idx_gewichtung < ecken; idx_gewichtung++) {
+      gewichtung[idx_gewichtung] = 0.0;
+   }
+   // Die ersten beiden Gewichtungen stammen von zwei Eckpunkten des Hexaeders und
+   // gehen dementsprechend 1:1 in die finale Gewichtung ein
+   gewichtung[tetra[0]] = tetraeder_gewichte[0];
+   gewichtung[tetra[1]] = tetraeder_gewichte[1];
+   // Die Gewichtung des Mittelpunktes geht ueberall gleichmaessig ein
+   for (int idx_gewichtung_mp = 0; idx_gewichtung_mp < ecken; idx_gewichtung_mp++) {
+      gewichtung[idx_gewichtung_mp] += tetraeder_gewichte[2]/ecken;
+   }
+   // Der letzte Punkt ist eine Seitenmitte. Deren Gewichtung uebertraegt sich gleichmaessig auf
+   // die vier Punkte, die diese Seite definieren
+   for (int idx_gewichtung_sm = 0; idx_gewichtung_sm < 4; idx_gewichtung_sm++) {
+      idxZielKnoten = hexaeder_seitenmitten[4*(tetra[3] - 9) + idx_gewichtung_sm];
+      gewichtung[idxZielKnoten] += tetraeder_gewichte[3]/4.0;
+   }
+}
+
+
+// Vorzeichen der natuerlichen Koordinaten jedes Knotens eines Vierecks (nur die ersten beiden
+// Eintraege jedes Knotens) bzw. Hexaeders in der Reihenfolge aus PunktInnerhalbElement
+static const double isoparametrisch_vorzeichen[24] = {-1.0, -1.0, -1.0,   1.0, -1.0, -1.0,
+                                                        1.0,  1.0, -1.0,  -1.0,  1.0, -1.0,
+                                                       -1.0, -1.0,  1.0,   1.0, -1.0,  1.0,
+                                                        1.0,  1.0,  1.0,  -1.0,  1.0,  1.0};
+
+
+bool NatuerlicheKoordinatenBestimmen(const double* punkte, const int dimensionen,
+   const double* referenzpunkt, double* natKoord) {
+   // Bestimmt fuer ein Viereck (2D) bzw. Hexaeder (3D) mit den Knotenpunkten punkte die natuerlichen
+   // Koordinaten natKoord von referenzpunkt mit einem Newton-Verfahren aus der isoparametrischen
+   // Abbildung. Die Knoten muessen wie in PunktInnerhalbElement beschrieben sortiert sein.
+   // Gibt false zurueck, wenn das Verfahren nicht konvergiert. Die natuerlichen Koordinaten werden
+   // auch dann zurueckgegeben, wenn sie ausserhalb von -1 bis 1 liegen.
+   const double* vorzeichen = isoparametrisch_vorzeichen;
+   const int ecken = (dimensionen == 2) ? 4 : 8;
+   const int maxIterationen = 20;
+   double faktoren[3];
+   double residuum[3];
+   double jacobi[3][3];
+   double schritt[3];
+   for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+      natKoord[idx_nat] = 0.0;
+   }
+   for (int idx_iteration = 0; idx_iteration < maxIterationen; idx_iteration++) {
+      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+         residuum[idx_dim] = -referenzpunkt[idx_dim];
+         for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+            jacobi[idx_dim][idx_nat] = 0.0;
+         }
+      }
+      for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
+         const double* punkt = punkte + dimensionen*idx_ecken;
+         double formfunktion = 1.0;
+         for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+            faktoren[idx_nat] = 0.5*(1.0 + vorzeichen[3*idx_ecken+idx_nat]*natKoord[idx_nat]);
+            formfunktion *= faktoren[idx_nat];
+         }
+         for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+            // Ableitung der Formfunktion nach der natuerlichen Koordinate idx_nat
+            double ableitung = 0.5*vorzeichen[3*idx_ecken+idx_nat];
+            for (int idx_andere = 0; idx_andere < dimensionen; idx_andere++) {
+               if (idx_andere != idx_nat) {
+                  ableitung *= faktoren[idx_andere];
+               }
+            }
+            for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+               jacobi[idx_dim][idx_nat] += ableitung*punkt[idx_dim];
+            }
+         }
          for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-            tetraederpunkte[dimensionen*idx_eckpunkt+idx_dim] = zielPunktListe[dimensionen*idxZielKnoten+idx_dim];
+            residuum[idx_dim] += formfunktion*punkt[idx_dim];
          }
       }
-      idxZielKnoten = tetraeder_kombinationen[4*idx_tetra+3] - 9;
-      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-         tetraederpunkte[9+idx_dim] = seitenmitten[dimensionen*idxZielKnoten+idx_dim];
-      }
-      //
-      KnotengewichtungPunktInTetraeder(tetraederpunkte, referenzpunkt, tetraeder_gewichte);
-      // Nur wenn der Referenzpunkt sich auf oder im Tetraeder befindet, sind alle Gewichtungen
-      // zwischen 0 und 1 und somit gueltig.
-      for (int idx_gewichtung = 0; idx_gewichtung < ecken; idx_gewichtung++) {
-         if (tetraeder_gewichte[idx_gewichtung] < 0.0) {
-            gueltigeGewichtung = false;
+      // jacobi*schritt = -residuum mit der Cramerschen Regel loesen
+      double det;
+      if (dimensionen == 2) {
+         det = jacobi[0][0]*jacobi[1][1] - jacobi[0][1]*jacobi[1][0];
+         if (det == 0.0) {
+            return false;
+         }
+         schritt[0] = -(residuum[0]*jacobi[1][1] - residuum[1]*jacobi[0][1])/det;
+         schritt[1] = -(jacobi[0][0]*residuum[1] - jacobi[1][0]*residuum[0])/det;
+      }
+      else {
+         det = jacobi[0][0]*(jacobi[1][1]*jacobi[2][2] - jacobi[1][2]*jacobi[2][1])
+             - jacobi[0][1]*(jacobi[1][0]*jacobi[2][2] - jacobi[1][2]*jacobi[2][0])
+             + jacobi[0][2]*(jacobi[1][0]*jacobi[2][1] - jacobi[1][1]*jacobi[2][0]);
+         if (det == 0.0) {
+            return false;
+         }
+         schritt[0] = -(residuum[0]*(jacobi[1][1]*jacobi[2][2] - jacobi[1][2]*jacobi[2][1])
+                      - jacobi[0][1]*(residuum[1]*jacobi[2][2] - jacobi[1][2]*residuum[2])
+                      + jacobi[0][2]*(residuum[1]*jacobi[2][1] - jacobi[1][1]*residuum[2]))/det;
+         schritt[1] = -(jacobi[0][0]*(residuum[1]*jacobi[2][2] - jacobi[1][2]*residuum[2])
+                      - residuum[0]*(jacobi[1][0]*jacobi[2][2] - jacobi[1][2]*jacobi[2][0])
+                      + jacobi[0][2]*(jacobi[1][0]*residuum[2] - residuum[1]*jacobi[2][0]))/det;
+         schritt[2] = -(jacobi[0][0]*(jacobi[1][1]*residuum[2] - residuum[1]*jacobi[2][1])
+                      - jacobi[0][1]*(jacobi[1][0]*residuum[2] - residuum[1]*jacobi[2][0])
+                      + residuum[0]*(jacobi[1][0]*jacobi[2][1] - jacobi[1][1]*jacobi[2][0]))/det;
+      }
+      double maxSchritt = 0.0;
+      for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+         natKoord[idx_nat] += schritt[idx_nat];
+         maxSchritt = std::max(maxSchritt, std::fabs(schritt[idx_nat]));
+      }
+      if (maxSchritt < 1.0e-12) {
+         return true;
+      }
+   }
+   return false;
+}
+
+
+void FormfunktionenBestimmen(const double* natKoord, const int dimensionen, double* gewichtung) {
+   // Bestimmt die bi- bzw. trilinearen Formfunktionen eines Vierecks (2D) bzw. Hexaeders (3D) an
+   // den natuerlichen Koordinaten natKoord als gewichtung
+   const int ecken = (dimensionen == 2) ? 4 : 8;
+   for (int idx_ecken = 0; idx_ecken < ecken; idx_ecken++) {
+      gewichtung[idx_ecken] = 1.0;
+      for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+         gewichtung[idx_ecken] *= 0.5*(1.0 + isoparametrisch_vorzeichen[3*idx_ecken+idx_nat]*natKoord[idx_nat]);
+      }
+   }
+}
+
+
+int IsoparametrischeFlaeche(const Nachbarschaft &nachbarschaft, const int idx_nat,
+   const double richtung) {
+   // Gibt den Index der Flaeche (Reihenfolge aus NachbarschaftErstellen) zurueck, auf der die
+   // natuerliche Koordinate idx_nat den Wert richtung (-1 oder 1) hat
+   for (int idx_flaeche = 0; idx_flaeche < nachbarschaft.numFlaechen; idx_flaeche++) {
+      const int* flaeche = nachbarschaft.flaechenEcken + idx_flaeche*nachbarschaft.eckenProFlaeche;
+      bool passend = true;
+      for (int idx_knoten = 0; idx_knoten < nachbarschaft.eckenProFlaeche; idx_knoten++) {
+         if (isoparametrisch_vorzeichen[3*flaeche[idx_knoten]+idx_nat] != richtung) {
+            passend = false;
             break;
          }
       }
-      if (!gueltigeGewichtung) {
-        continue;
+      if (passend) {
+         return idx_flaeche;
+      }
+   }
+   return -1;
+}
+
+
+int KnotengewichtungIsoparametrisch(const Elementtabelle &tabelle,
+   const Nachbarschaft &nachbarschaft, const int idx_element, const double* referenzpunkt,
+   double* gewichtung) {
+   // Bestimmt fuer ein Viereck (2D) bzw. Hexaeder (3D) die bi- bzw. trilinearen Formfunktionen am
+   // referenzpunkt als Gewichtung. Da das Element idx_element ueber eine Aufteilung in Dreiecke bzw.
+   // Tetraeder gefunden wird, kann referenzpunkt bei verzerrten Elementen (nicht ebenen Flaechen)
+   // knapp ausserhalb der isoparametrischen Abbildung liegen, d.h. mindestens eine natuerliche
+   // Koordinate ist betragsmaessig groesser als 1. Dann wird ueber die Flaeche, hinter der
+   // referenzpunkt am weitesten liegt, zum Nachbarelement gewechselt (sofern die Nachbarschaft
+   // bekannt ist) und die Bestimmung dort wiederholt.
+   // Gibt den Index des Elements zurueck, fuer das gewichtung bestimmt worden ist, oder -1 (und
+   // gewichtung bleibt unveraendert), wenn das Verfahren nicht konvergiert oder auch in den
+   // Nachbarelementen keine natuerlichen Koordinaten zwischen -1 und 1 gefunden werden.
+   const int dimensionen = tabelle.dimensionen;
+   const int ecken = tabelle.ecken;
+   const int maxNachbarn = dimensionen;
+   double natKoord[3];
+   int aktuellesElement = idx_element;
+   for (int idx_versuch = 0; idx_versuch <= maxNachbarn; idx_versuch++) {
+      const double* punkte = &tabelle.punkte[dimensionen*ecken*aktuellesElement];
+      if (!NatuerlicheKoordinatenBestimmen(punkte, dimensionen, referenzpunkt, natKoord)) {
+         return -1;
+      }
+      int idx_ueberschreitung = -1;
+      double maxUeberschreitung = 1.0e-8;
+      for (int idx_nat = 0; idx_nat < dimensionen; idx_nat++) {
+         if (std::fabs(natKoord[idx_nat]) - 1.0 > maxUeberschreitung) {
+            maxUeberschreitung = std::fabs(natKoord[idx_nat]) - 1.0;
+            idx_ueberschreitung = idx_nat;
+         }
+      }
+      if (idx_ueberschreitung == -1) {
+         FormfunktionenBestimmen(natKoord, dimensionen, gewichtung);
+         return aktuellesElement;
       }
-      // Die ersten beiden Gewichtungen stammen von zwei Eckpunkten des Hexaeders und
-      // gehen dementsprechend 1:1 in die finale Gewichtung ein
-      gewichtung[tetraeder_kombinationen[4*idx_tetra]] = tetraeder_gewichte[0];
-      gewichtung[tetraeder_kombinationen[4*idx_tetra+1]] = tetraeder_gewichte[1];
-      // Die Gewichtung des Mittelpunktes geht ueberall gleichmaessig ein
-      for (int idx_gewichtung_mp = 0; idx_gewichtung_mp < ecken; idx_gewichtung_mp++) {
-         gewichtung[idx_gewichtung_mp] += tetraeder_gewichte[2]/ecken;
+      if (nachbarschaft.nachbarn.empty()) {
+         return -1;
       }
-      // Der letzte Punkt ist eine Seitenmitte. Deren Gewichtung uebertraegt sich gleichmaessig auf
-      // die vier Punkte, die diese Seite definieren
-      for (int idx_gewichtung_sm = 0; idx_gewichtung_sm < 4; idx_gewichtung_sm++) {
-         idxZielKnoten = idxliste_seitenmitten[4*(tetraeder_kombinationen[4*idx_tetra+3] - 9) + idx_gewichtung_sm];
-         gewichtung[idxZielKnoten] += tetraeder_gewichte[3]/4.0;
+      const double richtung = (natKoord[idx_ueberschreitung] > 0.0) ? 1.0 : -1.0;
+      const int idx_flaeche = IsoparametrischeFlaeche(nachbarschaft, idx_ueberschreitung, richtung);
+      if (idx_flaeche == -1) {
+         return -1;
+      }
+      aktuellesElement = nachbarschaft.nachbarn[aktuellesElement*nachbarschaft.numFlaechen+idx_flaeche];
+      if ((aktuellesElement == -1) || (aktuellesElement == idx_element)) {
+         return -1;
       }
-      // Sobald eine Zuweisung stattgefunden hat, sind wir fertig. Entweder, der Punkt lag
-      // echt innerhalb des Tetraeders, dann kaemen keine weiteren Anteile hinzu. Oder der Punkt
-      // lag auf einer Aussenseite, Kante oder Eckpunkt des Tetraeders. In dem Fall wuerde er auch so
-      // bei anderen Tetraedern gefunden werden, aber das Ergebnis bliebe das selbe.
-      break;
    }
+   return -1;
 }
 
 
-void KnotengewichtungPunktInElement(const std::vector<double> zielPunktListe, std::vector<double> referenzpunkt,
-   std::vector<double> gewichtung, const int dimensionen, const int ecken) {
-   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des in zielPunktListe
-   // definierten Elements hat. Der Array enthaelt dimensionen*ecken Werte, bspw fuer ein Hexaeder
-   // Gewichtung muss soviele Eintraege wie ecken bereitstellen, die in dieser Funktion beschrieben
-   // werden.
+bool KnotengewichtungPunktInElement(const Elementtabelle &tabelle,
+   const Nachbarschaft &nachbarschaft, int &idx_element, const double* referenzpunkt,
+   const int gewichtungsmodus, double* gewichtung) {
+   // Bestimmt die Anteile, die ein referenzpunkt aus den Knotenpunkten des Elements idx_element der
+   // tabelle hat. Gewichtung muss soviele Eintraege wie ecken bereitstellen, die in dieser Funktion
+   // beschrieben werden. Mit gewichtungsmodus 1 werden fuer Vierecke und Hexaeder die bi- bzw.
+   // trilinearen Formfunktionen verwendet (KnotengewichtungIsoparametrisch). Dabei kann idx_element
+   // auf ein Nachbarelement geaendert werden. Nur wenn die Formfunktionen auch dort nicht bestimmt
+   // werden koennen, wird wie mit gewichtungsmodus 0 eine Aufteilung in Dreiecke bzw. Tetraeder
+   // verwendet. Die Gewichtungen dieser Aufteilung koennen fuer Punkte knapp ausserhalb des
+   // Elements (bspw. hinter nicht ebenen Flaechen) auch negativ sein.
+   // Gibt true zurueck, wenn gewichtungsmodus 1 angefordert, aber die Aufteilung verwendet wurde.
+   const int dimensionen = tabelle.dimensionen;
+   const int ecken = tabelle.ecken;
+   const bool vierOderAchtEcken = ((dimensionen == 2) && (ecken == 4)) || ((dimensionen == 3) && (ecken == 8));
+   bool rueckfall = false;
+   if ((gewichtungsmodus == 1) && vierOderAchtEcken) {
+      const int isoElement = KnotengewichtungIsoparametrisch(tabelle, nachbarschaft, idx_element,
+         referenzpunkt, gewichtung);
+      if (isoElement != -1) {
+         idx_element = isoElement;
+         return false;
+      }
+      rueckfall = true;
+   }
+   const double* punkte = &tabelle.punkte[dimensionen*ecken*idx_element];
+   const double* hilfspunkte = 0;
+   if (tabelle.numHilfspunkte > 0) {
+      hilfspunkte = &tabelle.hilfspunkte[dimensionen*tabelle.numHilfspunkte*idx_element];
+   }
    if (dimensionen == 2) {
       if (ecken == 3) {
-         KnotengewichtungPunktInDreieck(zielPunktListe, referenzpunkt, gewichtung);
+         KnotengewichtungPunktInDreieck(punkte, punkte+2, punkte+4, referenzpunkt, gewichtung);
       }
       else {
-         KnotengewichtungPunktInViereck(zielPunktListe, referenzpunkt, gewichtung);
+         KnotengewichtungPunktInViereck(punkte, hilfspunkte, referenzpunkt, gewichtung);
       }
    }
    else {
       if (ecken == 4) {
-         KnotengewichtungPunktInTetraeder(zielPunktListe, referenzpunkt, gewichtung);
+         KnotengewichtungPunktInTetraeder(punkte, punkte+3, punkte+6, punkte+9, referenzpunkt,
+            gewichtung);
       }
       else {
-         KnotegewichtungPunktInHexaeder(zielPunktListe, referenzpunkt, gewichtung);
+         KnotengewichtungPunktInHexaeder(punkte, hilfspunkte, referenzpunkt, gewichtung);
       }
    }
+   return rueckfall;
 }
-   
 
-extern "C" ADDAPI void ADDCALL Gewichtung_Bestimmen(const int dimensionen, const int eckenAlt,
-   const int eckenNeu, const double* knotenKoordinatenAlt, int numElementeAlt,
-   const int* elementeEckenAlt, int numKnotenNeu, const double* knotenKoordinatenNeu,
-   int numElementeNeu, int* const elementeEckenNeu, int* gewichtungKnotenLabels,
-   double* gewichtungKnotenWerte, int* bezugsElement) {
-   // Bestimme die Zuordnung und lineare Gewichtung von einem Satz (neuer) Knoten bezueglich alter
-   // Knoten und dazugehoeriger Elemente. Fuer die neuen Elemente soll eine direkte Zuordnung zum
-   // alten bezugselement gefunden werden. Dazu werden mehrere Werte und Arrays erwartet:
-   // Die Anzahl an dimensionen sollte 2 oder 3 sein sowie fuer jedes Element die entsprechende
-   // Anzahl eckenAlt und eckenNeu (2D: 3 fuer Dreieck, 4 fuer Viereck; 3D: 4 fuer Tetraeder, 8 fuer
-   // Hexaeder - muss vorher ueberprueft werden).
-   // elementeEckenAlt hat numElementeAlt*eckenAlt Eintraege, bspw. fuer ein 3D Hexaeder
-   // [E0_P0, E0_P1, E0_P2, E0_P3, E0_P4, E0_P5, E0_P6, E0_P7,   E1_P0, E1_P1, E1_P2, ...]
-   // knotenKoordinatenAlt hat dimensionen-mal soviele Eintraege wie die hoechste Zahl in
-   // elementeEckenAlt.
-   // Der gleiche Zusammenhang bezueglich numElementeNeu gilt auch fuer elementeEckenNeu und
-   // knotenKoordinatenNeu, wobei die Anzahl von Eintraegen in knotenKoordinatenNeu gleichzeitig
-   // auch eckenNeu*numKnotenNeu sein muss.
-   // Die drei Arrays gewichtungKnotenLabels, gewichtungKnotenWerte und bezugsElement werden in
-   // dieser Funktion beschrieben und muessen vorher in passender Groesse bereitgestellt werden:
-   // gewichtungKnotenLabels und gewichtungKnotenWerte haben jeweils eckenAlt*numKnotenNeu Eintraege,
-   // bezugsElement hat numElementeNeu Eintraege.
-   std::vector<double> referenzpunkt(dimensionen, 0.0);
-   int idxZielElement = 0;
+
+int BereichStart(const int numEintraege, const int numBereiche, const int idx_bereich) {
+   // Gibt den ersten Index des Bereichs idx_bereich zurueck, wenn numEintraege moeglichst
+   // gleichmaessig in numBereiche zusammenhaengende Bereiche aufgeteilt werden
+   return static_cast<int>((static_cast<long long>(numEintraege)*idx_bereich)/numBereiche);
+}
+
+
+void BezugsElementeBestimmen(const Suchraster &raster, const Nachbarschaft &nachbarschaft,
+   const Elementtabelle &tabelle, const int eckenNeu, const double* knotenKoordinatenNeu,
+   const int* elementeEckenNeu, const int idxVon, const int idxBis, int* bezugsElement) {
+   // Bestimme fuer die neuen Elemente mit Indizes von idxVon bis ausschliesslich idxBis die
+   // Elementmittelpunkte. Dann wird ueberprueft, in welchem der alten Elemente der Mittelpunkt jedes
+   // Zielelements liegt. Der Verweis auf dieses alte Element wird in bezugsElement gespeichert.
+   // Bei einer Nachbarschaftssuche beginnt die Suche jeweils beim zuletzt gefundenen Element.
+   const int dimensionen = tabelle.dimensionen;
+   double referenzpunkt[3] = {0.0, 0.0, 0.0};
    int idxZielKnoten = 0;
-   int idxZuweisung = 0;
-   std::vector<double> zielPunktListe(eckenAlt*dimensionen, 0.0);
-   std::vector<int> labelliste(eckenAlt, 0);
-   std::vector<double> gewichtung(eckenAlt, 0.0);
    int labelElementAlt = -1;
-   // Zuerst Elementmittelpunkte aller neuen Zielelemente bestimmen. Dann wird ueberprueft, in
-   // welchem der alten Elemente der Mittelpunkt jedes Zielelements liegt. Der Verweis auf dieses
-   // alte Element wird in bezugsElement gespeichert.
-   for (int idx_element = 0; idx_element < numElementeNeu; idx_element++) {
+   int startElement = -1;
+   for (int idx_element = idxVon; idx_element < idxBis; idx_element++) {
       for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
          referenzpunkt[idx_dim] = 0.0;
       }
@@ -703,24 +1270,47 @@ extern "C" ADDAPI void ADDCALL Gewichtung_Bestimmen(const int dimensionen, const
             referenzpunkt[idx_dim] += knotenKoordinatenNeu[dimensionen*idxZielKnoten+idx_dim]/eckenNeu;
          }
       }
-      labelElementAlt = PunktInElement(knotenKoordinatenAlt, numElementeAlt, elementeEckenAlt,
-         referenzpunkt, dimensionen, eckenAlt);
+      labelElementAlt = PunktInElementNachbarn(raster, nachbarschaft, tabelle, referenzpunkt,
+         startElement);
+      if (labelElementAlt != -1) {
+         startElement = labelElementAlt;
+      }
       // Labels starten eins hoeher als Indizes (mit denen hier gearbeitet wird)
       // Falls das Element nicht gefunden wird, gibt PunktInElement -1 zurueck und als Label wird
       // 0 gespeichert
       bezugsElement[idx_element] = labelElementAlt+1;
    }
-   // Anschliessend fuer alle Knoten des neuen Zielelements das (alte) Element bestimmen, in dem sie
-   // gewesen waeren. Nachdem das alte Element gefunden worden ist, wird die Position und somit
-   // gewichtung bestimmt, die alle Punkte des alten Elements auf den jeweiligen Knoten des neuen
-   // Zielelements haben. Fuer jeden Zielpunkt werden Labels und Gewichtungen der alten Elemente in
-   // gewichtungKnotenLabels und gewichtungKnotenWerte gespeichert.
-   for (int idx_knoten = 0; idx_knoten < numKnotenNeu; idx_knoten++) {
+}
+
+
+void KnotengewichtungenBestimmen(const Suchraster &raster, const Nachbarschaft &nachbarschaft,
+   const Nachbarschaft &gewichtungsnachbarschaft, const Elementtabelle &tabelle,
+   const int* elementeEckenAlt, const double* knotenKoordinatenNeu, const int gewichtungsmodus,
+   const int idxVon, const int idxBis, int* gewichtungKnotenLabels, double* gewichtungKnotenWerte,
+   int* numRueckfaelle) {
+   // Fuer alle neuen Knoten mit Indizes von idxVon bis ausschliesslich idxBis das (alte) Element
+   // bestimmen, in dem sie gewesen waeren. Nachdem das alte Element gefunden worden ist, wird die
+   // Position und somit gewichtung bestimmt, die alle Punkte des alten Elements auf den jeweiligen
+   // Knoten des neuen Zielelements haben. Fuer jeden Zielpunkt werden Labels und Gewichtungen der
+   // alten Elemente direkt in gewichtungKnotenLabels und gewichtungKnotenWerte gespeichert.
+   // Bei einer Nachbarschaftssuche beginnt die Suche jeweils beim zuletzt gefundenen Element.
+   // Mit gewichtungsnachbarschaft kann die isoparametrische Gewichtung (gewichtungsmodus 1) fuer
+   // Punkte knapp ausserhalb eines Elements im Nachbarelement bestimmt werden. In numRueckfaelle
+   // wird gezaehlt, wie oft stattdessen die Aufteilung in Dreiecke bzw. Tetraeder verwendet wurde.
+   const int dimensionen = tabelle.dimensionen;
+   const int eckenAlt = tabelle.ecken;
+   *numRueckfaelle = 0;
+   double referenzpunkt[3] = {0.0, 0.0, 0.0};
+   int labelElementAlt = -1;
+   int startElement = -1;
+   for (int idx_knoten = idxVon; idx_knoten < idxBis; idx_knoten++) {
       for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
          referenzpunkt[idx_dim] = knotenKoordinatenNeu[dimensionen*idx_knoten+idx_dim];
       }
-      labelElementAlt = PunktInElement(knotenKoordinatenAlt, numElementeAlt, elementeEckenAlt,
-         referenzpunkt, dimensionen, eckenAlt);
+      labelElementAlt = PunktInElementNachbarn(raster, nachbarschaft, tabelle, referenzpunkt,
+         startElement);
+      int* labelliste = gewichtungKnotenLabels + eckenAlt*idx_knoten;
+      double* gewichtung = gewichtungKnotenWerte + eckenAlt*idx_knoten;
       if (labelElementAlt == -1) {
          // Knoten nicht enthalten
          for (int idx_gewichtung = 0; idx_gewichtung < eckenAlt; idx_gewichtung++) {
@@ -729,19 +1319,337 @@ extern "C" ADDAPI void ADDCALL Gewichtung_Bestimmen(const int dimensionen, const
          }
       }
       else {
+         startElement = labelElementAlt;
+         if (KnotengewichtungPunktInElement(tabelle, gewichtungsnachbarschaft, labelElementAlt,
+            referenzpunkt, gewichtungsmodus, gewichtung)) {
+            *numRueckfaelle += 1;
+         }
          for (int idx_ecken = 0; idx_ecken < eckenAlt; idx_ecken++) {
-            idxZielElement = elementeEckenAlt[eckenAlt*labelElementAlt+idx_ecken];
-            for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
-               zielPunktListe[dimensionen*idx_ecken+idx_dim] = knotenKoordinatenAlt[dimensionen*idxZielElement+idx_dim];
+            labelliste[idx_ecken] = elementeEckenAlt[eckenAlt*labelElementAlt+idx_ecken];
+         }
+      }
+   }
+}
+
+
+struct Zielwertgitter {
+   // Regelmaessiges Gitter (bspw. aus ZielwertquaderEinlesen), dessen Knoten alle Kombinationen der
+   // Werte aus den (streng monoton steigenden) Achsen sind. Die Achse idx_dim hat
+   // numAchsenwerte[idx_dim] Eintraege ab achsen[idx_dim]. Der Gitterpunkt (i, j, k) hat den Index
+   // i + numAchsenwerte[0]*(j + numAchsenwerte[1]*k) und in knoten ist dafuer der Index des
+   // dazugehoerigen alten Knotens gespeichert. Analog ist in elemente fuer jede Gitterzelle der Index
+   // des alten Elements gespeichert (oder -1, falls die Zelle keinem Element entspricht).
+   int dimensionen;
+   int numAchsenwerte[3];
+   const double* achsen[3];
+   const int* knoten;
+   const int* elemente;
+};
+
+
+int GitterZelleBestimmen(const Zielwertgitter &gitter, const double* referenzpunkt,
+   int* zellIndex, double* lokaleKoordinaten) {
+   // Bestimme fuer referenzpunkt den Index der Gitterzelle (Rueckgabewert) sowie fuer jede Achse
+   // den Index zellIndex der Zelle und die lokalen Koordinaten (zwischen 0 und 1) innerhalb der
+   // Zelle. Die Zelle wird fuer jede Achse ueber eine binaere Suche bestimmt. Liegt referenzpunkt
+   // ausserhalb des Gitters, wird -1 zurueckgegeben.
+   int idx_zelle = 0;
+   for (int idx_dim = gitter.dimensionen-1; idx_dim >= 0; idx_dim--) {
+      const int numWerte = gitter.numAchsenwerte[idx_dim];
+      const double* achse = gitter.achsen[idx_dim];
+      const double wert = referenzpunkt[idx_dim];
+      if ((numWerte < 2) || (wert < achse[0]) || (wert > achse[numWerte-1])) {
+         return -1;
+      }
+      // Erster Achsenwert groesser als wert; Punkte auf dem letzten Achsenwert gehoeren noch zur
+      // letzten Zelle
+      int idx_achse = static_cast<int>(std::upper_bound(achse, achse+numWerte, wert) - achse) - 1;
+      if (idx_achse > numWerte-2) {
+         idx_achse = numWerte-2;
+      }
+      zellIndex[idx_dim] = idx_achse;
+      lokaleKoordinaten[idx_dim] = (wert - achse[idx_achse])/(achse[idx_achse+1] - achse[idx_achse]);
+      idx_zelle = idx_zelle*(numWerte-1) + idx_achse;
+   }
+   return idx_zelle;
+}
+
+
+void ZielwertquaderBezugsElementeBestimmen(const Zielwertgitter &gitter, const int eckenNeu,
+   const double* knotenKoordinatenNeu, const int* elementeEckenNeu, const int idxVon,
+   const int idxBis, int* bezugsElement) {
+   // Wie BezugsElementeBestimmen, aber das alte Element wird direkt aus der Gitterzelle des
+   // Elementmittelpunkts bestimmt
+   const int dimensionen = gitter.dimensionen;
+   double referenzpunkt[3] = {0.0, 0.0, 0.0};
+   double lokaleKoordinaten[3] = {0.0, 0.0, 0.0};
+   int zellIndex[3] = {0, 0, 0};
+   int idxZielKnoten = 0;
+   for (int idx_element = idxVon; idx_element < idxBis; idx_element++) {
+      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+         referenzpunkt[idx_dim] = 0.0;
+      }
+      for (int idx_ecken = 0; idx_ecken < eckenNeu; idx_ecken++) {
+         idxZielKnoten = elementeEckenNeu[idx_element*eckenNeu+idx_ecken];
+         for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+            referenzpunkt[idx_dim] += knotenKoordinatenNeu[dimensionen*idxZielKnoten+idx_dim]/eckenNeu;
+         }
+      }
+      int labelElementAlt = -1;
+      const int idx_zelle = GitterZelleBestimmen(gitter, referenzpunkt, zellIndex, lokaleKoordinaten);
+      if (idx_zelle != -1) {
+         labelElementAlt = gitter.elemente[idx_zelle];
+      }
+      // Labels starten eins hoeher als Indizes (0 fuer nicht gefundene Elemente)
+      bezugsElement[idx_element] = labelElementAlt+1;
+   }
+}
+
+
+void ZielwertquaderKnotengewichtungenBestimmen(const Zielwertgitter &gitter,
+   const double* knotenKoordinatenNeu, const int idxVon, const int idxBis,
+   int* gewichtungKnotenLabels, double* gewichtungKnotenWerte) {
+   // Wie KnotengewichtungenBestimmen, aber die Zelle wird direkt im Gitter bestimmt und die
+   // Gewichtungen der Eckpunkte der Zelle bi- bzw. trilinear aus den lokalen Koordinaten berechnet.
+   // Die Eckpunkte werden in der Reihenfolge eines Vierecks bzw. Hexaeders abgelegt.
+   static const int eckenversatz[24] = {0, 0, 0,   1, 0, 0,   1, 1, 0,   0, 1, 0,
+                                        0, 0, 1,   1, 0, 1,   1, 1, 1,   0, 1, 1};
+   const int dimensionen = gitter.dimensionen;
+   const int eckenAlt = (dimensionen == 2) ? 4 : 8;
+   double referenzpunkt[3] = {0.0, 0.0, 0.0};
+   double lokaleKoordinaten[3] = {0.0, 0.0, 0.0};
+   int zellIndex[3] = {0, 0, 0};
+   for (int idx_knoten = idxVon; idx_knoten < idxBis; idx_knoten++) {
+      for (int idx_dim = 0; idx_dim < dimensionen; idx_dim++) {
+         referenzpunkt[idx_dim] = knotenKoordinatenNeu[dimensionen*idx_knoten+idx_dim];
+      }
+      const int idx_zelle = GitterZelleBestimmen(gitter, referenzpunkt, zellIndex, lokaleKoordinaten);
+      int* labelliste = gewichtungKnotenLabels + eckenAlt*idx_knoten;
+      double* gewichtung = gewichtungKnotenWerte + eckenAlt*idx_knoten;
+      if ((idx_zelle == -1) || (gitter.elemente[idx_zelle] == -1)) {
+         // Knoten nicht enthalten
+         for (int idx_gewichtung = 0; idx_gewichtung < eckenAlt; idx_gewichtung++) {
+            labelliste[idx_gewichtung] = -1;
+            gewichtung[idx_gewichtung] = 0.0;
+         }
+         continue;
+      }
+      for (int idx_ecken = 0; idx_ecken < eckenAlt; idx_ecken++) {
+         int idx_gitterpunkt = 0;
+         double wert = 1.0;
+         for (int idx_dim = dimensionen-1; idx_dim >= 0; idx_dim--) {
+            const int versatz = eckenversatz[3*idx_ecken+idx_dim];
+            idx_gitterpunkt = idx_gitterpunkt*gitter.numAchsenwerte[idx_dim] + zellIndex[idx_dim] + versatz;
+            if (versatz == 1) {
+               wert *= lokaleKoordinaten[idx_dim];
             }
-            labelliste[idx_ecken] = idxZielElement;
-         }         
-         KnotengewichtungPunktInElement(zielPunktListe, referenzpunkt, gewichtung, dimensionen, eckenAlt);
+            else {
+               wert *= 1.0 - lokaleKoordinaten[idx_dim];
+            }
+         }
+         labelliste[idx_ecken] = gitter.knoten[idx_gitterpunkt];
+         gewichtung[idx_ecken] = wert;
       }
-      for (int idx_gewichtung = 0; idx_gewichtung < eckenAlt; idx_gewichtung++) {
-         gewichtungKnotenLabels[eckenAlt*idx_knoten+idx_gewichtung] = labelliste[idx_gewichtung];
-         gewichtungKnotenWerte[eckenAlt*idx_knoten+idx_gewichtung] = gewichtung[idx_gewichtung];
+   }
+}
+
+
+void AusgabenOhneBestimmungFuellen(const int ausgabemodus, const int eckenAlt,
+   const int numKnotenNeu, const int numElementeNeu, int* gewichtungKnotenLabels,
+   double* gewichtungKnotenWerte, int* bezugsElement) {
+   // Fuelle die Ausgabearrays, die mit dem uebergebenen ausgabemodus nicht bestimmt werden, mit den
+   // Werten fuer nicht gefundene Elemente bzw. Knoten (ausgabemodus 1: nur bezugsElement bestimmen,
+   // ausgabemodus 2: nur Knotengewichtungen bestimmen, sonst beide).
+   if (ausgabemodus == 2) {
+      for (int idx_element = 0; idx_element < numElementeNeu; idx_element++) {
+         bezugsElement[idx_element] = 0;
+      }
+   }
+   if (ausgabemodus == 1) {
+      for (int idx_gewichtung = 0; idx_gewichtung < eckenAlt*numKnotenNeu; idx_gewichtung++) {
+         gewichtungKnotenLabels[idx_gewichtung] = -1;
+         gewichtungKnotenWerte[idx_gewichtung] = 0.0;
       }
    }
 }
- 
+
+
+extern "C" ADDAPI int ADDCALL Gewichtung_Version() {
+   // Gib die Version der exportierten Schnittstelle zurueck. Bei jeder Aenderung der Signaturen oder
+   // der Bedeutung von Argumenten erhoehen (und _gewichtungBibliothekVersion in uebertragung.py
+   // entsprechend anpassen).
+   return 2;
+}
+
+
+extern "C" ADDAPI int ADDCALL Gewichtung_Bestimmen(const int dimensionen, const int eckenAlt,
+   const int eckenNeu, const double* knotenKoordinatenAlt, int numElementeAlt,
+   const int* elementeEckenAlt, int numKnotenNeu, const double* knotenKoordinatenNeu,
+   int numElementeNeu, int* const elementeEckenNeu, int* gewichtungKnotenLabels,
+   double* gewichtungKnotenWerte, int* bezugsElement, const int numThreads,
+   const int suchmodus, const int gewichtungsmodus, const int ausgabemodus) {
+   // Bestimme die Zuordnung und lineare Gewichtung von einem Satz (neuer) Knoten bezueglich alter
+   // Knoten und dazugehoeriger Elemente. Fuer die neuen Elemente soll eine direkte Zuordnung zum
+   // alten bezugselement gefunden werden. Dazu werden mehrere Werte und Arrays erwartet:
+   // Die Anzahl an dimensionen sollte 2 oder 3 sein sowie fuer jedes Element die entsprechende
+   // Anzahl eckenAlt und eckenNeu (2D: 3 fuer Dreieck, 4 fuer Viereck; 3D: 4 fuer Tetraeder, 8 fuer
+   // Hexaeder - muss vorher ueberprueft werden).
+   // elementeEckenAlt hat numElementeAlt*eckenAlt Eintraege, bspw. fuer ein 3D Hexaeder
+   // [E0_P0, E0_P1, E0_P2, E0_P3, E0_P4, E0_P5, E0_P6, E0_P7,   E1_P0, E1_P1, E1_P2, ...]
+   // knotenKoordinatenAlt hat dimensionen-mal soviele Eintraege wie die hoechste Zahl in
+   // elementeEckenAlt.
+   // Der gleiche Zusammenhang bezueglich numElementeNeu gilt auch fuer elementeEckenNeu und
+   // knotenKoordinatenNeu, wobei die Anzahl von Eintraegen in knotenKoordinatenNeu gleichzeitig
+   // auch eckenNeu*numKnotenNeu sein muss.
+   // Die drei Arrays gewichtungKnotenLabels, gewichtungKnotenWerte und bezugsElement werden in
+   // dieser Funktion beschrieben und muessen vorher in passender Groesse bereitgestellt werden:
+   // gewichtungKnotenLabels und gewichtungKnotenWerte haben jeweils eckenAlt*numKnotenNeu Eintraege,
+   // bezugsElement hat numElementeNeu Eintraege.
+   // Mit numThreads > 1 werden die neuen Elemente und Knoten in ebensoviele zusammenhaengende
+   // Bereiche aufgeteilt und parallel bearbeitet. Da jeder Bereich nur in seine eigenen Eintraege
+   // der Ausgabearrays schreibt, ist das Ergebnis unabhaengig von numThreads.
+   // Mit suchmodus 0 wird jeder Punkt ueber das Suchraster gesucht. Mit suchmodus 1 wird zusaetzlich
+   // die Nachbarschaft der alten Elemente bestimmt und die Suche fuer jeden Punkt beim zuvor
+   // gefundenen Element gestartet (sinnvoll, wenn aufeinanderfolgende Knoten/Elemente nah
+   // beieinander liegen). Fuer Punkte auf gemeinsamen Flaechen mehrerer Elemente kann dabei ein
+   // anderes (gleichwertiges) Element als mit suchmodus 0 oder mit einer anderen Anzahl an Threads
+   // gefunden werden.
+   // Mit gewichtungsmodus 0 werden die Gewichtungen in Vierecken und Hexaedern ueber eine Aufteilung
+   // in Dreiecke bzw. Tetraeder bestimmt, mit gewichtungsmodus 1 ueber die bi- bzw. trilinearen
+   // Formfunktionen (siehe KnotengewichtungPunktInElement). Dafuer wird immer die Nachbarschaft der
+   // alten Elemente bestimmt, um Punkte knapp ausserhalb der isoparametrischen Abbildung eines
+   // Elements im Nachbarelement zu gewichten.
+   // Mit ausgabemodus 1 wird nur bezugsElement bestimmt, mit ausgabemodus 2 nur
+   // gewichtungKnotenLabels und gewichtungKnotenWerte (sonst beide). Die jeweils anderen Arrays
+   // werden wie fuer nicht gefundene Elemente bzw. Knoten gefuellt.
+   // Gibt die Anzahl der Knoten zurueck, fuer die mit gewichtungsmodus 1 keine isoparametrische
+   // Gewichtung bestimmt werden konnte und die Aufteilung verwendet wurde (sonst 0).
+   //
+   // Einmalig die Geometriedaten aller alten Elemente vorberechnen und ein Suchraster ueber die
+   // alten Elemente erstellen, damit fuer jeden Punkt nur die Elemente in der Naehe untersucht
+   // werden muessen
+   Elementtabelle tabelle;
+   ElementtabelleErstellen(knotenKoordinatenAlt, numElementeAlt, elementeEckenAlt, dimensionen,
+      eckenAlt, tabelle);
+   Suchraster raster;
+   SuchrasterErstellen(tabelle, raster);
+   Nachbarschaft nachbarschaft;
+   Nachbarschaft keineNachbarschaft;
+   if ((suchmodus == 1) || (gewichtungsmodus == 1)) {
+      NachbarschaftErstellen(numElementeAlt, elementeEckenAlt, dimensionen, eckenAlt, nachbarschaft);
+   }
+   const Nachbarschaft &suchnachbarschaft = (suchmodus == 1) ? nachbarschaft : keineNachbarschaft;
+   //
+   int anzahlThreads = numThreads;
+   if (anzahlThreads < 1) {
+      anzahlThreads = 1;
+   }
+   AusgabenOhneBestimmungFuellen(ausgabemodus, eckenAlt, numKnotenNeu, numElementeNeu,
+      gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElement);
+   const int numElementeBestimmen = (ausgabemodus == 2) ? 0 : numElementeNeu;
+   const int numKnotenBestimmen = (ausgabemodus == 1) ? 0 : numKnotenNeu;
+   std::vector<std::thread> threads;
+   // Zuerst fuer alle neuen Zielelemente das alte bezugsElement bestimmen
+   for (int idx_thread = 1; idx_thread < anzahlThreads; idx_thread++) {
+      threads.push_back(std::thread(BezugsElementeBestimmen, std::cref(raster),
+         std::cref(suchnachbarschaft), std::cref(tabelle), eckenNeu, knotenKoordinatenNeu,
+         elementeEckenNeu, BereichStart(numElementeBestimmen, anzahlThreads, idx_thread),
+         BereichStart(numElementeBestimmen, anzahlThreads, idx_thread+1), bezugsElement));
+   }
+   BezugsElementeBestimmen(raster, suchnachbarschaft, tabelle, eckenNeu, knotenKoordinatenNeu,
+      elementeEckenNeu, 0, BereichStart(numElementeBestimmen, anzahlThreads, 1), bezugsElement);
+   for (std::size_t idx_thread = 0; idx_thread < threads.size(); idx_thread++) {
+      threads[idx_thread].join();
+   }
+   threads.clear();
+   // Anschliessend fuer alle neuen Knoten die Gewichtungen bezueglich der alten Knoten bestimmen.
+   // Jeder Thread zaehlt die verwendeten Rueckfaelle in seinem eigenen Eintrag
+   std::vector<int> numRueckfaelle(anzahlThreads, 0);
+   for (int idx_thread = 1; idx_thread < anzahlThreads; idx_thread++) {
+      threads.push_back(std::thread(KnotengewichtungenBestimmen, std::cref(raster),
+         std::cref(suchnachbarschaft), std::cref(nachbarschaft), std::cref(tabelle),
+         elementeEckenAlt, knotenKoordinatenNeu, gewichtungsmodus,
+         BereichStart(numKnotenBestimmen, anzahlThreads, idx_thread),
+         BereichStart(numKnotenBestimmen, anzahlThreads, idx_thread+1), gewichtungKnotenLabels,
+         gewichtungKnotenWerte, &numRueckfaelle[idx_thread]));
+   }
+   KnotengewichtungenBestimmen(raster, suchnachbarschaft, nachbarschaft, tabelle, elementeEckenAlt,
+      knotenKoordinatenNeu, gewichtungsmodus, 0, BereichStart(numKnotenBestimmen, anzahlThreads, 1),
+      gewichtungKnotenLabels, gewichtungKnotenWerte, &numRueckfaelle[0]);
+   int summeRueckfaelle = 0;
+   for (std::size_t idx_thread = 0; idx_thread < threads.size(); idx_thread++) {
+      threads[idx_thread].join();
+   }
+   for (int idx_thread = 0; idx_thread < anzahlThreads; idx_thread++) {
+      summeRueckfaelle += numRueckfaelle[idx_thread];
+   }
+   return summeRueckfaelle;
+}
+
+
+extern "C" ADDAPI void ADDCALL Gewichtung_Zielwertquader_Bestimmen(const int dimensionen,
+   const int* numAchsenwerte, const double* achsenwerte, const int* gitterKnoten,
+   const int* gitterElemente, const int eckenNeu, int numKnotenNeu,
+   const double* knotenKoordinatenNeu, int numElementeNeu, int* const elementeEckenNeu,
+   int* gewichtungKnotenLabels, double* gewichtungKnotenWerte, int* bezugsElement,
+   const int numThreads, const int ausgabemodus) {
+   // Bestimme die gleichen Zuordnungen und Gewichtungen wie Gewichtung_Bestimmen, wenn die alten
+   // Elemente ein regelmaessiges Gitter bilden (bspw. aus ZielwertquaderEinlesen). Statt einer
+   // Elementsuche wird die Zelle jedes Punktes ueber eine binaere Suche auf den Achsen bestimmt und
+   // die Gewichtungen bi- bzw. trilinear berechnet.
+   // numAchsenwerte hat dimensionen Eintraege mit der Anzahl an Werten pro Achse und achsenwerte
+   // enthaelt alle Achsen (jeweils streng monoton steigend) direkt hintereinander.
+   // gitterKnoten enthaelt fuer jeden Gitterpunkt (erste Achse am schnellsten veraenderlich) den
+   // Index des alten Knotens und gitterElemente fuer jede Gitterzelle den Index des alten Elements
+   // (oder -1). Die Ausgabearrays sind wie bei Gewichtung_Bestimmen mit eckenAlt = 4 (2D) bzw.
+   // eckenAlt = 8 (3D) bereitzustellen. Der ausgabemodus wird wie bei Gewichtung_Bestimmen
+   // beruecksichtigt.
+   Zielwertgitter gitter;
+   gitter.dimensionen = dimensionen;
+   gitter.knoten = gitterKnoten;
+   gitter.elemente = gitterElemente;
+   int versatz = 0;
+   for (int idx_dim = 0; idx_dim < 3; idx_dim++) {
+      gitter.numAchsenwerte[idx_dim] = 1;
+      gitter.achsen[idx_dim] = achsenwerte;
+      if (idx_dim < dimensionen) {
+         gitter.numAchsenwerte[idx_dim] = numAchsenwerte[idx_dim];
+         gitter.achsen[idx_dim] = achsenwerte + versatz;
+         versatz += numAchsenwerte[idx_dim];
+      }
+   }
+   //
+   int anzahlThreads = numThreads;
+   if (anzahlThreads < 1) {
+      anzahlThreads = 1;
+   }
+   const int eckenAlt = (dimensionen == 2) ? 4 : 8;
+   AusgabenOhneBestimmungFuellen(ausgabemodus, eckenAlt, numKnotenNeu, numElementeNeu,
+      gewichtungKnotenLabels, gewichtungKnotenWerte, bezugsElement);
+   const int numElementeBestimmen = (ausgabemodus == 2) ? 0 : numElementeNeu;
+   const int numKnotenBestimmen = (ausgabemodus == 1) ? 0 : numKnotenNeu;
+   std::vector<std::thread> threads;
+   for (int idx_thread = 1; idx_thread < anzahlThreads; idx_thread++) {
+      threads.push_back(std::thread(ZielwertquaderBezugsElementeBestimmen, std::cref(gitter),
+         eckenNeu, knotenKoordinatenNeu, elementeEckenNeu,
+         BereichStart(numElementeBestimmen, anzahlThreads, idx_thread),
+         BereichStart(numElementeBestimmen, anzahlThreads, idx_thread+1), bezugsElement));
+   }
+   ZielwertquaderBezugsElementeBestimmen(gitter, eckenNeu, knotenKoordinatenNeu, elementeEckenNeu,
+      0, BereichStart(numElementeBestimmen, anzahlThreads, 1), bezugsElement);
+   for (std::size_t idx_thread = 0; idx_thread < threads.size(); idx_thread++) {
+      threads[idx_thread].join();
+   }
+   threads.clear();
+   for (int idx_thread = 1; idx_thread < anzahlThreads; idx_thread++) {
+      threads.push_back(std::thread(ZielwertquaderKnotengewichtungenBestimmen, std::cref(gitter),
+         knotenKoordinatenNeu, BereichStart(numKnotenBestimmen, anzahlThreads, idx_thread),
+         BereichStart(numKnotenBestimmen, anzahlThreads, idx_thread+1), gewichtungKnotenLabels,
+         gewichtungKnotenWerte));
+   }
+   ZielwertquaderKnotengewichtungenBestimmen(gitter, knotenKoordinatenNeu, 0,
+      BereichStart(numKnotenBestimmen, anzahlThreads, 1), gewichtungKnotenLabels, gewichtungKnotenWerte);
+   for (std::size_t idx_thread = 0; idx_thread < threads.size(); idx_thread++) {
+      threads[idx_thread].join();
+   }
+}